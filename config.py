@@ -19,9 +19,83 @@ AXELAR_GATEWAY_ADDRESS = os.getenv('AXELAR_GATEWAY_ADDRESS', "0xF6B117A166A8E196
 
 # Oracle Configuration
 ORACLE_PORT = int(os.getenv('ORACLE_PORT', 3000))
+# How long the oracle reuses a fetched gas price before asking the node again (seconds)
+ORACLE_GAS_PRICE_TTL = float(os.getenv('ORACLE_GAS_PRICE_TTL', 15))
+# How often the oracle checks the chain head for new blocks holding its transactions (seconds)
+ORACLE_RECEIPT_POLL_INTERVAL = float(os.getenv('ORACLE_RECEIPT_POLL_INTERVAL', 1.0))
+# Blocks that must be built on top of an oracle transaction's block before it counts as confirmed
+ORACLE_CONFIRMATIONS = int(os.getenv('ORACLE_CONFIRMATIONS', 0))
+# Attestations are collected for up to ORACLE_BATCH_WINDOW_MS (or until ORACLE_BATCH_MAX_SIZE
+# are queued) and sent as one batchUpdateKYCStatus transaction
+ORACLE_BATCH_WINDOW_MS = int(os.getenv('ORACLE_BATCH_WINDOW_MS', 200))
+ORACLE_BATCH_MAX_SIZE = int(os.getenv('ORACLE_BATCH_MAX_SIZE', 200))
+# Async serving mode (gcb_kyc_oracle_async.py): attestations in flight before new ones are
+# rejected with 429, keep-alive connections to the EVM RPC, and how long shutdown waits for
+# pending transactions.
+ORACLE_MAX_IN_FLIGHT = int(os.getenv('ORACLE_MAX_IN_FLIGHT', 1000))
+ORACLE_RPC_POOL_SIZE = int(os.getenv('ORACLE_RPC_POOL_SIZE', 100))
+ORACLE_DRAIN_TIMEOUT = float(os.getenv('ORACLE_DRAIN_TIMEOUT', 60))
+# Write one structured JSON log line per attestation, batch and confirmed transaction (to stderr)
+ORACLE_JSON_LOGS = os.getenv('ORACLE_JSON_LOGS', 'false').lower() in ('1', 'true', 'yes')
+# Write-ahead journal of the oracle's signed transactions and attestations, replayed and
+# reconciled against the chain on startup (empty to disable)
+ORACLE_JOURNAL_PATH = os.getenv('ORACLE_JOURNAL_PATH', 'gcb_oracle_journal.jsonl')
+# Oracle signer accounts (comma-separated private keys, each authorized on GCBToken with
+# signer_pool.py authorize); every signer gets its own nonce lane. Defaults to the deployer key.
+ORACLE_SIGNER_KEYS = [key.strip() for key in os.getenv('ORACLE_SIGNER_KEYS', '').split(',') if key.strip()] or [EVM_DEPLOYER_PRIVATE_KEY]
+# A lane stops getting new transactions while its oldest one has waited longer than this
+# (seconds) or its balance is below ORACLE_SIGNER_MIN_BALANCE (ether, checked every
+# ORACLE_BALANCE_CHECK_INTERVAL seconds)
+ORACLE_LANE_STALL_SECONDS = float(os.getenv('ORACLE_LANE_STALL_SECONDS', 120))
+ORACLE_SIGNER_MIN_BALANCE = float(os.getenv('ORACLE_SIGNER_MIN_BALANCE', 0.05))
+ORACLE_BALANCE_CHECK_INTERVAL = float(os.getenv('ORACLE_BALANCE_CHECK_INTERVAL', 30))
+# Signed EIP-712 KYC attestations (/kyc-attestation): how long one stays valid (seconds), and
+# worker processes that sign large batches (0 signs in the oracle process)
+ORACLE_ATTESTATION_TTL = int(os.getenv('ORACLE_ATTESTATION_TTL', 3600))
+ORACLE_ATTESTATION_WORKERS = int(os.getenv('ORACLE_ATTESTATION_WORKERS', 0))
+
+# KYC datastore shared by xrpl_did_kyc_setup.py and the oracle ("sqlite:///<path>" or "memory://")
+KYC_STORE_URL = os.getenv('KYC_STORE_URL', 'sqlite:///gcb_kyc.db')
+# Where the oracle gets KYC status: 'store' (the simulated KYC store above) or 'ledger'
+# (resolve the investor's DID and KYC credential on XRPL_NETWORK_URL through did_resolver.py)
+KYC_SOURCE = os.getenv('KYC_SOURCE', 'store')
+# Credentials of this type from this issuer (an XRPL address) count as approved KYC; the
+# issuer is required with KYC_SOURCE=ledger
+KYC_CREDENTIAL_TYPE = os.getenv('KYC_CREDENTIAL_TYPE', 'KYC')
+KYC_CREDENTIAL_ISSUER = os.getenv('KYC_CREDENTIAL_ISSUER', '')
+# DID resolution cache: entries, lifetime of a resolved DID and of an "unknown DID" answer (seconds)
+DID_CACHE_SIZE = int(os.getenv('DID_CACHE_SIZE', 100000))
+DID_CACHE_TTL = float(os.getenv('DID_CACHE_TTL', 300))
+DID_NEGATIVE_CACHE_TTL = float(os.getenv('DID_NEGATIVE_CACHE_TTL', 30))
+# Persistent websocket connections to the XRPL node shared by all lookups
+XRPL_WS_POOL_SIZE = int(os.getenv('XRPL_WS_POOL_SIZE', 4))
+# Bulk ledger sync (ledger_kyc_sync.py): ledger_data page size, key-space ranges paged
+# concurrently, and how often follow mode checks for a new validated ledger (seconds)
+LEDGER_SYNC_PAGE_LIMIT = int(os.getenv('LEDGER_SYNC_PAGE_LIMIT', 256))
+LEDGER_SYNC_RANGES = int(os.getenv('LEDGER_SYNC_RANGES', 16))
+LEDGER_SYNC_POLL_INTERVAL = float(os.getenv('LEDGER_SYNC_POLL_INTERVAL', 4))
+# Signed KYC credentials (kyc_credentials.py). xrpl_did_kyc_setup.py signs them with the
+# issuer seed (a new issuer is generated and saved to gcb_kyc_issuer.json when unset); the
+# oracle only accepts credentials from KYC_TRUSTED_ISSUERS (comma-separated DIDs, default:
+# the issuer in gcb_kyc_issuer.json) and, with KYC_VERIFY_CREDENTIALS, ignores kyc_approved
+# flags that are not backed by a valid credential.
+KYC_ISSUER_SEED = os.getenv('KYC_ISSUER_SEED', '')
+KYC_CREDENTIAL_VALIDITY_DAYS = float(os.getenv('KYC_CREDENTIAL_VALIDITY_DAYS', 365))
+KYC_TRUSTED_ISSUERS = [issuer.strip() for issuer in os.getenv('KYC_TRUSTED_ISSUERS', '').split(',') if issuer.strip()]
+KYC_VERIFY_CREDENTIALS = os.getenv('KYC_VERIFY_CREDENTIALS', 'true').lower() in ('1', 'true', 'yes')
+# Signature verification worker processes (0 verifies in the oracle process) and cached results
+KYC_VERIFY_WORKERS = int(os.getenv('KYC_VERIFY_WORKERS', os.cpu_count() or 1))
+KYC_VERIFY_CACHE_SIZE = int(os.getenv('KYC_VERIFY_CACHE_SIZE', 100000))
 
 # Smart Contract Address (will be set after deployment)
 ACCESS_CONTROL_CONTRACT_ADDRESS = os.getenv('ACCESS_CONTROL_CONTRACT_ADDRESS', None)
+# Block the GCBToken was deployed in (set by deploy_gcb_token.py); the event indexer starts here
+GCB_TOKEN_DEPLOY_BLOCK = int(os.getenv('GCB_TOKEN_DEPLOY_BLOCK') or 0)
+# Property tokens deployed as clones by deploy_property_tokens.py, per chain; the oracle attests for all of them
+TOKEN_REGISTRY_PATH = os.getenv('TOKEN_REGISTRY_PATH', 'gcb_tokens.json')
+
+# Local SQLite index of GCBToken events written by gcb_event_indexer.py
+GCB_EVENT_INDEX_PATH = os.getenv('GCB_EVENT_INDEX_PATH', 'gcb_index.db')
 
 # Simulation Data (for DIDs and VCs)
 SIMULATION_PERMISSIONS = ['premium_access', 'admin_dashboard_access', 'kyc_verified']
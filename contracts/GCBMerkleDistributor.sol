@@ -0,0 +1,89 @@
+// contracts/GCBMerkleDistributor.sol
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.20;
+
+import "@openzeppelin/contracts/access/Ownable.sol";
+import "@openzeppelin/contracts/utils/cryptography/MerkleProof.sol";
+
+/**
+ * @title GCBMerkleDistributor
+ * @dev Pays out income that must follow a holder-balance snapshot of a GCBToken.
+ * Each distribution is a Merkle root (built off-chain by scripts/merkle_payouts.py)
+ * over leaves keccak256(abi.encodePacked(index, account, amount)), hashed as sorted
+ * pairs. The owner funds a distribution in one transaction; holders (or anyone on
+ * their behalf) claim with a proof, so the cost never depends on the holder count.
+ */
+contract GCBMerkleDistributor is Ownable {
+    struct Distribution {
+        bytes32 merkleRoot;
+        uint256 totalAmount;
+        uint256 claimedAmount;
+        uint256 snapshotBlock;
+    }
+
+    // The GCBToken whose holder snapshots the distributions are built from
+    address public immutable token;
+
+    Distribution[] public distributions;
+
+    // distributionId => word index => bitmap of claimed leaf indexes
+    mapping(uint256 => mapping(uint256 => uint256)) private claimedBitMap;
+
+    // Events
+    event DistributionCreated(uint256 indexed distributionId, bytes32 merkleRoot, uint256 totalAmount, uint256 snapshotBlock);
+    event Claimed(uint256 indexed distributionId, uint256 index, address indexed account, uint256 amount);
+
+    constructor(address _token) Ownable(msg.sender) {
+        require(_token != address(0), "Token address cannot be zero");
+        token = _token;
+    }
+
+    /**
+     * @dev Creates a distribution funded with msg.value.
+     * @param _merkleRoot Root of the payout tree.
+     * @param _snapshotBlock Block at which the holder balances were snapshotted.
+     * @return distributionId The id to claim against.
+     */
+    function createDistribution(bytes32 _merkleRoot, uint256 _snapshotBlock) external payable onlyOwner returns (uint256 distributionId) {
+        require(_merkleRoot != bytes32(0), "Merkle root cannot be zero");
+        require(msg.value > 0, "Distribution must be funded");
+        distributionId = distributions.length;
+        distributions.push(Distribution(_merkleRoot, msg.value, 0, _snapshotBlock));
+        emit DistributionCreated(distributionId, _merkleRoot, msg.value, _snapshotBlock);
+    }
+
+    function distributionCount() external view returns (uint256) {
+        return distributions.length;
+    }
+
+    function isClaimed(uint256 _distributionId, uint256 _index) public view returns (bool) {
+        uint256 word = claimedBitMap[_distributionId][_index / 256];
+        uint256 mask = 1 << (_index % 256);
+        return word & mask == mask;
+    }
+
+    /**
+     * @dev Pays `_amount` to `_account` if the proof matches the distribution's root.
+     * @param _distributionId The distribution to claim from.
+     * @param _index The leaf index of the account in the payout tree.
+     * @param _account The holder being paid.
+     * @param _amount The holder's share of the distribution.
+     * @param _merkleProof Sibling hashes from the leaf up to the root.
+     */
+    function claim(uint256 _distributionId, uint256 _index, address _account, uint256 _amount, bytes32[] calldata _merkleProof) external {
+        require(_distributionId < distributions.length, "Unknown distribution");
+        require(!isClaimed(_distributionId, _index), "Already claimed");
+
+        Distribution storage distribution = distributions[_distributionId];
+        bytes32 leaf = keccak256(abi.encodePacked(_index, _account, _amount));
+        require(MerkleProof.verifyCalldata(_merkleProof, distribution.merkleRoot, leaf), "Invalid proof");
+
+        claimedBitMap[_distributionId][_index / 256] |= 1 << (_index % 256);
+        distribution.claimedAmount += _amount;
+        require(distribution.claimedAmount <= distribution.totalAmount, "Distribution exhausted");
+        emit Claimed(_distributionId, _index, _account, _amount);
+
+        (bool sent, ) = payable(_account).call{value: _amount}("");
+        require(sent, "Payout transfer failed");
+    }
+}
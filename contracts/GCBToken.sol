@@ -5,34 +5,150 @@ pragma solidity ^0.8.20;
 import "@openzeppelin/contracts/token/ERC20/ERC20.sol";
 import "@openzeppelin/contracts/access/Ownable.sol";
 import "@openzeppelin/contracts/utils/Context.sol";
+import "@openzeppelin/contracts/utils/cryptography/ECDSA.sol";
+import "@openzeppelin/contracts/utils/cryptography/EIP712.sol";
+import "@openzeppelin/contracts/utils/math/SafeCast.sol";
 
 /**
  * @title GCBToken
  * @dev An ERC-20 token representing fractional ownership of a Good Class Bungalow (GCB)
  * on the XRPL EVM Sidechain. This token implements a whitelist-based access control
  * mechanism for transfers, relying on KYC verification from an off-chain oracle.
- * It also includes a function for distributing simulated income.
+ * It also distributes income (e.g., rental proceeds) to token holders with a pull-based
+ * "income per share" accumulator, so distributing and claiming cost the same gas
+ * however many holders there are.
+ *
+ * The contract can be deployed directly (the constructor) or used as the implementation
+ * behind ERC-1167 minimal proxies (GCBTokenFactory), one per property. A clone has no
+ * constructor, so its name, symbol, owner, oracle signers and supply are set once by
+ * initialize(); the implementation itself is initialized by its constructor and can
+ * never be initialized again.
+ *
+ * Besides oracle transactions, KYC status can be set with an EIP-712 attestation signed
+ * by an oracle signer (registerWithAttestation, or transferWithAttestation bundled with
+ * a transfer). The investor or a relayer submits it and pays the gas; the oracle only
+ * signs.
  */
-contract GCBToken is ERC20, Ownable {
-    // Mapping to track whitelisted investors
-    mapping(address => bool) public isWhitelisted;
+contract GCBToken is ERC20, Ownable, EIP712 {
+    // Per-account state that every transfer touches, packed into one storage slot so the
+    // whitelist check and the income correction update share a single SLOAD/SSTORE.
+    struct Account {
+        bool whitelisted;
+        int248 magnifiedIncomeCorrection;
+    }
+    mapping(address => Account) internal accounts;
 
     // The address of our trusted KYC oracle (simulating Axelar Gateway in this context)
     address public kycOracleAddress;
+    // Set by the constructor or initialize(); shares kycOracleAddress's storage slot.
+    bool private _initialized;
+    // ERC20 keeps its name and symbol in constructor-set storage that clones never get, so
+    // they live here and are set by _initialize.
+    string private _tokenName;
+    string private _tokenSymbol;
+    // Every account allowed to send KYC updates: the primary oracle address plus any extra
+    // signers the owner adds, so the oracle can send from several accounts in parallel.
+    mapping(address => bool) public isOracleSigner;
+    // Accounts authorized through setOracleSigners (or initialize), tracked apart from
+    // kycOracleAddress so that changing one never revokes a grant made through the other.
+    mapping(address => bool) public isExtraOracleSigner;
+
+    // An oracle-signed statement, made at `issuedAt`, that `investor` has KYC status
+    // `status`, usable until `expiry` (both unix timestamps).
+    struct KYCAttestation {
+        address investor;
+        bool status;
+        uint256 issuedAt;
+        uint256 expiry;
+    }
+    bytes32 public constant KYC_ATTESTATION_TYPEHASH =
+        keccak256("KYCAttestation(address investor,bool status,uint256 issuedAt,uint256 expiry)");
+    // investor => timestamp of the block of their latest KYC status write. Every oracle
+    // update and every applied attestation sets it, and only attestations issued after it
+    // are accepted, so an attestation can be used once and never overrides a KYC decision
+    // written after it was signed. The oracle signs without reading any chain state.
+    mapping(address => uint256) public lastKycUpdate;
+
+    // Income accounting. Each holder is entitled to
+    //   (magnifiedIncomePerShare * balance + accounts[holder].magnifiedIncomeCorrection) / MAGNITUDE
+    // minus what they already withdrew. Transfers adjust the corrections of both parties
+    // so moving tokens never moves income that was distributed before the transfer.
+    uint256 internal constant MAGNITUDE = 2**128;
+    uint256 public magnifiedIncomePerShare;
+    mapping(address => uint256) public withdrawnIncome;
+    uint256 public totalIncomeDistributed;
 
     // Events
     event KYCStatusUpdated(address indexed investor, bool status);
+    event OracleSignerUpdated(address indexed signer, bool authorized);
     event TokensDistributed(address indexed distributor, uint256 amount);
     event IncomeDistributed(address indexed sender, uint256 totalAmount, uint256 timestamp);
+    event IncomeClaimed(address indexed holder, uint256 amount);
 
     constructor(uint256 initialSupply, address _kycOracleAddress)
-        ERC20("Good Class Bungalow Share", "GCBS")
+        ERC20("", "")
         Ownable(msg.sender)
+        EIP712("GCBToken", "1")
     {
-        require(_kycOracleAddress != address(0), "KYC Oracle address cannot be zero");
-        kycOracleAddress = _kycOracleAddress;
+        address[] memory oracleSigners = new address[](1);
+        oracleSigners[0] = _kycOracleAddress;
+        // Mints initial supply to the deployer (GCB owner/issuer)
+        _initialize("Good Class Bungalow Share", "GCBS", initialSupply, msg.sender, oracleSigners);
+    }
+
+    /**
+     * @dev Sets up a clone created by GCBTokenFactory. Can only be called once, and never
+     * on a directly deployed token (its constructor already initialized it).
+     * @param _name The token name.
+     * @param _symbol The token symbol.
+     * @param _initialSupply Tokens minted to _owner.
+     * @param _owner The GCB owner/issuer.
+     * @param _oracleSigners Accounts allowed to send KYC updates; the first one becomes kycOracleAddress.
+     */
+    function initialize(
+        string calldata _name,
+        string calldata _symbol,
+        uint256 _initialSupply,
+        address _owner,
+        address[] calldata _oracleSigners
+    ) external {
+        _initialize(_name, _symbol, _initialSupply, _owner, _oracleSigners);
+    }
+
+    function _initialize(
+        string memory _name,
+        string memory _symbol,
+        uint256 _initialSupply,
+        address _owner,
+        address[] memory _oracleSigners
+    ) internal {
+        require(!_initialized, "Already initialized");
+        require(_owner != address(0), "Owner cannot be zero");
+        require(_oracleSigners.length > 0 && _oracleSigners[0] != address(0), "KYC Oracle address cannot be zero");
+        _initialized = true;
+        _tokenName = _name;
+        _tokenSymbol = _symbol;
+        if (owner() != _owner) {
+            _transferOwnership(_owner);
+        }
+        kycOracleAddress = _oracleSigners[0];
+        _setOracleSigner(_oracleSigners[0], true);
+        for (uint256 i = 1; i < _oracleSigners.length; ) {
+            require(_oracleSigners[i] != address(0), "Oracle signer cannot be zero");
+            isExtraOracleSigner[_oracleSigners[i]] = true;
+            _setOracleSigner(_oracleSigners[i], true);
+            unchecked { ++i; }
+        }
+
+        _mint(_owner, _initialSupply);
+    }
+
+    function name() public view override returns (string memory) {
+        return _tokenName;
+    }
 
-        _mint(msg.sender, initialSupply); // Mints initial supply to the deployer (GCB owner/issuer)
+    function symbol() public view override returns (string memory) {
+        return _tokenSymbol;
     }
 
     /**
@@ -40,30 +156,56 @@ contract GCBToken is ERC20, Ownable {
      * This ensures only KYC'd individuals can interact with tokens.
      */
     modifier onlyWhitelisted() {
-        require(isWhitelisted[_msgSender()], "Caller is not whitelisted for GCB Tokens");
+        require(accounts[_msgSender()].whitelisted, "Caller is not whitelisted for GCB Tokens");
         _;
     }
 
     /**
-     * @dev Overrides the ERC20's _transfer function to enforce whitelisting.
+     * @dev Modifier to restrict functions to authorized KYC oracle signers.
+     */
+    modifier onlyOracleSigner() {
+        require(isOracleSigner[msg.sender], "Only the KYC Oracle can update status");
+        _;
+    }
+
+    /**
+     * @dev Returns whether an investor has been whitelisted by the KYC oracle.
+     * @param _investor The EVM address of the investor.
+     */
+    function isWhitelisted(address _investor) external view returns (bool) {
+        return accounts[_investor].whitelisted;
+    }
+
+    /**
+     * @dev Overrides the ERC20's _update hook (called for transfers, mints and burns) to
+     * enforce whitelisting and keep income corrections in step with balances.
      * Both sender and recipient must be whitelisted (except for the deployer/owner).
      */
-    function _transfer(address from, address to, uint256 amount) internal override {
-        // Allow owner to transfer tokens freely (e.g., for initial distribution)
-        // or if both from and to are the zero address (e.g., burning/minting related to initial supply)
-        if (from != owner() && to != owner()) { // Owner is special case for initial distribution/liquidity
-             require(isWhitelisted[from], "Sender not whitelisted");
-             require(isWhitelisted[to], "Recipient not whitelisted");
-        } else if (from == address(0)) { // Minting
-             // Minting to an un-whitelisted address is allowed, but they can't transfer out.
-             // This can be used for initial distribution to investors who are not yet KYC'd,
-             // and then they must undergo KYC to transfer.
-             // For this prototype, we'll ensure minting is to whitelisted, or owner can manage.
-        } else if (to == address(0)) { // Burning
-             // No specific whitelist for burning, typically.
+    function _update(address from, address to, uint256 amount) internal override {
+        // Allow owner to transfer tokens freely (e.g., for initial distribution).
+        // Minting (from == 0) and burning (to == 0) are not transfers between investors.
+        address currentOwner = owner();
+        Account storage sender = accounts[from];
+        Account storage recipient = accounts[to];
+        if (from != address(0) && to != address(0) && from != currentOwner && to != currentOwner) { // Owner is special case for initial distribution/liquidity
+            require(sender.whitelisted, "Sender not whitelisted");
+            require(recipient.whitelisted, "Recipient not whitelisted");
         }
 
-        super()._transfer(from, to, amount);
+        super._update(from, to, amount);
+
+        // Corrections only change once income has been distributed; until then skip the writes.
+        // The slots read for the whitelist check above are warm by now.
+        uint256 perShare = magnifiedIncomePerShare;
+        if (perShare != 0) {
+            int248 magnifiedCorrection = SafeCast.toInt248(SafeCast.toInt256(perShare * amount));
+            if (from != address(0)) {
+                sender.magnifiedIncomeCorrection += magnifiedCorrection;
+            }
+            if (to != address(0)) {
+                recipient.magnifiedIncomeCorrection -= magnifiedCorrection;
+            }
+        }
     }
 
     /**
@@ -73,66 +215,193 @@ contract GCBToken is ERC20, Ownable {
      * @param _investor The EVM address of the investor whose KYC status is being updated.
      * @param _status True to whitelist, false to de-whitelist.
      */
-    function updateKYCStatus(address _investor, bool _status) external {
-        require(msg.sender == kycOracleAddress, "Only the KYC Oracle can update status");
-        require(isWhitelisted[_investor] != _status, "Status is already the same");
-        isWhitelisted[_investor] = _status;
-        emit KYCStatusUpdated(_investor, _status);
+    function updateKYCStatus(address _investor, bool _status) external onlyOracleSigner {
+        require(accounts[_investor].whitelisted != _status, "Status is already the same");
+        _setKYCStatus(_investor, _status);
+    }
+
+    /**
+     * @dev Batch version of updateKYCStatus, used by the oracle to whitelist a whole
+     * onboarding round in one transaction. Entries whose status is already set do not
+     * revert, so one repeated attestation cannot sink the batch; they still set the
+     * investor's lastKycUpdate, which retires attestations signed before this update.
+     * @param _investors The EVM addresses of the investors being updated.
+     * @param _statuses The KYC status for each investor, in the same order as _investors.
+     */
+    function batchUpdateKYCStatus(address[] calldata _investors, bool[] calldata _statuses) external onlyOracleSigner {
+        require(_investors.length == _statuses.length, "Investors and statuses length mismatch");
+        for (uint256 i = 0; i < _investors.length; ) {
+            _setKYCStatus(_investors[i], _statuses[i]);
+            unchecked { ++i; }
+        }
+    }
+
+    function _setKYCStatus(address _investor, bool _status) internal {
+        lastKycUpdate[_investor] = block.timestamp;
+        Account storage account = accounts[_investor];
+        if (account.whitelisted != _status) {
+            account.whitelisted = _status;
+            emit KYCStatusUpdated(_investor, _status);
+        }
+    }
+
+    /**
+     * @dev Applies a KYC attestation signed by an oracle signer. Anyone may submit it (the
+     * investor, or a relayer on their behalf); the signature binds the investor, status,
+     * issue time and expiry to this token and chain.
+     * @param _attestation The attestation, as returned by the oracle.
+     * @param _signature The oracle signer's 65-byte signature over its EIP-712 digest.
+     */
+    function registerWithAttestation(KYCAttestation calldata _attestation, bytes calldata _signature) external {
+        _applyAttestation(_attestation, _signature);
+    }
+
+    /**
+     * @dev Applies a KYC attestation for the caller or the recipient, then transfers, so a
+     * first transfer to (or from) a newly onboarded investor needs no separate transaction.
+     * @param _to The recipient.
+     * @param _amount The amount to transfer.
+     * @param _attestation The attestation of the caller or of _to.
+     * @param _signature The oracle signer's signature over the attestation.
+     */
+    function transferWithAttestation(
+        address _to,
+        uint256 _amount,
+        KYCAttestation calldata _attestation,
+        bytes calldata _signature
+    ) external returns (bool) {
+        require(_attestation.investor == _msgSender() || _attestation.investor == _to, "Attestation is for another investor");
+        _applyAttestation(_attestation, _signature);
+        _transfer(_msgSender(), _to, _amount);
+        return true;
+    }
+
+    /**
+     * @dev The EIP-712 digest an oracle signer signs for an attestation.
+     */
+    function attestationDigest(KYCAttestation calldata _attestation) public view returns (bytes32) {
+        return _hashTypedDataV4(keccak256(abi.encode(
+            KYC_ATTESTATION_TYPEHASH,
+            _attestation.investor,
+            _attestation.status,
+            _attestation.issuedAt,
+            _attestation.expiry
+        )));
+    }
+
+    function _applyAttestation(KYCAttestation calldata _attestation, bytes calldata _signature) internal {
+        require(block.timestamp <= _attestation.expiry, "Attestation expired");
+        require(_attestation.issuedAt <= block.timestamp, "Attestation issued in the future");
+        require(_attestation.issuedAt > lastKycUpdate[_attestation.investor], "Attestation is stale");
+        address signer = ECDSA.recover(attestationDigest(_attestation), _signature);
+        require(isOracleSigner[signer], "Attestation not signed by a KYC oracle signer");
+        _setKYCStatus(_attestation.investor, _attestation.status);
+    }
+
+    /**
+     * @dev Transfers tokens from the caller to many recipients in one transaction, e.g.
+     * for a primary allocation. Every leg goes through _update, so each recipient's
+     * whitelist status is checked once and a standard Transfer event is emitted per
+     * recipient. The whole batch reverts if any leg fails.
+     * @param _recipients The addresses receiving tokens.
+     * @param _amounts The amount for each recipient, in the same order as _recipients.
+     */
+    function batchTransfer(address[] calldata _recipients, uint256[] calldata _amounts) external returns (bool) {
+        require(_recipients.length == _amounts.length, "Recipients and amounts length mismatch");
+        address sender = _msgSender();
+        for (uint256 i = 0; i < _recipients.length; ) {
+            _transfer(sender, _recipients[i], _amounts[i]);
+            unchecked { ++i; }
+        }
+        return true;
     }
 
     /**
      * @dev Sets a new KYC oracle address. Only callable by the contract owner.
+     * The previous address loses its signer rights unless it is also an extra signer;
+     * extra signers are unaffected.
      * @param _newKycOracleAddress The new address for the KYC oracle.
      */
     function setKycOracleAddress(address _newKycOracleAddress) external onlyOwner {
         require(_newKycOracleAddress != address(0), "New KYC Oracle address cannot be zero");
+        address previous = kycOracleAddress;
         kycOracleAddress = _newKycOracleAddress;
+        _setOracleSigner(previous, isExtraOracleSigner[previous] || previous == _newKycOracleAddress);
+        _setOracleSigner(_newKycOracleAddress, true);
+    }
+
+    /**
+     * @dev Authorizes or revokes additional oracle signer accounts. Only callable by the
+     * contract owner. Revoking kycOracleAddress this way only drops its extra grant: it
+     * keeps signing as the primary oracle until setKycOracleAddress replaces it.
+     * @param _signers The signer accounts.
+     * @param _authorized True to allow them to send KYC updates, false to revoke.
+     */
+    function setOracleSigners(address[] calldata _signers, bool _authorized) external onlyOwner {
+        address primary = kycOracleAddress;
+        for (uint256 i = 0; i < _signers.length; ) {
+            address signer = _signers[i];
+            require(signer != address(0), "Oracle signer cannot be zero");
+            isExtraOracleSigner[signer] = _authorized;
+            _setOracleSigner(signer, _authorized || signer == primary);
+            unchecked { ++i; }
+        }
+    }
+
+    function _setOracleSigner(address _signer, bool _authorized) internal {
+        if (isOracleSigner[_signer] != _authorized) {
+            isOracleSigner[_signer] = _authorized;
+            emit OracleSignerUpdated(_signer, _authorized);
+        }
     }
 
     /**
-     * @dev Simulates the distribution of income (e.g., rental proceeds) to token holders.
-     * This function sends native currency (ETH on EVM Sidechain) to token holders
-     * proportional to their share of the GCB tokens.
-     * This is a simplified model; a more robust solution would involve a pull mechanism
-     * or a separate dividend token.
-     * @param _amount The total amount of native currency to distribute.
+     * @dev Distributes income (e.g., rental proceeds, paid in native currency) to all token
+     * holders in proportion to their balances. The income is held by the contract and each
+     * holder pulls their share with claimIncome, so the cost of this call does not depend
+     * on the number of holders.
+     * @param _amount The total amount of native currency to distribute; must equal msg.value.
      */
-    function distributeIncome(uint256 _amount) external onlyOwner {
+    function distributeIncome(uint256 _amount) external payable onlyOwner {
         require(totalSupply() > 0, "No tokens in circulation to distribute income");
-        uint256 totalShares = totalSupply();
-
-        // This is a simplified distribution. In a real-world scenario,
-        // you'd typically iterate through all token holders (if manageable)
-        // or use a Merkle tree for gas efficiency for large numbers of holders.
-        // For this prototype, we'll demonstrate a simple distribution to a few
-        // known addresses, or rely on the `_transfer` function indirectly.
-        // Or, more simply, just emit an event indicating income has been distributed.
-
-        // To keep it simple and avoid gas limits for iterating all holders,
-        // we'll just emit an event and the off-chain system would handle actual transfers.
-        // For a true on-chain distribution, a pull-based mechanism is better.
-        // Let's make it send to owner only for simplicity if a specific receiver isn't passed
-        // or focus on the event.
-        
-        // Let's demonstrate by sending to the contract itself and then the contract owner can pull.
-        // Or for simpler demo: imagine the income comes to the contract, and people claim.
-        // For this demo, let's just emit the event and simulate the earning on the owner side.
-        // A more complex system would involve a claim function:
-        // function claimDividends() external {
-        //     uint256 pendingDividends = calculateDividends(_msgSender());
-        //     require(pendingDividends > 0, "No pending dividends");
-        //     _msgSender().transfer(pendingDividends);
-        //     // Update records
-        // }
-        
-        // For prototype, we'll just log the total amount intended for distribution.
-        // The actual transfer logic for many holders is beyond simple demonstration here.
-        // The income is "distributed" notionally.
+        require(_amount > 0, "Income amount must be greater than zero");
+        require(msg.value == _amount, "Sent value does not match income amount");
+
+        magnifiedIncomePerShare += (_amount * MAGNITUDE) / totalSupply();
+        totalIncomeDistributed += _amount;
         emit IncomeDistributed(msg.sender, _amount, block.timestamp);
-        
-        // If we want to show funds actually being sent, the owner can pull it from the contract.
-        // Or transfer to a specific recipient, e.g., the owner, for demonstration.
-        // If _amount is sent to the contract itself (which is not typical for dist.), it accumulates.
-        // Let's assume income arrives off-chain and this function logs its distribution intention.
     }
-}
\ No newline at end of file
+
+    /**
+     * @dev Total income ever distributed to a holder, withdrawn or not.
+     * @param _holder The token holder.
+     */
+    function accumulativeIncomeOf(address _holder) public view returns (uint256) {
+        int256 magnifiedIncome = SafeCast.toInt256(magnifiedIncomePerShare * balanceOf(_holder))
+            + accounts[_holder].magnifiedIncomeCorrection;
+        return SafeCast.toUint256(magnifiedIncome) / MAGNITUDE;
+    }
+
+    /**
+     * @dev Income a holder can claim right now.
+     * @param _holder The token holder.
+     */
+    function withdrawableIncome(address _holder) public view returns (uint256) {
+        return accumulativeIncomeOf(_holder) - withdrawnIncome[_holder];
+    }
+
+    /**
+     * @dev Sends the caller's withdrawable income to them.
+     */
+    function claimIncome() external {
+        address holder = _msgSender();
+        uint256 amount = withdrawableIncome(holder);
+        require(amount > 0, "No income to claim");
+
+        withdrawnIncome[holder] += amount;
+        emit IncomeClaimed(holder, amount);
+
+        (bool sent, ) = payable(holder).call{value: amount}("");
+        require(sent, "Income transfer failed");
+    }
+}
@@ -0,0 +1,75 @@
+// contracts/GCBTokenFactory.sol
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.20;
+
+import "@openzeppelin/contracts/proxy/Clones.sol";
+import "./GCBToken.sol";
+
+/**
+ * @title GCBTokenFactory
+ * @dev Deploys one GCBToken per property as an ERC-1167 minimal proxy of a shared
+ * implementation, so a new property costs a 45-byte clone and an initialize() call
+ * instead of the full token bytecode. Clones are created with CREATE2 from a salt that
+ * binds the creator and the property id, so each property's token address is known
+ * before it is deployed and another account cannot claim it first.
+ */
+contract GCBTokenFactory {
+    struct PropertyToken {
+        bytes32 propertyId;
+        string name;
+        string symbol;
+        uint256 initialSupply;
+        address owner;
+        address[] oracleSigners;
+    }
+
+    address public immutable implementation;
+
+    event PropertyTokenCreated(bytes32 indexed propertyId, address indexed token, address indexed creator);
+
+    constructor(address _implementation) {
+        require(_implementation.code.length > 0, "Implementation is not a contract");
+        implementation = _implementation;
+    }
+
+    /**
+     * @dev The CREATE2 salt of a property's clone.
+     * @param _creator The account that calls createToken/createTokens.
+     * @param _propertyId The property id (keccak256 of its name in the deployment manifest).
+     */
+    function saltFor(address _creator, bytes32 _propertyId) public pure returns (bytes32) {
+        return keccak256(abi.encode(_creator, _propertyId));
+    }
+
+    /**
+     * @dev The address a property's token has (or will have) when created by _creator.
+     */
+    function predictAddress(address _creator, bytes32 _propertyId) external view returns (address) {
+        return Clones.predictDeterministicAddress(implementation, saltFor(_creator, _propertyId));
+    }
+
+    /**
+     * @dev Creates and initializes one property token.
+     */
+    function createToken(PropertyToken calldata _token) external returns (address) {
+        return _create(_token);
+    }
+
+    /**
+     * @dev Creates and initializes several property tokens in one transaction. The whole
+     * batch reverts if any property was already created by the caller.
+     */
+    function createTokens(PropertyToken[] calldata _tokens) external returns (address[] memory tokens) {
+        tokens = new address[](_tokens.length);
+        for (uint256 i = 0; i < _tokens.length; ) {
+            tokens[i] = _create(_tokens[i]);
+            unchecked { ++i; }
+        }
+    }
+
+    function _create(PropertyToken calldata _token) internal returns (address token) {
+        token = Clones.cloneDeterministic(implementation, saltFor(msg.sender, _token.propertyId));
+        GCBToken(token).initialize(_token.name, _token.symbol, _token.initialSupply, _token.owner, _token.oracleSigners);
+        emit PropertyTokenCreated(_token.propertyId, token, msg.sender);
+    }
+}
@@ -0,0 +1,326 @@
+# scripts/allocate_tokens.py
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sys
+import time
+from decimal import Decimal, InvalidOperation
+from web3 import Web3
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import config
+from batch_reads import BatchReader
+from contract_artifacts import load_artifact
+from nonce_manager import NonceManager, is_nonce_error
+from receipt_tracker import ReceiptTracker, TransactionDropped
+
+# Bulk GCBS allocation (e.g. a primary issuance) from an "address,amount" CSV. Rows are
+# packed into batchTransfer calls sized to stay under a gas budget, the batches are sent
+# back to back with locally managed nonces, and every batch is written to a JSONL
+# journal before it is broadcast and again when it settles. Re-running with the same
+# journal settles the batches it left in flight, skips rows that already landed and
+# re-sends only what was dropped or reverted.
+
+DEFAULT_MAX_BATCH_GAS = 8_000_000
+GAS_HEADROOM = 1.25  # Probe estimates are taken against the current state; later batches may cost a bit more
+PROBE_SIZE = 10
+
+
+def read_allocations(path, unit='ether'):
+    # Returns [(row number, checksummed address, amount in wei)]; the header row is optional.
+    rows = []
+    with open(path, newline='') as f:
+        for line_number, fields in enumerate(csv.reader(f), start=1):
+            if not fields or not fields[0].strip() or fields[0].strip().startswith('#'):
+                continue
+            address, amount = fields[0].strip(), fields[1].strip() if len(fields) > 1 else ''
+            if line_number == 1 and not Web3.is_address(address):
+                continue  # Header
+            if not Web3.is_address(address):
+                raise ValueError(f"{path}:{line_number}: invalid address {address!r}")
+            try:
+                amount_wei = Web3.to_wei(Decimal(amount), unit)
+            except (InvalidOperation, ValueError):
+                raise ValueError(f"{path}:{line_number}: invalid amount {amount!r}")
+            if amount_wei <= 0:
+                raise ValueError(f"{path}:{line_number}: amount must be positive")
+            rows.append((line_number, Web3.to_checksum_address(address), amount_wei))
+    return rows
+
+
+class Journal:
+    """
+    Append-only JSONL record of allocation batches: a 'sent' entry with the rows, nonce,
+    tx hash and signed transaction, written before the batch is broadcast (it is the
+    NonceManager's journal), then a final entry ('confirmed', 'reverted' or 'dropped').
+    With no path the journal is kept in memory only.
+    """
+
+    def __init__(self, path=None, source_digest=None):
+        self.path = path
+        self.batches = {}  # batch id -> latest entry (with rows from the 'sent' entry)
+        self.skipped = {}  # row number -> reason
+        if path and os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    if line.strip():
+                        self._apply(json.loads(line))
+        header = self.batches.pop('header', None)
+        if header and source_digest and header.get('source_digest') != source_digest:
+            raise ValueError(f"Journal {path} was written for a different allocation file")
+        self._file = open(path, 'a') if path else None
+        if header is None:
+            self.record(batch='header', status='header', source_digest=source_digest)
+            self.batches.pop('header', None)
+
+    def _apply(self, entry):
+        if entry.get('status') == 'skipped':
+            self.skipped[entry['row']] = entry['reason']
+            return
+        previous = self.batches.get(entry['batch'], {})
+        self.batches[entry['batch']] = dict(previous, **entry)
+
+    def record(self, **entry):
+        self._apply(entry)
+        if self._file:
+            self._file.write(json.dumps(entry) + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    # --- NonceManager journal hooks ---
+
+    @staticmethod
+    def signed_entry(record, signed_txn, sender, nonce, chain_id, intent=None):
+        return dict(intent, status='sent', tx_hash=signed_txn.hash.hex(), nonce=nonce,
+                    raw=signed_txn.rawTransaction.hex())
+
+    def commit(self, entry):
+        self.record(**entry)
+
+    @staticmethod
+    def settled_entry(record, status):
+        return None
+
+    def append(self, entry):
+        # Final entries are written by allocate() once it sees a batch settle, so the
+        # receipt tracker's thread never writes to the journal.
+        pass
+
+    def rows_with_status(self, status):
+        return {row for entry in self.batches.values() if entry['status'] == status for row in entry['rows']}
+
+    def next_batch_id(self):
+        return max(self.batches, default=-1) + 1
+
+    def close(self):
+        if self._file:
+            self._file.close()
+
+
+def estimate_gas_model(contract, sender, rows):
+    # Fits gas(batch) ~= base + per_recipient * n from two estimates on the first rows.
+    def estimate(sample):
+        return contract.functions.batchTransfer(
+            [address for _, address, _ in sample], [amount for _, _, amount in sample]
+        ).estimate_gas({'from': sender})
+
+    single = estimate(rows[:1])
+    probe = rows[:min(PROBE_SIZE, len(rows))]
+    if len(probe) == 1:
+        return single, single
+    per_recipient = max(1, (estimate(probe) - single) // (len(probe) - 1))
+    return single - per_recipient, per_recipient
+
+
+def plan_batches(rows, base_gas, per_recipient_gas, max_batch_gas):
+    per_batch = max(1, int((max_batch_gas / GAS_HEADROOM - base_gas) // per_recipient_gas))
+    return [rows[start:start + per_batch] for start in range(0, len(rows), per_batch)]
+
+
+def wait_for_oldest(nonce_manager, records, timeout=600):
+    # Blocks until the oldest of `records` (sent through nonce_manager) has settled, instead
+    # of sleeping between status checks. The tracker answers it from its next head poll, or
+    # from an inline poll when it has no poller thread (e.g. on an automining local EVM).
+    oldest = records[0]
+    future = nonce_manager.tracker.track(oldest['tx_hash'], sender=nonce_manager.account.address, nonce=oldest['nonce'])
+    try:
+        nonce_manager.tracker.wait_for([future], timeout=timeout)
+    except TransactionDropped:
+        pass  # The nonce manager marks the record as 'error'
+
+
+def settle_previous_run(w3, journal, sender):
+    # Batches a previous run journaled but never saw settle: look them up on chain, and
+    # wait for those still in the mempool together. A batch the node does not know may
+    # never have been broadcast (the run stopped right after journaling it), so while its
+    # nonce is unused it is broadcast again rather than given up, since the same signed
+    # transaction can land at most once.
+    tracker = ReceiptTracker(w3)
+    chain_nonce = w3.eth.get_transaction_count(sender, 'pending')
+    waiting = {}
+    for batch_id, entry in sorted(journal.batches.items(), key=lambda item: item[1].get('nonce') or 0):
+        if entry['status'] != 'sent':
+            continue
+        receipt = _receipt(w3, entry['tx_hash'])
+        if receipt is None and not _in_mempool(w3, entry['tx_hash']):
+            if not entry.get('raw') or entry['nonce'] < chain_nonce:
+                journal.record(batch=batch_id, status='dropped')  # Its nonce was used by another transaction
+                continue
+            try:
+                w3.eth.send_raw_transaction(entry['raw'])
+            except Exception as e:
+                if not is_nonce_error(e):
+                    raise
+                receipt = _receipt(w3, entry['tx_hash'])
+                if receipt is None and not _in_mempool(w3, entry['tx_hash']):
+                    journal.record(batch=batch_id, status='dropped')
+                    continue
+        if receipt is None:
+            waiting[batch_id] = tracker.track(entry['tx_hash'])
+            continue
+        journal.record(batch=batch_id, status='confirmed' if receipt.status == 1 else 'reverted',
+                       block=receipt.blockNumber, gas_used=receipt.gasUsed)
+    for batch_id, future in waiting.items():
+        try:
+            receipt = tracker.wait_for([future], timeout=300)[0]
+        except Exception:
+            journal.record(batch=batch_id, status='dropped')
+            continue
+        journal.record(batch=batch_id, status='confirmed' if receipt.status == 1 else 'reverted',
+                       block=receipt.blockNumber, gas_used=receipt.gasUsed)
+
+
+def _receipt(w3, tx_hash):
+    try:
+        return w3.eth.get_transaction_receipt(tx_hash)
+    except Exception:
+        return None
+
+
+def _in_mempool(w3, tx_hash):
+    try:
+        w3.eth.get_transaction(tx_hash)
+        return True
+    except Exception:
+        return False
+
+
+def allocate(w3, gcb_token_contract, account, private_key, rows, journal=None, max_batch_gas=DEFAULT_MAX_BATCH_GAS,
+             max_pending=16, poll_interval=1.0, tracker=None):
+    journal = journal or Journal()
+    settle_previous_run(w3, journal, account.address)
+
+    done = journal.rows_with_status('confirmed')
+    remaining = [row for row in rows if row[0] not in done]
+    summary = {"rows": len(rows), "already_allocated": len(rows) - len(remaining), "skipped": 0, "batches": 0,
+               "confirmed": 0, "failed": 0, "gas_used": 0}
+    if not remaining:
+        return summary
+
+    # Primary allocations only go to KYC-approved investors.
+    whitelisted = BatchReader(w3, gcb_token_contract).is_whitelisted_many({address for _, address, _ in remaining})
+    unread = sorted(address for address, status in whitelisted.items() if status is None)
+    if unread:
+        # A failed read says nothing about the recipient, so it must not be journaled as a skip.
+        raise RuntimeError(f"Could not read the whitelist status of {len(unread)} recipient(s) "
+                           f"(first: {unread[0]}); nothing was sent")
+    for row_number, address, _ in remaining:
+        if not whitelisted[address]:
+            journal.record(row=row_number, status='skipped', reason='recipient not whitelisted')
+            summary["skipped"] += 1
+            print(f"  Row {row_number}: skipping {address} (not whitelisted)")
+    remaining = [row for row in remaining if whitelisted[row[1]]]
+    if not remaining:
+        return summary
+
+    needed = sum(amount for _, _, amount in remaining)
+    balance = gcb_token_contract.functions.balanceOf(account.address).call()
+    if balance < needed:
+        raise ValueError(f"Allocating {needed} wei needs more than the sender's balance of {balance} wei")
+
+    base_gas, per_recipient_gas = estimate_gas_model(gcb_token_contract, account.address, remaining)
+    batches = plan_batches(remaining, base_gas, per_recipient_gas, max_batch_gas)
+    print(f"Allocating {len(remaining)} row(s) in {len(batches)} batch(es) "
+          f"(~{per_recipient_gas} gas per recipient, {len(batches[0])} recipients per batch).")
+
+    nonce_manager = NonceManager(w3, account, private_key, poll_interval=poll_interval, journal=journal, tracker=tracker)
+    nonce_manager.start()
+    in_flight = {}  # batch id -> record
+
+    def settle_finished():
+        for batch_id, record in list(in_flight.items()):
+            if record['status'] != 'pending':
+                in_flight.pop(batch_id)
+                journal.record(batch=batch_id, status=record['status'], block=record['block_number'], gas_used=record['gas_used'])
+                summary['confirmed' if record['status'] == 'confirmed' else 'failed'] += 1
+                summary['gas_used'] += record['gas_used'] or 0
+
+    try:
+        batch_id = journal.next_batch_id()
+        for batch in batches:
+            while nonce_manager.pending_count() >= max_pending:
+                wait_for_oldest(nonce_manager, list(in_flight.values()))
+                settle_finished()
+            record = nonce_manager.submit(
+                gcb_token_contract.functions.batchTransfer(
+                    [address for _, address, _ in batch], [amount for _, _, amount in batch]
+                ),
+                record_id=f"allocation-{batch_id}",
+                gas=int((base_gas + per_recipient_gas * len(batch)) * GAS_HEADROOM),
+                intent={'batch': batch_id, 'rows': [row_number for row_number, _, _ in batch]},
+            )
+            print(f"  Batch {batch_id}: {len(batch)} recipient(s), nonce {record['nonce']}, tx {record['tx_hash']}")
+            in_flight[batch_id] = record
+            summary["batches"] += 1
+            batch_id += 1
+            settle_finished()
+
+        while in_flight:
+            wait_for_oldest(nonce_manager, list(in_flight.values()))
+            settle_finished()
+    finally:
+        nonce_manager.stop()
+    return summary
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Allocate GCBS to many investors from an address,amount CSV.")
+    parser.add_argument("csv", help="Allocation file with one 'address,amount' row per investor")
+    parser.add_argument("--journal", help="Progress journal (default: <csv>.journal.jsonl)")
+    parser.add_argument("--wei", action="store_true", help="Amounts are in wei instead of whole tokens")
+    parser.add_argument("--max-batch-gas", type=int, default=DEFAULT_MAX_BATCH_GAS)
+    parser.add_argument("--max-pending", type=int, default=16, help="Batches in flight at once")
+    args = parser.parse_args(argv)
+
+    w3 = Web3(Web3.HTTPProvider(config.EVM_NETWORK_URL))
+    if not w3.is_connected():
+        print(f"Error: Could not connect to EVM network at {config.EVM_NETWORK_URL}")
+        sys.exit(1)
+    if not config.ACCESS_CONTROL_CONTRACT_ADDRESS:
+        print("ERROR: ACCESS_CONTROL_CONTRACT_ADDRESS (GCBToken address) not set in .env. Please run deploy_gcb_token.py first.")
+        sys.exit(1)
+    gcb_token_contract = w3.eth.contract(address=config.ACCESS_CONTROL_CONTRACT_ADDRESS, abi=load_artifact('GCBToken')['abi'])
+
+    deployer_private_key = config.EVM_DEPLOYER_PRIVATE_KEY
+    if not deployer_private_key.startswith('0x'):
+        deployer_private_key = '0x' + deployer_private_key
+    owner_account = w3.eth.account.from_key(deployer_private_key)
+
+    with open(args.csv, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    rows = read_allocations(args.csv, unit='wei' if args.wei else 'ether')
+    journal = Journal(args.journal or args.csv + ".journal.jsonl", source_digest=digest)
+    started = time.perf_counter()
+    try:
+        summary = allocate(w3, gcb_token_contract, owner_account, deployer_private_key, rows, journal,
+                           max_batch_gas=args.max_batch_gas, max_pending=args.max_pending)
+    finally:
+        journal.close()
+    print(f"Done in {time.perf_counter() - started:.1f}s: {summary}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+# scripts/attestation_journal.py
+import asyncio
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+from web3.exceptions import TransactionNotFound
+
+from nonce_manager import is_nonce_error
+from oracle_metrics import JOURNAL_COMMIT_SECONDS, JOURNAL_GROUP_SIZE
+
+# Write-ahead journal for the oracle's transactions and attestations (JSON lines).
+#
+#   {"op": "signed", "record_id", "tx_hash", "from", "nonce", "chain_id", "raw", "intent"}  before the send
+#   {"op": "settled", "record_id", "status", "block_number", "gas_used"}
+#   {"op": "attestation", "id", "xrpl_did", "investor_evm_address", "kyc_status", "tx_record_id"}
+#
+# A 'signed' entry is durable before its transaction is broadcast, so after a crash every
+# transaction that may have reached the node is known, down to its raw bytes. Writes
+# are group-committed: one writer thread appends everything queued since its last fsync
+# and fsyncs once, so concurrent submitters share the cost of each fsync.
+#
+# On startup, replay_journal() rebuilds the state and reconcile_journal() settles it
+# against the chain. Transactions with a receipt are settled. Those still in the mempool
+# are handed back to the nonce manager. Those the node never saw are re-broadcast
+# byte for byte if their nonce is still free, and marked dropped if it is not (or if
+# the node rejects the re-broadcast for its nonce and has no record of the transaction).
+# Nothing is ever re-signed blindly.
+
+FINAL_STATUSES = ('confirmed', 'reverted', 'error', 'dropped')
+
+
+def replay_journal(path):
+    # Returns {'transactions': {record id: entry}, 'attestations': {attestation id: entry}}.
+    state = {'transactions': {}, 'attestations': {}}
+    if not path or not os.path.exists(path):
+        return state
+    with open(path) as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # A torn last line from a crash; it was never acknowledged.
+            op = entry.pop('op', None)
+            if op == 'signed':
+                # A resend after a nonce error replaces the earlier attempt.
+                state['transactions'][entry['record_id']] = dict(entry, status='pending')
+            elif op == 'settled':
+                transaction = state['transactions'].get(entry['record_id'])
+                if transaction is not None:
+                    transaction.update(entry)
+            elif op == 'attestation':
+                state['attestations'][entry.pop('id')] = entry
+    return state
+
+
+def pending_transactions(state, chain_id=None, sender=None):
+    return [
+        entry for entry in state['transactions'].values()
+        if entry['status'] not in FINAL_STATUSES
+        and (chain_id is None or entry.get('chain_id') == chain_id)
+        and (sender is None or entry.get('from', sender) == sender)
+    ]
+
+
+def _settle(entry, receipt):
+    entry.update(status='confirmed' if receipt['status'] == 1 else 'reverted',
+                 block_number=receipt['blockNumber'], gas_used=receipt['gasUsed'])
+
+
+def _locate(w3, entry):
+    # 'settled' (its receipt is applied to the entry), 'in_flight' (in the mempool), or
+    # None when the node does not know the transaction.
+    try:
+        _settle(entry, w3.eth.get_transaction_receipt(entry['tx_hash']))
+        return 'settled'
+    except TransactionNotFound:
+        pass
+    try:
+        w3.eth.get_transaction(entry['tx_hash'])
+        return 'in_flight'
+    except TransactionNotFound:
+        return None
+
+
+async def _locate_async(w3, entry):
+    try:
+        _settle(entry, await w3.eth.get_transaction_receipt(entry['tx_hash']))
+        return 'settled'
+    except TransactionNotFound:
+        pass
+    try:
+        await w3.eth.get_transaction(entry['tx_hash'])
+        return 'in_flight'
+    except TransactionNotFound:
+        return None
+
+
+def _apply_location(entry, location, in_flight):
+    if location == 'in_flight':
+        in_flight.append(entry)
+    elif location is None:
+        entry.update(status='dropped')  # Its nonce was used by another transaction
+
+
+def reconcile_journal(w3, state, address):
+    # Settles the replayed transactions of `address` (the journal's signing account) on
+    # this chain against the chain (see above). Returns the entries still in flight.
+    chain_nonce = w3.eth.get_transaction_count(address, 'pending')
+    in_flight = []
+    for entry in sorted(pending_transactions(state, w3.eth.chain_id, address), key=lambda entry: entry['nonce']):
+        location = _locate(w3, entry)
+        if location is None and entry['nonce'] >= chain_nonce:
+            try:
+                w3.eth.send_raw_transaction(entry['raw'])
+                location = 'in_flight'
+            except Exception as e:
+                if not is_nonce_error(e):
+                    raise
+                # It reached the node after all ("already known", or mined meanwhile), or
+                # another transaction took its nonce.
+                location = _locate(w3, entry)
+        _apply_location(entry, location, in_flight)
+    return in_flight
+
+
+async def reconcile_journal_async(w3, state, address):
+    # The same for AsyncWeb3.
+    chain_nonce = await w3.eth.get_transaction_count(address, 'pending')
+    in_flight = []
+    for entry in sorted(pending_transactions(state, await w3.eth.chain_id, address), key=lambda entry: entry['nonce']):
+        location = await _locate_async(w3, entry)
+        if location is None and entry['nonce'] >= chain_nonce:
+            try:
+                await w3.eth.send_raw_transaction(entry['raw'])
+                location = 'in_flight'
+            except Exception as e:
+                if not is_nonce_error(e):
+                    raise
+                location = await _locate_async(w3, entry)
+        _apply_location(entry, location, in_flight)
+    return in_flight
+
+
+class AttestationJournal:
+    """
+    Appends journal entries with group commit. `append()` queues an entry and returns a
+    Future that resolves once it is on disk; `commit()` / `commit_async()` wait for it.
+
+    Opening the journal rewrites it from `state` (the reconciled replay), keeping every
+    unsettled transaction and the most recent `keep_settled` settled ones with their
+    attestations (and as many attestations that needed no transaction), so the file
+    does not grow across restarts.
+    """
+
+    def __init__(self, path, state=None, keep_settled=10000):
+        self.path = path
+        self._queue = []  # (line, future or None)
+        self._condition = threading.Condition()
+        self._closed = False
+        self.groups = 0
+        self.entries = 0
+        self._compact(state or {'transactions': {}, 'attestations': {}}, keep_settled)
+        self._file = open(path, 'a')
+        self._writer = threading.Thread(target=self._write_loop, name='attestation-journal', daemon=True)
+        self._writer.start()
+
+    def _compact(self, state, keep_settled):
+        transactions = list(state['transactions'].values())
+        settled = [entry for entry in transactions if entry['status'] in FINAL_STATUSES][-keep_settled:]
+        kept = {entry['record_id'] for entry in settled} | {entry['record_id'] for entry in pending_transactions(state)}
+        temporary = self.path + '.tmp'
+        with open(temporary, 'w') as f:
+            for entry in transactions:
+                if entry['record_id'] not in kept:
+                    continue
+                signed = {key: entry[key] for key in ('record_id', 'tx_hash', 'from', 'nonce', 'chain_id', 'raw', 'intent') if key in entry}
+                f.write(json.dumps(dict(signed, op='signed')) + "\n")
+                if entry['status'] in FINAL_STATUSES:
+                    f.write(json.dumps(self.settled_entry(entry, entry['status'])) + "\n")
+            attestations = list(state['attestations'].items())
+            unchanged = [item for item in attestations if item[1].get('tx_record_id') is None][-keep_settled:]
+            for attestation_id, attestation in attestations:
+                if attestation.get('tx_record_id') in kept:
+                    f.write(json.dumps(self.attestation_entry(attestation_id, attestation)) + "\n")
+            for attestation_id, attestation in unchanged:
+                f.write(json.dumps(self.attestation_entry(attestation_id, attestation)) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, self.path)
+
+    # --- Entries ---
+
+    @staticmethod
+    def signed_entry(record, signed_txn, sender, nonce, chain_id, intent=None):
+        return {'op': 'signed', 'record_id': record['id'], 'tx_hash': signed_txn.hash.hex(), 'from': sender,
+                'nonce': nonce, 'chain_id': chain_id, 'raw': signed_txn.rawTransaction.hex(), 'intent': intent}
+
+    @staticmethod
+    def settled_entry(record, status):
+        return {'op': 'settled', 'record_id': record.get('id', record.get('record_id')), 'status': status,
+                'block_number': record.get('block_number'), 'gas_used': record.get('gas_used')}
+
+    @staticmethod
+    def attestation_entry(attestation_id, attestation):
+        return dict(attestation, op='attestation', id=attestation_id)
+
+    # --- Group commit ---
+
+    def append(self, entry, durable=False):
+        future = Future() if durable else None
+        line = json.dumps(entry)
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("attestation journal is closed")
+            self._queue.append((line, future))
+            self._condition.notify()
+        return future
+
+    def commit(self, entry):
+        self.append(entry, durable=True).result()
+
+    async def commit_async(self, entry):
+        await asyncio.wrap_future(self.append(entry, durable=True))
+
+    def _write_loop(self):
+        while True:
+            with self._condition:
+                while not self._queue and not self._closed:
+                    self._condition.wait()
+                group, self._queue = self._queue, []
+                if not group and self._closed:
+                    return
+            started = time.perf_counter()
+            try:
+                self._file.write("".join(line + "\n" for line, _ in group))
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            except Exception as e:
+                for _, future in group:
+                    if future is not None:
+                        future.set_exception(e)
+                continue
+            JOURNAL_COMMIT_SECONDS.observe(time.perf_counter() - started)
+            JOURNAL_GROUP_SIZE.observe(len(group))
+            self.groups += 1
+            self.entries += len(group)
+            for _, future in group:
+                if future is not None:
+                    future.set_result(None)
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._writer.join()
+        self._file.close()
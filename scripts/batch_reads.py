@@ -0,0 +1,160 @@
+# scripts/batch_reads.py
+from collections import namedtuple
+
+from eth_utils import function_signature_to_4byte_selector
+from web3 import Web3
+
+# Batched GCBToken view calls. Instead of one eth_call per address and function, calls
+# are packed into one Multicall3 aggregate3 call per chunk when Multicall3 is deployed on
+# the chain, or into one JSON-RPC batch request per chunk over HTTP. A plain per-call
+# loop remains as the fallback (e.g. for the in-process eth-tester backend).
+
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"  # Same address on every chain it is deployed to
+MULTICALL3_ABI = [{
+    "name": "aggregate3",
+    "type": "function",
+    "stateMutability": "payable",
+    "inputs": [{
+        "name": "calls",
+        "type": "tuple[]",
+        "components": [
+            {"name": "target", "type": "address"},
+            {"name": "allowFailure", "type": "bool"},
+            {"name": "callData", "type": "bytes"},
+        ],
+    }],
+    "outputs": [{
+        "name": "returnData",
+        "type": "tuple[]",
+        "components": [
+            {"name": "success", "type": "bool"},
+            {"name": "returnData", "type": "bytes"},
+        ],
+    }],
+}]
+
+# Single-address view functions on GCBToken and how to decode their return word.
+VIEW_FUNCTIONS = {
+    "isWhitelisted": ("isWhitelisted(address)", lambda word: word != 0),
+    "balanceOf": ("balanceOf(address)", lambda word: word),
+    "withdrawableIncome": ("withdrawableIncome(address)", lambda word: word),
+}
+
+HolderState = namedtuple("HolderState", ["address", "is_whitelisted", "balance"])
+
+
+class BatchReader:
+    def __init__(self, w3, contract, chunk_size=500, multicall_address=MULTICALL3_ADDRESS, mode="auto"):
+        self.w3 = w3
+        self.target = contract.address
+        self.chunk_size = chunk_size
+        self.rpc_calls = 0
+        self._selectors = {name: function_signature_to_4byte_selector(signature) for name, (signature, _) in VIEW_FUNCTIONS.items()}
+        self._session = None
+
+        if mode == "auto":
+            if multicall_address and w3.eth.get_code(Web3.to_checksum_address(multicall_address)):
+                mode = "multicall"
+            elif isinstance(w3.provider, Web3.HTTPProvider):
+                mode = "rpc-batch"
+            else:
+                mode = "sequential"
+        self.mode = mode
+        if mode == "multicall":
+            self._multicall = w3.eth.contract(address=Web3.to_checksum_address(multicall_address), abi=MULTICALL3_ABI)
+
+    def _calldata(self, function_name, address):
+        return self._selectors[function_name] + b"\x00" * 12 + bytes.fromhex(address[2:])
+
+    def call_many(self, calls, block_identifier="latest"):
+        # calls: [(function_name, address)]. Returns decoded results in the same order;
+        # a call that reverts yields None.
+        if block_identifier == "latest" and len(calls) > self.chunk_size:
+            # Pin the block so every chunk reads the same state.
+            block_identifier = self.w3.eth.block_number
+        results = []
+        for start in range(0, len(calls), self.chunk_size):
+            chunk = calls[start:start + self.chunk_size]
+            payloads = [self._calldata(function_name, address) for function_name, address in chunk]
+            if self.mode == "multicall":
+                raw = self._multicall_chunk(payloads, block_identifier)
+            elif self.mode == "rpc-batch":
+                raw = self._rpc_batch_chunk(payloads, block_identifier)
+            else:
+                raw = self._sequential_chunk(payloads, block_identifier)
+            for (function_name, _), data in zip(chunk, raw):
+                decode = VIEW_FUNCTIONS[function_name][1]
+                results.append(decode(int.from_bytes(data[:32], 'big')) if data is not None and len(data) >= 32 else None)
+        return results
+
+    def _multicall_chunk(self, payloads, block_identifier):
+        self.rpc_calls += 1
+        returned = self._multicall.functions.aggregate3(
+            [(self.target, True, payload) for payload in payloads]
+        ).call(block_identifier=block_identifier)
+        return [bytes(data) if success else None for success, data in returned]
+
+    def _rpc_batch_chunk(self, payloads, block_identifier):
+        import requests
+
+        if self._session is None:
+            self._session = requests.Session()
+        if isinstance(block_identifier, int):
+            block_identifier = hex(block_identifier)
+        body = [
+            {"jsonrpc": "2.0", "id": i, "method": "eth_call",
+             "params": [{"to": self.target, "data": "0x" + payload.hex()}, block_identifier]}
+            for i, payload in enumerate(payloads)
+        ]
+        self.rpc_calls += 1
+        response = self._session.post(self.w3.provider.endpoint_uri, json=body, timeout=60)
+        response.raise_for_status()
+        reply = response.json()
+        if not isinstance(reply, list):
+            # A provider that rejects the whole batch (no batch support, rate limit, size
+            # limit) answers with a single error object instead of a list of replies.
+            error = reply.get("error", reply) if isinstance(reply, dict) else reply
+            message = error.get("message", error) if isinstance(error, dict) else error
+            raise RuntimeError(f"JSON-RPC batch rejected by {self.w3.provider.endpoint_uri}: {message}")
+        by_id = {item["id"]: item for item in reply if isinstance(item, dict) and "id" in item}
+        return [
+            bytes.fromhex(by_id[i]["result"][2:]) if "result" in by_id.get(i, {}) else None
+            for i in range(len(payloads))
+        ]
+
+    def _sequential_chunk(self, payloads, block_identifier):
+        raw = []
+        for payload in payloads:
+            self.rpc_calls += 1
+            try:
+                raw.append(bytes(self.w3.eth.call({"to": self.target, "data": payload}, block_identifier)))
+            except Exception:
+                raw.append(None)
+        return raw
+
+    def _call_for_each(self, function_name, addresses, block_identifier):
+        addresses = [Web3.to_checksum_address(address) for address in addresses]
+        results = self.call_many([(function_name, address) for address in addresses], block_identifier)
+        return dict(zip(addresses, results))
+
+    def is_whitelisted_many(self, addresses, block_identifier="latest"):
+        return self._call_for_each("isWhitelisted", addresses, block_identifier)
+
+    def balance_of_many(self, addresses, block_identifier="latest"):
+        return self._call_for_each("balanceOf", addresses, block_identifier)
+
+    def withdrawable_income_many(self, addresses, block_identifier="latest"):
+        return self._call_for_each("withdrawableIncome", addresses, block_identifier)
+
+    def holder_states(self, addresses, block_identifier="latest"):
+        # Whitelist flag and balance for every address, read at the same block.
+        addresses = [Web3.to_checksum_address(address) for address in addresses]
+        calls = []
+        for address in addresses:
+            calls.append(("isWhitelisted", address))
+            calls.append(("balanceOf", address))
+        results = self.call_many(calls, block_identifier)
+        return {
+            address: HolderState(address, results[2 * i], results[2 * i + 1])
+            for i, address in enumerate(addresses)
+        }
@@ -0,0 +1,52 @@
+# scripts/bench_artifact_cache.py
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+
+from contract_artifacts import ARTIFACTS_DIR
+
+# Cold-start benchmark for contract_artifacts: every sample is a fresh Python process
+# that loads the GCBToken ABI the way the deploy, oracle and test scripts do at startup.
+# "cold" runs clear build/artifacts first so solc has to compile; "warm" runs hit the cache.
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+LOAD_ABI_SNIPPET = "from contract_artifacts import load_artifact; load_artifact('GCBToken')['abi']"
+
+
+def time_fresh_process():
+    started = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-c", LOAD_ABI_SNIPPET],
+        cwd=SCRIPTS_DIR, check=True, stdout=subprocess.DEVNULL,
+    )
+    return time.perf_counter() - started
+
+
+def run(runs):
+    results = {}
+    for mode in ("cold", "warm"):
+        samples = []
+        if mode == "warm":
+            time_fresh_process()  # Make sure the cache exists before timing hits.
+        for _ in range(runs):
+            if mode == "cold":
+                shutil.rmtree(ARTIFACTS_DIR, ignore_errors=True)
+            samples.append(time_fresh_process())
+        results[mode] = samples
+
+    print(f"\n--- Artifact cache cold-start benchmark ({runs} run(s) each) ---")
+    for mode, samples in results.items():
+        print(f"  {mode:>4}: median {statistics.median(samples) * 1000:8.1f} ms   "
+              f"min {min(samples) * 1000:8.1f} ms   max {max(samples) * 1000:8.1f} ms")
+    speedup = statistics.median(results["cold"]) / statistics.median(results["warm"])
+    print(f"  Cache hit is {speedup:.1f}x faster than compiling with solc.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare solc compilation with cached contract artifacts.")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh processes to time per mode")
+    run(parser.parse_args().runs)
@@ -0,0 +1,210 @@
+# scripts/bench_attestations.py
+import argparse
+import contextlib
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+
+from xrpl.wallet import Wallet
+
+import gcb_kyc_oracle
+from bench_oracle_load import RPCCounter, git_revision, synthetic_investors
+from kyc_attestations import AttestationSigner, attestation_args, recover_signer
+from kyc_credentials import CredentialVerifier
+from kyc_store import MemoryKYCStore
+from local_evm import connect, deploy_gcb_token, funded_account, send_transaction
+
+# Onboarding cost of the two ways to whitelist investors: the oracle sending one
+# updateKYCStatus transaction per investor (wall time, oracle gas, RPC calls), against the
+# oracle signing EIP-712 attestations that investors then submit themselves with
+# registerWithAttestation or transferWithAttestation (gas paid by the investor, sampled on
+# a few of them). Attestations are measured through the threaded oracle's real
+# /kyc-attestation and /kyc-attestation/batch handlers (KYC store lookup, credential
+# verification, signing, and the RPC calls they make), and the raw signer alone over
+# 0..N worker processes.
+
+
+class CallerRPCCounter(RPCCounter):
+    # Counts only the requests made on the thread that created it: the Flask test client
+    # runs handlers on the calling thread, while the oracle's pollers use their own.
+    def __init__(self):
+        super().__init__()
+        self.caller = threading.current_thread()
+
+    def __call__(self, make_request, w3):
+        count = super().__call__(make_request, w3)
+
+        def middleware(method, params):
+            if threading.current_thread() is self.caller:
+                return count(method, params)
+            return make_request(method, params)
+        return middleware
+
+
+def measure_transactions(w3, rpc_counter, token, oracle, investors):
+    rpc_counter.reset()
+    started = time.perf_counter()
+    gas_used = 0
+    for address in investors:
+        gas_used += send_transaction(w3, oracle, token.functions.updateKYCStatus(address, True)).gasUsed
+    elapsed = time.perf_counter() - started
+    return {
+        "seconds": elapsed,
+        "investors_per_second": len(investors) / elapsed,
+        "oracle_gas_per_investor": gas_used / len(investors),
+        "rpc_calls_per_investor": sum(rpc_counter.counts.values()) / len(investors),
+    }
+
+
+def measure_endpoint(w3, rpc_counter, token, oracle, count):
+    # One /kyc-attestation request per investor, then one /kyc-attestation/batch request
+    # for all of them, against an in-process oracle with a credential-verified KYC store.
+    issuer = Wallet.create()
+    investors = synthetic_investors(w3, count, 1.0, issuer)
+    store = MemoryKYCStore()
+    store.upsert_many([{k: v for k, v in investor.items() if k != "evm_address"} for investor in investors])
+    requests = [{"xrplDID": investor["xrpl_did"], "investorEVMAddress": investor["evm_address"]} for investor in investors]
+
+    with tempfile.TemporaryDirectory() as directory:
+        with contextlib.redirect_stdout(io.StringIO()):
+            gcb_kyc_oracle.init_oracle(
+                evm_w3=w3,
+                private_key=oracle.key.hex(),
+                contract_address=token.address,
+                store=store,
+                verifier=CredentialVerifier(trusted={f"did:xrpl:{issuer.address}"}),
+                journal_path='',
+                registry_path=os.path.join(directory, "tokens.json"),
+            )
+        try:
+            client = gcb_kyc_oracle.app.test_client()
+            with contextlib.redirect_stdout(io.StringIO()):
+                rpc_counter.reset()
+                started = time.perf_counter()
+                single = [client.post('/kyc-attestation', json=body) for body in requests]
+                single_seconds = time.perf_counter() - started
+                single_rpc = sum(rpc_counter.counts.values())
+
+                rpc_counter.reset()
+                started = time.perf_counter()
+                batch = client.post('/kyc-attestation/batch', json={"attestations": requests})
+                batch_seconds = time.perf_counter() - started
+                batch_rpc = sum(rpc_counter.counts.values())
+        finally:
+            with contextlib.redirect_stdout(io.StringIO()):
+                gcb_kyc_oracle.shutdown_oracle()
+
+    signed = [response.get_json()["attestation"] for response in single if response.status_code == 200]
+    signed += [result["attestation"] for result in (batch.get_json() or {}).get("results", []) if result.get("success")]
+    chain_id = w3.eth.chain_id
+    return {
+        "attestations": count,
+        "failures": 2 * count - len(signed),
+        "signatures_valid": all(recover_signer(chain_id, token.address, attestation) == oracle.address for attestation in signed),
+        "single_per_second": count / single_seconds,
+        "batch_per_second": count / batch_seconds,
+        "rpc_calls_per_attestation": single_rpc / count,
+        "rpc_calls_per_batch": batch_rpc,
+    }
+
+
+def measure_signing(private_key, chain_id, token_address, investors, workers):
+    signer = AttestationSigner(private_key, chain_id, workers=workers)
+    try:
+        if workers:
+            signer.sign_many(token_address, [(address, True) for address in investors[:workers * signer.chunk_size]])
+        started = time.perf_counter()
+        signer.sign_many(token_address, [(address, True) for address in investors])
+        elapsed = time.perf_counter() - started
+    finally:
+        signer.close()
+    return {
+        "workers": workers,
+        "signatures_per_second": len(investors) / elapsed,
+        "signatures_per_second_per_core": len(investors) / elapsed / max(1, workers),
+    }
+
+
+def measure_submission(w3, rpc_counter, token, owner, oracle_key, sample):
+    # Investors submit their own attestations: registerWithAttestation, and an allocation
+    # from the owner bundled with the recipient's attestation (compared with a plain transfer).
+    signer = AttestationSigner(oracle_key, w3.eth.chain_id, workers=0)
+    register_gas, bundled_gas, plain_gas = [], [], []
+    rpc_counter.reset()
+    try:
+        for _ in range(sample):
+            investor = funded_account(w3, amount_ether=1)
+            attestation = signer.sign(token.address, investor.address, True)
+            register_gas.append(send_transaction(w3, investor, token.functions.registerWithAttestation(
+                *attestation_args(attestation))).gasUsed)
+
+            recipient = w3.eth.account.create().address
+            attestation = signer.sign(token.address, recipient, True)
+            bundled_gas.append(send_transaction(w3, owner, token.functions.transferWithAttestation(
+                recipient, w3.to_wei(10, 'ether'), *attestation_args(attestation))).gasUsed)
+            plain_gas.append(send_transaction(w3, owner, token.functions.transfer(recipient, w3.to_wei(10, 'ether'))).gasUsed)
+    finally:
+        signer.close()
+    return {
+        "sample": sample,
+        "register_with_attestation_gas": sum(register_gas) / sample,
+        "transfer_with_attestation_gas": sum(bundled_gas) / sample,
+        "transfer_to_holder_gas": sum(plain_gas) / sample,
+        "oracle_gas_per_investor": 0,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare oracle transactions with signed KYC attestations.")
+    parser.add_argument("--evm", default="tester", help="'tester' for in-process eth-tester, or a local node URL")
+    parser.add_argument("--investors", type=int, default=500, help="Investors to whitelist")
+    parser.add_argument("--workers", type=int, nargs="+", help="Signing worker counts to try (default: 0 and the CPU count)")
+    parser.add_argument("--sample", type=int, default=10, help="Investors that submit their attestation on-chain")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    w3 = connect(args.evm)
+    rpc_counter = CallerRPCCounter()
+    w3.middleware_onion.add(rpc_counter, name="rpc_counter")
+    owner = funded_account(w3, amount_ether=1000)
+    token, _ = deploy_gcb_token(w3, owner, kyc_oracle_address=owner.address)
+    investors = [w3.eth.account.create().address for _ in range(args.investors)]
+
+    transactions = measure_transactions(w3, rpc_counter, token, owner, investors)
+    print(f"Oracle transactions: {args.investors} investor(s) in {transactions['seconds']:.2f}s "
+          f"({transactions['investors_per_second']:.1f}/s), {transactions['oracle_gas_per_investor']:.0f} oracle gas "
+          f"and {transactions['rpc_calls_per_investor']:.1f} RPC calls per investor")
+
+    endpoint = measure_endpoint(w3, rpc_counter, token, owner, args.investors)
+    print(f"/kyc-attestation: {endpoint['single_per_second']:.0f}/s one request per investor, "
+          f"{endpoint['batch_per_second']:.0f}/s in one batch request; {endpoint['rpc_calls_per_attestation']:.2f} RPC "
+          f"calls per attestation ({endpoint['rpc_calls_per_batch']} per batch), {endpoint['failures']} failure(s)"
+          f"{'' if endpoint['signatures_valid'] else ' -- INVALID SIGNATURES'}")
+
+    signing = []
+    for workers in args.workers or sorted({0, os.cpu_count() or 1}):
+        result = measure_signing(owner.key, w3.eth.chain_id, token.address, investors, workers)
+        signing.append(result)
+        print(f"Signer alone, {workers} worker(s): {result['signatures_per_second']:.0f}/s "
+              f"({result['signatures_per_second_per_core']:.0f}/s per core)")
+
+    submission = measure_submission(w3, rpc_counter, token, owner, owner.key, args.sample)
+    print(f"Investor-submitted: registerWithAttestation {submission['register_with_attestation_gas']:.0f} gas, "
+          f"transferWithAttestation {submission['transfer_with_attestation_gas']:.0f} gas "
+          f"(plain transfer {submission['transfer_to_holder_gas']:.0f} gas)")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "git_revision": git_revision(),
+                "evm": args.evm,
+                "investors": args.investors,
+                "transactions": transactions,
+                "endpoint": endpoint,
+                "signing": signing,
+                "submission": submission,
+            }, f, indent=4)
+        print(f"Results saved to {args.output}")
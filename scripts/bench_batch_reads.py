@@ -0,0 +1,71 @@
+# scripts/bench_batch_reads.py
+import argparse
+import json
+import time
+
+from batch_reads import BatchReader
+from local_evm import connect, deploy_gcb_token, funded_account, send_transaction
+
+# Compares reading the whitelist flag of many addresses one eth_call at a time with
+# BatchReader's batched modes. Against a node URL (e.g. anvil or hardhat) the
+# rpc-batch mode, and multicall where Multicall3 is deployed, are measured as well.
+
+WHITELIST_CHUNK = 200
+
+
+def setup(w3, address_count):
+    owner = funded_account(w3, amount_ether=10_000)
+    gcb_token_contract, _ = deploy_gcb_token(w3, owner)
+    addresses = [w3.eth.account.create().address for _ in range(address_count)]
+    # Whitelist every other address so the results are not all the same.
+    whitelisted = addresses[::2]
+    for start in range(0, len(whitelisted), WHITELIST_CHUNK):
+        chunk = whitelisted[start:start + WHITELIST_CHUNK]
+        send_transaction(w3, owner, gcb_token_contract.functions.batchUpdateKYCStatus(chunk, [True] * len(chunk)))
+    return gcb_token_contract, addresses
+
+
+def per_call(gcb_token_contract, addresses):
+    return {address: gcb_token_contract.functions.isWhitelisted(address).call() for address in addresses}
+
+
+def run(w3, address_count, modes):
+    gcb_token_contract, addresses = setup(w3, address_count)
+    started = time.perf_counter()
+    expected = per_call(gcb_token_contract, addresses)
+    results = [{"mode": "per-call", "addresses": address_count, "seconds": time.perf_counter() - started, "rpc_calls": address_count}]
+
+    for mode in modes:
+        try:
+            reader = BatchReader(w3, gcb_token_contract, mode=mode)
+            started = time.perf_counter()
+            statuses = reader.is_whitelisted_many(addresses)
+        except Exception as e:
+            print(f"  Skipping {mode}: {e}")
+            continue
+        if statuses != expected:
+            raise AssertionError(f"{mode} results differ from per-call reads")
+        results.append({"mode": mode, "addresses": address_count, "seconds": time.perf_counter() - started, "rpc_calls": reader.rpc_calls})
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark batched GCBToken whitelist reads.")
+    parser.add_argument("--evm", default="tester", help="'tester' for in-process eth-tester, or a local node URL")
+    parser.add_argument("--addresses", type=int, default=1000)
+    parser.add_argument("--modes", default=None, help="Comma-separated BatchReader modes (default depends on --evm)")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    w3 = connect(args.evm)
+    modes = args.modes.split(',') if args.modes else (["sequential"] if args.evm == "tester" else ["rpc-batch", "multicall"])
+    results = run(w3, args.addresses, modes)
+    baseline = results[0]["seconds"]
+    print(f"{'mode':>10} {'seconds':>9} {'rpc calls':>10} {'speedup':>8}")
+    for result in results:
+        print(f"{result['mode']:>10} {result['seconds']:>9.3f} {result['rpc_calls']:>10} {baseline / result['seconds']:>7.1f}x")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=4)
+        print(f"Results saved to {args.output}")
@@ -0,0 +1,84 @@
+# scripts/bench_credential_verify.py
+import argparse
+import json
+import os
+import time
+
+from xrpl import CryptoAlgorithm
+from xrpl.wallet import Wallet
+
+from kyc_credentials import CredentialVerifier, issue_credential
+
+# Throughput of KYC credential verification, in signatures per second and per core, for
+# an onboarding wave of fresh credentials verified inline and over 1..N worker
+# processes, plus a second pass over the same credentials that is answered from the cache.
+
+
+def make_credentials(count, algorithm):
+    issuers = []
+    if algorithm in ("ed25519", "both"):
+        issuers.append(Wallet.create(algorithm=CryptoAlgorithm.ED25519))
+    if algorithm in ("secp256k1", "both"):
+        issuers.append(Wallet.create(algorithm=CryptoAlgorithm.SECP256K1))
+    items = []
+    for i in range(count):
+        xrpl_did = f"did:xrpl:bench{i:08d}"
+        items.append((issue_credential(issuers[i % len(issuers)], xrpl_did, i % 5 != 0), xrpl_did))
+    return items, {f"did:xrpl:{issuer.address}" for issuer in issuers}
+
+
+def measure(items, trusted, workers):
+    verifier = CredentialVerifier(trusted=trusted, workers=workers, cache_size=len(items))
+    try:
+        if workers:
+            # Start the worker processes outside the timed run.
+            verifier.verify_many(items[:workers * verifier.chunk_size])
+            verifier.clear_cache()
+        started = time.perf_counter()
+        results = verifier.verify_many(items)
+        cold = time.perf_counter() - started
+        started = time.perf_counter()
+        verifier.verify_many(items)
+        warm = time.perf_counter() - started
+    finally:
+        verifier.close()
+    if not all(result.valid for result in results):
+        raise RuntimeError("benchmark credentials failed to verify")
+    cores = max(1, workers)
+    return {
+        "workers": workers,
+        "signatures_per_second": len(items) / cold,
+        "signatures_per_second_per_core": len(items) / cold / cores,
+        "cached_checks_per_second": len(items) / warm,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark KYC credential signature verification.")
+    parser.add_argument("--credentials", type=int, default=2000)
+    parser.add_argument("--algorithm", choices=["ed25519", "secp256k1", "both"], default="both")
+    parser.add_argument("--workers", type=int, nargs="+", help="Worker counts to try (default: 0, 1, 2, 4, ... up to the CPU count)")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    workers = args.workers
+    if workers is None:
+        workers, count = [0], 1
+        while count <= (os.cpu_count() or 1):
+            workers.append(count)
+            count *= 2
+
+    print(f"Issuing {args.credentials} {args.algorithm} credential(s)...")
+    items, trusted = make_credentials(args.credentials, args.algorithm)
+    print(f"{'workers':>8} {'sig/s':>10} {'sig/s/core':>11} {'cached/s':>12}")
+    results = []
+    for count in workers:
+        result = measure(items, trusted, count)
+        results.append(result)
+        print(f"{count:>8} {result['signatures_per_second']:>10.0f} {result['signatures_per_second_per_core']:>11.0f} "
+              f"{result['cached_checks_per_second']:>12.0f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"credentials": args.credentials, "algorithm": args.algorithm, "results": results}, f, indent=4)
+        print(f"Results saved to {args.output}")
@@ -0,0 +1,89 @@
+# scripts/bench_gas.py
+import argparse
+import json
+import subprocess
+
+from contract_artifacts import ROOT_DIR, load_artifacts, read_contract_sources
+from local_evm import connect, deploy_artifact, funded_account, send_transaction
+
+# Reproducible gas report for GCBToken. Every scenario runs on a fresh deployment in a
+# local EVM, for the contracts in the working tree and, with --baseline, for the
+# contracts as of a git revision, so the effect of a contract change shows up as a
+# before/after table.
+
+BATCH_SIZE = 50
+SUPPLY = 1_000_000
+
+
+def sources_at(ref):
+    # contracts/*.sol as of a git revision, keyed like read_contract_sources().
+    listing = subprocess.check_output(
+        ["git", "ls-tree", "-r", "--name-only", ref, "contracts"], cwd=ROOT_DIR, text=True
+    )
+    return {
+        path: subprocess.check_output(["git", "show", f"{ref}:{path}"], cwd=ROOT_DIR, text=True)
+        for path in listing.split()
+        if path.endswith(".sol")
+    }
+
+
+def measure(w3, artifact):
+    results = {}
+    owner = funded_account(w3, amount_ether=10_000)
+    gcb_token_contract, receipt = deploy_artifact(w3, owner, artifact, w3.to_wei(SUPPLY, 'ether'), owner.address)
+    results["deploy"] = receipt.gasUsed
+
+    alice = funded_account(w3, amount_ether=10)
+    bob = funded_account(w3, amount_ether=10)
+    token = gcb_token_contract.functions
+
+    results["updateKYCStatus"] = send_transaction(w3, owner, token.updateKYCStatus(alice.address, True)).gasUsed
+    batch = [w3.eth.account.create().address for _ in range(BATCH_SIZE)] + [bob.address]
+    receipt = send_transaction(w3, owner, token.batchUpdateKYCStatus(batch, [True] * len(batch)))
+    results[f"batchUpdateKYCStatus ({len(batch)}), per address"] = receipt.gasUsed // len(batch)
+
+    amount = w3.to_wei(1000, 'ether')
+    results["transfer owner -> new holder"] = send_transaction(w3, owner, token.transfer(alice.address, amount)).gasUsed
+    results["transfer holder -> new holder"] = send_transaction(w3, alice, token.transfer(bob.address, amount // 4)).gasUsed
+    results["transfer holder -> holder"] = send_transaction(w3, alice, token.transfer(bob.address, amount // 4)).gasUsed
+
+    income = w3.to_wei(5, 'ether')
+    results["distributeIncome"] = send_transaction(w3, owner, token.distributeIncome(income), value=income).gasUsed
+    results["transfer holder -> holder (after income)"] = send_transaction(w3, alice, token.transfer(bob.address, amount // 4)).gasUsed
+    results["claimIncome"] = send_transaction(w3, bob, token.claimIncome()).gasUsed
+    return results
+
+
+def print_report(current, baseline=None):
+    if baseline is None:
+        print(f"{'scenario':<45} {'gas':>10}")
+        for scenario, gas in current.items():
+            print(f"{scenario:<45} {gas:>10}")
+        return
+    print(f"{'scenario':<45} {'baseline':>10} {'current':>10} {'change':>9}")
+    for scenario, gas in current.items():
+        before = baseline.get(scenario)
+        if before is None:
+            print(f"{scenario:<45} {'-':>10} {gas:>10} {'':>9}")
+        else:
+            print(f"{scenario:<45} {before:>10} {gas:>10} {(gas - before) / before * 100:>+8.1f}%")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gas benchmark suite for GCBToken.")
+    parser.add_argument("--evm", default="tester", help="'tester' for in-process eth-tester, or a local node URL")
+    parser.add_argument("--baseline", help="Git revision whose contracts to compare against (e.g. HEAD~1)")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    w3 = connect(args.evm)
+    current = measure(w3, load_artifacts(read_contract_sources())['GCBToken'])
+    baseline = None
+    if args.baseline:
+        baseline = measure(w3, load_artifacts(sources_at(args.baseline))['GCBToken'])
+    print_report(current, baseline)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"current": current, "baseline": baseline, "baseline_ref": args.baseline}, f, indent=4)
+        print(f"Results saved to {args.output}")
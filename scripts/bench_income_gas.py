@@ -0,0 +1,66 @@
+# scripts/bench_income_gas.py
+import argparse
+import json
+
+from local_evm import connect, deploy_gcb_token, funded_account, send_transaction
+
+# Gas report for GCBToken's pull-based income distribution: for growing numbers of
+# holders, measure distributeIncome, claimIncome and a holder-to-holder transfer.
+# With the income-per-share accumulator, none of them should grow with holder count.
+
+WHITELIST_CHUNK = 200
+
+
+def measure(w3, holder_count):
+    owner = funded_account(w3, amount_ether=10_000)
+    gcb_token_contract, _ = deploy_gcb_token(w3, owner)
+
+    # The first two holders sign transactions (claim, transfer) and need gas money.
+    holders = [funded_account(w3, amount_ether=10) for _ in range(min(2, holder_count))]
+    holders += [w3.eth.account.create() for _ in range(holder_count - len(holders))]
+    addresses = [holder.address for holder in holders]
+
+    for start in range(0, holder_count, WHITELIST_CHUNK):
+        chunk = addresses[start:start + WHITELIST_CHUNK]
+        send_transaction(w3, owner, gcb_token_contract.functions.batchUpdateKYCStatus(chunk, [True] * len(chunk)))
+    for address in addresses:
+        send_transaction(w3, owner, gcb_token_contract.functions.transfer(address, w3.to_wei(1000, 'ether')))
+
+    income = w3.to_wei(5, 'ether')
+    distribute = send_transaction(w3, owner, gcb_token_contract.functions.distributeIncome(income), value=income)
+    claim = send_transaction(w3, holders[0], gcb_token_contract.functions.claimIncome())
+    result = {
+        "holders": holder_count,
+        "distribute_gas": distribute.gasUsed,
+        "claim_gas": claim.gasUsed,
+    }
+    if holder_count > 1:
+        transfer = send_transaction(w3, holders[0], gcb_token_contract.functions.transfer(addresses[1], w3.to_wei(10, 'ether')))
+        result["transfer_gas"] = transfer.gasUsed
+
+    # Sanity check: holders' entitlements add up to what they hold of the supply.
+    owed = sum(gcb_token_contract.functions.accumulativeIncomeOf(address).call() for address in addresses)
+    expected = income * holder_count * 1000 // 1_000_000
+    result["entitlement_error_wei"] = abs(owed - expected)
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gas report for GCBToken income distribution.")
+    parser.add_argument("--evm", default="tester", help="'tester' for in-process eth-tester, or a local node URL")
+    parser.add_argument("--holders", default="1,10,100,500", help="Comma-separated holder counts")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    w3 = connect(args.evm)
+    results = []
+    print(f"{'holders':>8} {'distribute':>11} {'claim':>8} {'transfer':>9}")
+    for holder_count in (int(n) for n in args.holders.split(',')):
+        result = measure(w3, holder_count)
+        results.append(result)
+        print(f"{result['holders']:>8} {result['distribute_gas']:>11} {result['claim_gas']:>8} {result.get('transfer_gas', '-'):>9}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=4)
+        print(f"Results saved to {args.output}")
@@ -0,0 +1,228 @@
+# scripts/bench_oracle_load.py
+import argparse
+import contextlib
+import io
+import json
+import os
+import subprocess
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from werkzeug.serving import make_server
+from xrpl.wallet import Wallet
+
+import gcb_kyc_oracle
+from batch_reads import BatchReader
+from kyc_credentials import CredentialVerifier, issue_credential
+from kyc_store import MemoryKYCStore
+from local_evm import connect, deploy_gcb_token, funded_account, send_transaction
+
+# Load test for the KYC oracle: deploys GCBToken on a local EVM, seeds a KYC store with
+# synthetic DIDs, starts the oracle in-process on a free port and drives /attest-kyc
+# from a pool of concurrent clients. Reports throughput, latency percentiles, RPC calls
+# per attestation and gas per whitelisted investor, and saves them as JSON.
+
+
+class RPCCounter:
+    # web3 middleware that counts requests by method. The in-process eth-tester backend
+    # is not thread-safe, so it can also serialize requests.
+    def __init__(self, serialize=False):
+        self.counts = Counter()
+        self._lock = threading.Lock()
+        # Re-entrant: some middlewares issue their own requests from inside a request.
+        self._serialize = threading.RLock() if serialize else None
+
+    def __call__(self, make_request, w3):
+        def middleware(method, params):
+            with self._lock:
+                self.counts[method] += 1
+            if self._serialize is not None:
+                with self._serialize:
+                    return make_request(method, params)
+            return make_request(method, params)
+        return middleware
+
+    def reset(self):
+        with self._lock:
+            self.counts.clear()
+
+
+def percentile(sorted_values, pct):
+    # Nearest-rank percentile.
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def synthetic_investors(w3, count, approved_ratio, issuer):
+    investors = []
+    for i in range(count):
+        evm_address = w3.eth.account.create().address
+        xrpl_did = f"did:xrpl:load{i + 1:08d}"
+        kyc_approved = i % 100 < approved_ratio * 100
+        investors.append({
+            "investor_id": f"LoadInvestor{i + 1}",
+            "xrpl_did": xrpl_did,
+            "kyc_approved": kyc_approved,
+            "kyc_credential": issue_credential(issuer, xrpl_did, kyc_approved),
+            "evm_address": evm_address,
+        })
+    return investors
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+def run(evm, attestations, concurrency, approved_ratio=0.6, drain_timeout=120, verbose=False, signers=1):
+    w3 = connect(evm)
+    rpc_counter = RPCCounter(serialize=(evm == "tester"))
+    w3.middleware_onion.add(rpc_counter, name="rpc_counter")
+
+    oracle_account = funded_account(w3, amount_ether=1000)
+    gcb_token_contract, _ = deploy_gcb_token(w3, oracle_account, kyc_oracle_address=oracle_account.address)
+    signer_accounts = [oracle_account] + [funded_account(w3, amount_ether=100) for _ in range(signers - 1)]
+    if signers > 1:
+        send_transaction(w3, oracle_account, gcb_token_contract.functions.setOracleSigners(
+            [account.address for account in signer_accounts[1:]], True))
+    issuer = Wallet.create()
+    investors = synthetic_investors(w3, attestations, approved_ratio, issuer)
+    store = MemoryKYCStore()
+    journal_dir = tempfile.TemporaryDirectory()  # A fresh journal: this chain exists only for this run
+    store.upsert_many([{k: v for k, v in investor.items() if k != "evm_address"} for investor in investors])
+
+    # The oracle logs every request; keep the benchmark output readable unless asked.
+    output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    with output:
+        gcb_kyc_oracle.init_oracle(
+            evm_w3=w3,
+            private_key=oracle_account.key.hex(),
+            signer_keys=[account.key.hex() for account in signer_accounts],
+            contract_address=gcb_token_contract.address,
+            store=store,
+            verifier=CredentialVerifier(trusted={f"did:xrpl:{issuer.address}"}),
+            journal_path=os.path.join(journal_dir.name, "journal.jsonl"),
+            registry_path=os.path.join(journal_dir.name, "tokens.json"),
+        )
+    server = make_server("127.0.0.1", 0, gcb_kyc_oracle.app, threaded=True)
+    server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+    server_thread.start()
+    url = f"http://127.0.0.1:{server.server_port}/attest-kyc"
+
+    sessions = threading.local()
+
+    def attest(investor):
+        if not hasattr(sessions, "session"):
+            sessions.session = requests.Session()
+        started = time.perf_counter()
+        try:
+            response = sessions.session.post(url, json={
+                "xrplDID": investor["xrpl_did"],
+                "investorEVMAddress": investor["evm_address"],
+            }, timeout=120)
+            ok = response.status_code == 200 and response.json().get("success")
+        except requests.RequestException:
+            ok = False
+        return time.perf_counter() - started, ok
+
+    try:
+        with output:
+            rpc_counter.reset()
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                outcomes = list(pool.map(attest, investors))
+            elapsed = time.perf_counter() - started
+            request_rpc = dict(rpc_counter.counts)
+
+            # Let the oracle confirm everything it sent before counting gas.
+            gcb_kyc_oracle.shutdown_oracle(drain_timeout=drain_timeout)
+            total_rpc = sum(rpc_counter.counts.values())
+    finally:
+        server.shutdown()
+
+    records = list(gcb_kyc_oracle.signer_pool.records.values())
+    whitelist_cache = gcb_kyc_oracle.default_token.whitelist_cache
+    gas_used = sum(record['gas_used'] or 0 for record in records)
+    approved = [investor["evm_address"] for investor in investors if investor["kyc_approved"]]
+    on_chain = BatchReader(w3, gcb_token_contract).is_whitelisted_many(approved)
+    whitelisted = sum(1 for status in on_chain.values() if status)
+    latencies = sorted(latency for latency, _ in outcomes)
+    failures = sum(1 for _, ok in outcomes if not ok)
+
+    return {
+        "git_revision": git_revision(),
+        "evm": evm,
+        "attestations": attestations,
+        "concurrency": concurrency,
+        "signers": signers,
+        "batch_window_ms": gcb_kyc_oracle.config.ORACLE_BATCH_WINDOW_MS,
+        "batch_max_size": gcb_kyc_oracle.config.ORACLE_BATCH_MAX_SIZE,
+        "seconds": elapsed,
+        "throughput_rps": attestations / elapsed,
+        "failures": failures,
+        "latency_ms": {
+            "p50": percentile(latencies, 50) * 1000,
+            "p95": percentile(latencies, 95) * 1000,
+            "p99": percentile(latencies, 99) * 1000,
+            "max": latencies[-1] * 1000,
+        },
+        "transactions": len(records),
+        "transactions_by_signer": dict(Counter(record['meta'].get('signer') for record in records)),
+        "unconfirmed_transactions": sum(1 for record in records if record['status'] not in ('confirmed', 'reverted')),
+        "rpc_calls_per_attestation": total_rpc / attestations,
+        "rpc_calls_by_method": request_rpc,
+        "whitelisted_investors": whitelisted,
+        "expected_whitelisted": len(approved),
+        "gas_per_whitelisted_investor": gas_used / whitelisted if whitelisted else None,
+        "whitelist_cache": {"hits": whitelist_cache.hits, "misses": whitelist_cache.misses},
+    }
+
+
+def print_comparison(result, baseline):
+    for key in ("throughput_rps", "rpc_calls_per_attestation", "gas_per_whitelisted_investor"):
+        if result.get(key) is not None and baseline.get(key):
+            print(f"  {key}: {baseline[key]:.2f} -> {result[key]:.2f} ({(result[key] / baseline[key] - 1) * 100:+.1f}%)")
+    for key in ("p50", "p95", "p99"):
+        before, after = baseline["latency_ms"][key], result["latency_ms"][key]
+        print(f"  latency {key}: {before:.1f}ms -> {after:.1f}ms ({(after / before - 1) * 100:+.1f}%)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test the GCB KYC oracle against a local EVM.")
+    parser.add_argument("--evm", default="tester", help="'tester' for in-process eth-tester, or a local node URL")
+    parser.add_argument("--attestations", type=int, default=500, help="Number of synthetic DIDs to attest")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent HTTP clients")
+    parser.add_argument("--approved-ratio", type=float, default=0.6, help="Share of synthetic DIDs with approved KYC")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--compare", help="Previous results JSON to compare against")
+    parser.add_argument("--signers", type=int, default=1, help="Oracle signer accounts (nonce lanes) to spread transactions over")
+    parser.add_argument("--verbose", action="store_true", help="Show the oracle's own logging")
+    args = parser.parse_args()
+
+    result = run(args.evm, args.attestations, args.concurrency, args.approved_ratio, verbose=args.verbose,
+                 signers=args.signers)
+    print(f"{result['attestations']} attestations at concurrency {result['concurrency']} "
+          f"({result['signers']} signer(s)) in {result['seconds']:.2f}s "
+          f"({result['throughput_rps']:.1f} req/s, {result['failures']} failed)")
+    print(f"  latency p50 {result['latency_ms']['p50']:.1f}ms, p95 {result['latency_ms']['p95']:.1f}ms, "
+          f"p99 {result['latency_ms']['p99']:.1f}ms")
+    print(f"  {result['transactions']} transaction(s), {result['rpc_calls_per_attestation']:.2f} RPC calls per attestation")
+    print(f"  {result['whitelisted_investors']}/{result['expected_whitelisted']} investors whitelisted, "
+          f"{result['gas_per_whitelisted_investor'] or 0:.0f} gas per whitelisted investor")
+
+    if args.compare:
+        with open(args.compare) as f:
+            print(f"Compared with {args.compare}:")
+            print_comparison(result, json.load(f))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=4)
+        print(f"Results saved to {args.output}")
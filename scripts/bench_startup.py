@@ -0,0 +1,85 @@
+# scripts/bench_startup.py
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from bench_oracle_load import git_revision
+
+# Cold-start time of the gcb command-line entry point: each command runs in a fresh
+# interpreter, several times, and the median wall time is reported next to the legacy
+# per-script entry points and a bare `import web3`. `gcb status` runs against a stub
+# JSON-RPC node served here, so its time is the CLI's own startup plus three local calls.
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+INVESTOR = "0x" + "ab" * 20
+TOKEN = "0x" + "cd" * 20
+
+
+class StubNode(BaseHTTPRequestHandler):
+    # Answers eth_chainId and every eth_call with a fixed value.
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        result = hex(31337) if request["method"] == "eth_chainId" else "0x" + "00" * 31 + "01"
+        body = json.dumps({"jsonrpc": "2.0", "id": request["id"], "result": result}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def commands():
+    gcb = [sys.executable, os.path.join(SCRIPTS_DIR, "gcb.py")]
+    return {
+        "python (no imports)": [sys.executable, "-c", "pass"],
+        "import web3": [sys.executable, "-c", "import web3"],
+        "gcb --help": gcb + ["--help"],
+        "gcb status": gcb + ["status", INVESTOR, "--token", TOKEN],
+        "gcb attest --help": gcb + ["attest", "--help"],
+        "gcb allocate --help": gcb + ["allocate", "--help"],
+        "gcb serve-oracle --help": gcb + ["serve-oracle", "--help"],
+        "allocate_tokens.py --help": [sys.executable, os.path.join(SCRIPTS_DIR, "allocate_tokens.py"), "--help"],
+    }
+
+
+def measure(command, runs, env):
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run(command, env=env, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        times.append(time.perf_counter() - started)
+    return {"median_ms": statistics.median(times) * 1000, "min_ms": min(times) * 1000}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark cold-start time of the gcb CLI.")
+    parser.add_argument("--runs", type=int, default=5, help="Runs per command")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    node = ThreadingHTTPServer(("127.0.0.1", 0), StubNode)
+    threading.Thread(target=node.serve_forever, daemon=True).start()
+    env = dict(os.environ, EVM_NETWORK_URL=f"http://127.0.0.1:{node.server_port}")
+
+    results = {}
+    print(f"{'command':<28} {'median':>10} {'min':>10}")
+    try:
+        for name, command in commands().items():
+            results[name] = measure(command, args.runs, env)
+            print(f"{name:<28} {results[name]['median_ms']:>8.0f}ms {results[name]['min_ms']:>8.0f}ms")
+    finally:
+        node.shutdown()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"git_revision": git_revision(), "runs": args.runs, "results": results}, f, indent=4)
+        print(f"Results saved to {args.output}")
@@ -0,0 +1,126 @@
+# scripts/contract_artifacts.py
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+
+# Compiled ABI, bytecode and metadata for every contract in contracts/, cached on disk
+# under a key derived from the sources, the solc version and the compiler settings.
+# solc only runs when that key changes.
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+CONTRACTS_DIR = os.path.join(ROOT_DIR, 'contracts')
+OPENZEPPELIN_DIR = os.path.join(ROOT_DIR, 'node_modules', '@openzeppelin')
+ARTIFACTS_DIR = os.path.join(ROOT_DIR, 'build', 'artifacts')
+
+SOLC_VERSION = "0.8.20"
+COMPILER_SETTINGS = {
+    "remappings": ["@openzeppelin/=node_modules/@openzeppelin/"],
+    "outputSelection": {
+        "*": {
+            "*": ["abi", "metadata", "evm.bytecode", "evm.bytecode.sourceMap"]
+        }
+    },
+    "optimizer": {
+        "enabled": True,
+        "runs": 200
+    }
+}
+
+_loaded = {}  # cache key -> artifacts, so repeated lookups in one process skip the disk too
+
+
+def read_contract_sources(contracts_dir=CONTRACTS_DIR):
+    sources = {}
+    for file_name in sorted(os.listdir(contracts_dir)):
+        if file_name.endswith('.sol'):
+            with open(os.path.join(contracts_dir, file_name), 'r') as f:
+                sources[f"contracts/{file_name}"] = f.read()
+    return sources
+
+
+def artifact_key(sources, solc_version=SOLC_VERSION, settings=COMPILER_SETTINGS):
+    digest = hashlib.sha256()
+    digest.update(solc_version.encode())
+    digest.update(json.dumps(settings, sort_keys=True).encode())
+    for path in sorted(sources):
+        digest.update(path.encode())
+        digest.update(b'\0')
+        digest.update(sources[path].encode())
+        digest.update(b'\0')
+    # Imported OpenZeppelin sources are not hashed file by file; their package version stands in for them.
+    oz_package = os.path.join(OPENZEPPELIN_DIR, 'contracts', 'package.json')
+    if os.path.exists(oz_package):
+        with open(oz_package, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def compile_sources(sources, solc_version=SOLC_VERSION, settings=COMPILER_SETTINGS):
+    from solcx import compile_standard
+
+    print(f"Compiling {len(sources)} Solidity source(s) with solc {solc_version}...")
+    compiled_sol = compile_standard(
+        {
+            "language": "Solidity",
+            "sources": {path: {"content": content} for path, content in sources.items()},
+            "settings": settings,
+        },
+        solc_version=solc_version,
+        base_path=ROOT_DIR,
+        allow_paths=[CONTRACTS_DIR, OPENZEPPELIN_DIR],
+    )
+    print("Compilation successful.")
+
+    artifacts = {}
+    for path, contracts in compiled_sol['contracts'].items():
+        if path not in sources:
+            continue  # Skip imported library contracts.
+        for contract_name, output in contracts.items():
+            artifacts[contract_name] = {
+                "source": path,
+                "abi": output['abi'],
+                "bytecode": output['evm']['bytecode']['object'],
+                "source_map": output['evm']['bytecode'].get('sourceMap'),
+                "metadata": output['metadata'],
+            }
+    return artifacts
+
+
+def load_artifacts(sources=None, solc_version=SOLC_VERSION, settings=COMPILER_SETTINGS, force=False):
+    sources = sources if sources is not None else read_contract_sources()
+    key = artifact_key(sources, solc_version, settings)
+    if not force and key in _loaded:
+        return _loaded[key]
+
+    cache_path = os.path.join(ARTIFACTS_DIR, f"{key}.json")
+    if not force and os.path.exists(cache_path):
+        with open(cache_path, 'r') as f:
+            artifacts = json.load(f)['contracts']
+    else:
+        artifacts = compile_sources(sources, solc_version, settings)
+        os.makedirs(ARTIFACTS_DIR, exist_ok=True)
+        # Write to a temp file and rename, so a concurrent reader never sees half an artifact.
+        fd, tmp_path = tempfile.mkstemp(dir=ARTIFACTS_DIR, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump({"key": key, "solc_version": solc_version, "contracts": artifacts}, f)
+        os.replace(tmp_path, cache_path)
+
+    _loaded[key] = artifacts
+    return artifacts
+
+
+def load_artifact(contract_name='GCBToken', **kwargs):
+    artifacts = load_artifacts(**kwargs)
+    if contract_name not in artifacts:
+        raise KeyError(f"No compiled artifact for contract {contract_name}")
+    return artifacts[contract_name]
+
+
+if __name__ == "__main__":
+    # `python scripts/contract_artifacts.py [--force]` pre-builds the cache, e.g. in CI.
+    started = time.perf_counter()
+    built = load_artifacts(force='--force' in sys.argv)
+    print(f"Artifacts ready for {', '.join(sorted(built))} in {time.perf_counter() - started:.3f}s ({ARTIFACTS_DIR})")
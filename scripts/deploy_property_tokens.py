@@ -0,0 +1,201 @@
+# scripts/deploy_property_tokens.py
+import argparse
+import json
+import os
+import sys
+import time
+from web3 import Web3
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import config
+from allocate_tokens import DEFAULT_MAX_BATCH_GAS, GAS_HEADROOM, PROBE_SIZE, plan_batches, wait_for_oldest
+from contract_artifacts import load_artifact
+from local_evm import deploy_contract
+from nonce_manager import NonceManager
+from token_registry import TokenRegistry, property_key
+
+# Deploys one GCBToken per property from a manifest, as ERC-1167 clones created by
+# GCBTokenFactory. The implementation and factory are deployed once per chain and kept
+# in the token registry. Properties are packed into createTokens calls sized to stay
+# under a gas budget and sent back to back with locally managed nonces. Each clone's
+# address is derived from the deployer and the property id, so it is known before the
+# batch is sent, and a re-run skips properties whose clone already exists.
+#
+# Manifest (JSON): {"properties": [{"property_id": "GCB-NASSIM-12", "name": "12 Nassim Road Share",
+#                                   "symbol": "GCB12", "initial_supply": 1000000, "owner": "0x.."}]}
+# initial_supply is in whole tokens; owner defaults to the deployer.
+
+# ERC-1167 minimal proxy creation code around the implementation address, as created by
+# OpenZeppelin's Clones library.
+CLONE_PREFIX = bytes.fromhex("3d602d80600a3d3981f3363d3d373d3d3d363d73")
+CLONE_SUFFIX = bytes.fromhex("5af43d82803e903d91602b57fd5bf3")
+
+
+def read_manifest(path):
+    with open(path) as f:
+        data = json.load(f)
+    properties = data["properties"] if isinstance(data, dict) else data
+    seen = set()
+    for index, prop in enumerate(properties):
+        for field in ("property_id", "name", "symbol"):
+            if not prop.get(field):
+                raise ValueError(f"{path}: property {index} is missing {field!r}")
+        if prop["property_id"] in seen:
+            raise ValueError(f"{path}: duplicate property_id {prop['property_id']!r}")
+        seen.add(prop["property_id"])
+        if prop.get("owner") and not Web3.is_address(prop["owner"]):
+            raise ValueError(f"{path}: property {prop['property_id']} has an invalid owner {prop['owner']!r}")
+    return properties
+
+
+def clone_address(factory_address, implementation_address, creator, property_id):
+    # GCBTokenFactory.predictAddress, computed locally: CREATE2 from the factory with
+    # salt keccak256(abi.encode(creator, propertyId)) over the clone's creation code.
+    salt = Web3.keccak(bytes(12) + bytes.fromhex(creator[2:]) + property_key(property_id))
+    init_code = CLONE_PREFIX + bytes.fromhex(implementation_address[2:]) + CLONE_SUFFIX
+    digest = Web3.keccak(b'\xff' + bytes.fromhex(factory_address[2:]) + salt + Web3.keccak(init_code))
+    return Web3.to_checksum_address(digest[12:])
+
+
+def ensure_factory(w3, account, registry, oracle_signers):
+    # The registry's implementation and factory for this chain, deployed first if missing.
+    implementation, factory = registry.implementation, registry.factory
+    if implementation and factory and w3.eth.get_code(factory):
+        return implementation, factory
+    if not implementation or not w3.eth.get_code(implementation):
+        # A plain GCBToken with no supply; its constructor initializes it, so nobody can take it over.
+        implementation = deploy_contract(w3, account, 'GCBToken', 0, oracle_signers[0])[0].address
+        print(f"GCBToken implementation deployed to: {implementation}")
+    factory = deploy_contract(w3, account, 'GCBTokenFactory', implementation)[0].address
+    print(f"GCBTokenFactory deployed to: {factory}")
+    registry.set_contracts(implementation, factory)
+    registry.save()
+    return implementation, factory
+
+
+def _token_args(prop, owner, oracle_signers):
+    return (
+        property_key(prop["property_id"]),
+        prop["name"],
+        prop["symbol"],
+        Web3.to_wei(prop.get("initial_supply", 0), 'ether'),
+        Web3.to_checksum_address(prop.get("owner") or owner),
+        oracle_signers,
+    )
+
+
+def estimate_gas_model(factory_contract, sender, token_args):
+    # gas(batch) ~= base + per_token * n, from estimates of one and PROBE_SIZE tokens.
+    def estimate(sample):
+        return factory_contract.functions.createTokens(sample).estimate_gas({'from': sender})
+
+    single = estimate(token_args[:1])
+    probe = token_args[:min(PROBE_SIZE, len(token_args))]
+    if len(probe) == 1:
+        return single, single
+    per_token = max(1, (estimate(probe) - single) // (len(probe) - 1))
+    return single - per_token, per_token
+
+
+def deploy_properties(w3, account, private_key, properties, registry, oracle_signers=None,
+                      max_batch_gas=DEFAULT_MAX_BATCH_GAS, max_pending=16, poll_interval=1.0):
+    oracle_signers = [Web3.to_checksum_address(signer) for signer in (oracle_signers or [account.address])]
+    implementation, factory = ensure_factory(w3, account, registry, oracle_signers)
+    factory_contract = w3.eth.contract(address=factory, abi=load_artifact('GCBTokenFactory')['abi'])
+
+    summary = {"properties": len(properties), "already_deployed": 0, "batches": 0, "deployed": 0, "failed": 0, "gas_used": 0}
+    remaining = []
+    for prop in properties:
+        address = clone_address(factory, implementation, account.address, prop["property_id"])
+        if registry.get(prop["property_id"]) is None and w3.eth.get_code(address):
+            # Created by an earlier run that stopped before recording it.
+            registry.add(prop["property_id"], address, name=prop["name"], symbol=prop["symbol"], deploy_block=None, tx_hash=None)
+        if registry.get(prop["property_id"]) is not None:
+            summary["already_deployed"] += 1
+            continue
+        remaining.append((prop, address))
+    registry.save()
+    if not remaining:
+        return summary
+
+    token_args = [_token_args(prop, account.address, oracle_signers) for prop, _ in remaining]
+    base_gas, per_token_gas = estimate_gas_model(factory_contract, account.address, token_args)
+    batches = plan_batches(list(zip(remaining, token_args)), base_gas, per_token_gas, max_batch_gas)
+    print(f"Deploying {len(remaining)} property token(s) in {len(batches)} batch(es) "
+          f"(~{per_token_gas} gas per token, {len(batches[0])} tokens per batch).")
+
+    nonce_manager = NonceManager(w3, account, private_key, poll_interval=poll_interval)
+    nonce_manager.start()
+    in_flight = []  # (batch, record)
+
+    def settle_finished():
+        for batch, record in list(in_flight):
+            if record['status'] == 'pending':
+                continue
+            in_flight.remove((batch, record))
+            if record['status'] != 'confirmed':
+                summary["failed"] += len(batch)
+                property_ids = ', '.join(prop['property_id'] for (prop, _), _ in batch)
+                print(f"  Batch {record['tx_hash']} failed ({record['status']}): {property_ids}")
+                continue
+            for (prop, address), args in batch:
+                registry.add(prop["property_id"], address, name=prop["name"], symbol=prop["symbol"], owner=args[4],
+                             initial_supply=str(args[3]), deploy_block=record['block_number'], tx_hash=record['tx_hash'])
+            registry.save()
+            summary["deployed"] += len(batch)
+            summary["gas_used"] += record['gas_used'] or 0
+
+    try:
+        for batch in batches:
+            while nonce_manager.pending_count() >= max_pending:
+                wait_for_oldest(nonce_manager, [record for _, record in in_flight])
+                settle_finished()
+            record = nonce_manager.submit(
+                factory_contract.functions.createTokens([args for _, args in batch]),
+                gas=int((base_gas + per_token_gas * len(batch)) * GAS_HEADROOM),
+            )
+            print(f"  Batch of {len(batch)} token(s), nonce {record['nonce']}, tx {record['tx_hash']}")
+            in_flight.append((batch, record))
+            summary["batches"] += 1
+            settle_finished()
+
+        while in_flight:
+            wait_for_oldest(nonce_manager, [record for _, record in in_flight])
+            settle_finished()
+    finally:
+        nonce_manager.stop()
+    return summary
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Deploy a GCBToken clone per property in a manifest.")
+    parser.add_argument("manifest", help="JSON manifest of the properties to tokenize")
+    parser.add_argument("--registry", default=config.TOKEN_REGISTRY_PATH, help="Token registry file")
+    parser.add_argument("--max-batch-gas", type=int, default=DEFAULT_MAX_BATCH_GAS)
+    parser.add_argument("--max-pending", type=int, default=16, help="Batches in flight at once")
+    args = parser.parse_args(argv)
+
+    w3 = Web3(Web3.HTTPProvider(config.EVM_NETWORK_URL))
+    if not w3.is_connected():
+        print(f"Error: Could not connect to EVM network at {config.EVM_NETWORK_URL}")
+        sys.exit(1)
+
+    deployer_private_key = config.EVM_DEPLOYER_PRIVATE_KEY
+    if not deployer_private_key.startswith('0x'):
+        deployer_private_key = '0x' + deployer_private_key
+    deployer_account = w3.eth.account.from_key(deployer_private_key)
+    # Every configured oracle signer may update KYC status on the new tokens.
+    oracle_signers = [w3.eth.account.from_key(key if key.startswith('0x') else '0x' + key).address
+                      for key in config.ORACLE_SIGNER_KEYS]
+
+    registry = TokenRegistry(args.registry, chain_id=w3.eth.chain_id)
+    started = time.perf_counter()
+    summary = deploy_properties(w3, deployer_account, deployer_private_key, read_manifest(args.manifest), registry,
+                                oracle_signers, max_batch_gas=args.max_batch_gas, max_pending=args.max_pending)
+    print(f"Done in {time.perf_counter() - started:.1f}s: {summary}")
+    print(f"Token registry: {args.registry} ({len(registry)} token(s) on chain {registry.chain_id})")
+
+
+if __name__ == "__main__":
+    main()
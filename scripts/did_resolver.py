@@ -0,0 +1,372 @@
+# scripts/did_resolver.py
+import argparse
+import asyncio
+import contextlib
+import itertools
+import os
+import random
+import sys
+import threading
+import time
+from collections import OrderedDict, deque, namedtuple
+
+from xrpl.asyncio.clients import AsyncWebsocketClient
+from xrpl.core.addresscodec import is_valid_classic_address
+from xrpl.models.requests import AccountObjects, AccountObjectType, LedgerEntry
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import config
+import oracle_metrics as metrics
+
+# Resolves investor DIDs ("did:xrpl:<classic address>") against the XRPL ledger: the DID
+# ledger object (XLS-40) and the account's credentials, where an accepted credential of
+# KYC_CREDENTIAL_TYPE from KYC_CREDENTIAL_ISSUER means KYC is approved. Anyone can create
+# a credential of any type, so there is no default issuer: without one, nothing resolves.
+# Results are kept in an LRU cache with a TTL; unknown DIDs are cached too, for a shorter
+# time. Concurrent lookups of the same DID share one ledger round trip, and all lookups
+# go over a small pool of persistent websocket connections.
+
+DID_PREFIX = "did:xrpl:"
+LSF_ACCEPTED = 0x00010000  # Credential flag: the subject accepted the credential
+RIPPLE_EPOCH_OFFSET = 946684800  # Seconds between the Unix epoch and the Ripple epoch
+
+DIDResolution = namedtuple("DIDResolution", ["did", "account", "document", "uri", "kyc_approved", "ledger_index"])
+
+
+def did_account(xrpl_did):
+    # The classic address a DID refers to, or None if it is not a did:xrpl DID.
+    if not xrpl_did or not xrpl_did.startswith(DID_PREFIX):
+        return None
+    account = xrpl_did[len(DID_PREFIX):].split(":")[-1]  # Also accepts did:xrpl:<network>:<address>
+    return account if is_valid_classic_address(account) else None
+
+
+def is_kyc_credential(credential, credential_type, credential_issuer):
+    # An accepted, unexpired credential of `credential_type` (hex) from `credential_issuer`.
+    if credential.get("CredentialType", "").upper() != credential_type:
+        return False
+    if not credential.get("Flags", 0) & LSF_ACCEPTED:
+        return False
+    if not credential_issuer or credential.get("Issuer") != credential_issuer:
+        return False
+    expires_at = credential_expires_at(credential)
+    return expires_at is None or expires_at > time.time()
+
+
+def credential_expires_at(credential):
+    # A credential's Expiration (Ripple epoch seconds) as Unix time, or None if it never expires.
+    expiration = credential.get("Expiration")
+    return expiration + RIPPLE_EPOCH_OFFSET if expiration is not None else None
+
+
+def hex_text(value):
+    if not value:
+        return None
+    try:
+        return bytes.fromhex(value).decode()
+    except (ValueError, UnicodeDecodeError):
+        return value
+
+
+class TTLCache:
+    # LRU cache whose entries expire; None values (unknown DIDs) use their own, shorter TTL.
+
+    def __init__(self, max_size=100000, ttl=300, negative_ttl=30):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+
+    def get(self, key):
+        # Returns (found, value).
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        if entry[0] < time.monotonic():
+            del self._entries[key]
+            return False, None
+        self._entries.move_to_end(key)
+        return True, entry[1]
+
+    def put(self, key, value):
+        ttl = self.negative_ttl if value is None else self.ttl
+        if ttl <= 0:
+            return
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        self._entries.pop(key, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class WebsocketPool:
+    # A fixed number of persistent AsyncWebsocketClient connections, used round robin.
+    # Each connection multiplexes many requests (responses are matched by request id).
+
+    def __init__(self, url, size=4, timeout=10):
+        self.url = url
+        self.size = max(1, size)
+        self.timeout = timeout
+        self._clients = [None] * self.size
+        self._drainers = [None] * self.size
+        self._locks = [asyncio.Lock() for _ in range(self.size)]
+        self._next = itertools.cycle(range(self.size))
+
+    async def _client(self, slot):
+        client = self._clients[slot]
+        if client is not None and client.is_open():
+            return client
+        async with self._locks[slot]:
+            client = self._clients[slot]
+            if client is None or not client.is_open():
+                await self._close_slot(slot)  # A connection the server dropped, and its drainer
+                client = AsyncWebsocketClient(self.url)
+                await client.open()
+                self._clients[slot] = client
+                # The client also queues every response for `async for` consumers;
+                # nobody reads that queue here, so drain it to keep memory flat.
+                self._drainers[slot] = asyncio.get_running_loop().create_task(self._drain(client))
+        return client
+
+    @staticmethod
+    async def _drain(client):
+        try:
+            async for _ in client:
+                pass
+        except Exception:
+            pass
+
+    async def request(self, request):
+        slot = next(self._next)
+        client = await self._client(slot)
+        try:
+            return await asyncio.wait_for(client.request(request), self.timeout)
+        except (asyncio.TimeoutError, ConnectionError, OSError):
+            # Drop the connection; the next request on this slot reconnects.
+            await self._close_slot(slot)
+            raise
+
+    async def _close_slot(self, slot):
+        client, self._clients[slot] = self._clients[slot], None
+        drainer, self._drainers[slot] = self._drainers[slot], None
+        if drainer is not None:
+            drainer.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await drainer
+        if client is not None and client.is_open():
+            try:
+                await client.close()
+            except Exception:
+                pass
+
+    async def close(self):
+        for slot in range(self.size):
+            await self._close_slot(slot)
+
+
+class DIDResolver:
+    def __init__(self, url=None, pool_size=None, cache_size=None, ttl=None, negative_ttl=None,
+                 credential_type=None, credential_issuer=None, timeout=10):
+        self.pool = WebsocketPool(url or config.XRPL_NETWORK_URL, pool_size or config.XRPL_WS_POOL_SIZE, timeout)
+        self.cache = TTLCache(
+            cache_size or config.DID_CACHE_SIZE,
+            config.DID_CACHE_TTL if ttl is None else ttl,
+            config.DID_NEGATIVE_CACHE_TTL if negative_ttl is None else negative_ttl,
+        )
+        self.credential_type = (credential_type or config.KYC_CREDENTIAL_TYPE).encode().hex().upper()
+        self.credential_issuer = credential_issuer or config.KYC_CREDENTIAL_ISSUER
+        if not is_valid_classic_address(self.credential_issuer or ""):
+            raise ValueError("Resolving KYC on the ledger needs a credential issuer: set KYC_CREDENTIAL_ISSUER "
+                             f"to the issuer's XRPL address (got {self.credential_issuer!r})")
+        self._in_flight = {}  # DID -> lookup task shared by concurrent callers
+        self.stats = {"hits": 0, "negative_hits": 0, "misses": 0, "coalesced": 0, "errors": 0}
+        self._latencies = deque(maxlen=10000)  # Recent ledger round trips (seconds)
+        metrics.DID_CACHE_ENTRIES.set_function(lambda: len(self.cache))
+
+    def _count(self, result):
+        self.stats[result] += 1
+        metrics.DID_LOOKUPS.inc(result=result)
+
+    async def resolve(self, xrpl_did):
+        # Returns a DIDResolution, or None if the DID is not on the ledger.
+        found, resolution = self.cache.get(xrpl_did)
+        if found:
+            self._count("hits" if resolution is not None else "negative_hits")
+            return resolution
+
+        pending = self._in_flight.get(xrpl_did)
+        if pending is not None:
+            self._count("coalesced")
+            return await asyncio.shield(pending)
+
+        # The lookup runs as its own task shared by every concurrent caller, so a caller
+        # that is cancelled (e.g. a client disconnect) does not take the others with it.
+        self._count("misses")
+        task = asyncio.ensure_future(self._lookup(xrpl_did))
+        self._in_flight[xrpl_did] = task
+        task.add_done_callback(lambda done: self._lookup_done(xrpl_did, done))
+        return await asyncio.shield(task)
+
+    async def _lookup(self, xrpl_did):
+        started = time.perf_counter()
+        try:
+            resolution = await self._resolve_on_ledger(xrpl_did)
+        except Exception:
+            self._count("errors")
+            raise
+        elapsed = time.perf_counter() - started
+        self._latencies.append(elapsed)
+        metrics.DID_RESOLVE_SECONDS.observe(elapsed)
+        self.cache.put(xrpl_did, resolution)
+        return resolution
+
+    def _lookup_done(self, xrpl_did, task):
+        if self._in_flight.get(xrpl_did) is task:
+            del self._in_flight[xrpl_did]
+        if not task.cancelled():
+            task.exception()  # Mark retrieved: waiters may all have gone away
+
+    async def _resolve_on_ledger(self, xrpl_did):
+        account = did_account(xrpl_did)
+        if account is None:
+            return None
+        did_response, credentials_response = await asyncio.gather(
+            self.pool.request(LedgerEntry(did=account)),
+            self.pool.request(AccountObjects(account=account, type=AccountObjectType.CREDENTIAL)),
+        )
+        if not did_response.is_successful():
+            if did_response.result.get("error") in ("entryNotFound", "actNotFound"):
+                return None
+            raise RuntimeError(f"ledger_entry failed for {xrpl_did}: {did_response.result.get('error')}")
+
+        if not credentials_response.is_successful():
+            # Without the credential list the KYC status is unknown, not "not approved":
+            # caching a negative answer here would hide an approved investor for the TTL.
+            raise RuntimeError(f"account_objects failed for {xrpl_did}: {credentials_response.result.get('error')}")
+
+        node = did_response.result.get("node", {})
+        credentials = credentials_response.result.get("account_objects", [])
+        return DIDResolution(
+            did=xrpl_did,
+            account=account,
+            document=hex_text(node.get("DIDDocument")),
+            uri=hex_text(node.get("URI")),
+            kyc_approved=any(self._is_kyc_credential(credential) for credential in credentials),
+            ledger_index=did_response.result.get("ledger_index") or did_response.result.get("ledger_current_index"),
+        )
+
+    def _is_kyc_credential(self, credential):
+        return is_kyc_credential(credential, self.credential_type, self.credential_issuer)
+
+    def invalidate(self, xrpl_did):
+        self.cache.invalidate(xrpl_did)
+
+    def summary(self):
+        latencies = sorted(self._latencies)
+        lookups = sum(self.stats[key] for key in ("hits", "negative_hits", "misses", "coalesced"))
+        cached = self.stats["hits"] + self.stats["negative_hits"] + self.stats["coalesced"]
+        return dict(
+            self.stats,
+            cache_entries=len(self.cache),
+            hit_ratio=cached / lookups if lookups else None,
+            ledger_p50_ms=latencies[len(latencies) // 2] * 1000 if latencies else None,
+            ledger_p99_ms=latencies[int(len(latencies) * 0.99)] * 1000 if latencies else None,
+        )
+
+    async def close(self):
+        await self.pool.close()
+
+
+class BlockingDIDResolver:
+    # Runs a DIDResolver on its own event loop thread for the threaded Flask oracle.
+
+    def __init__(self, resolver_factory=DIDResolver, **kwargs):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='did-resolver', daemon=True)
+        self._thread.start()
+        # The resolver's locks and futures belong to its loop, so build it there.
+        self.resolver = self._call(self._create(resolver_factory, kwargs))
+
+    @staticmethod
+    async def _create(resolver_factory, kwargs):
+        return resolver_factory(**kwargs)
+
+    def _call(self, coroutine, timeout=None):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result(timeout)
+
+    def resolve(self, xrpl_did, timeout=30):
+        return self._call(self.resolver.resolve(xrpl_did), timeout)
+
+    def summary(self):
+        return self.resolver.summary()
+
+    def close(self):
+        self._call(self.resolver.close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+
+async def bench(url, dids, lookups, concurrency, pool_size, issuer=None):
+    # Replays `lookups` resolutions drawn from `dids` (so repeats are common) at the given concurrency.
+    resolver = DIDResolver(url, pool_size=pool_size, credential_issuer=issuer)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(did):
+        async with semaphore:
+            started = time.perf_counter()
+            await resolver.resolve(did)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(random.choice(dids)) for _ in range(lookups)))
+    elapsed = time.perf_counter() - started
+    await resolver.close()
+    latencies.sort()
+    return dict(
+        resolver.summary(),
+        lookups=lookups,
+        seconds=elapsed,
+        lookups_per_second=lookups / elapsed,
+        p50_ms=latencies[len(latencies) // 2] * 1000,
+        p99_ms=latencies[int(len(latencies) * 0.99)] * 1000,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resolve XRPL DIDs (with caching) against a rippled websocket endpoint.")
+    parser.add_argument("--url", default=config.XRPL_NETWORK_URL, help="rippled websocket URL (e.g. ws://127.0.0.1:6006 for mock_rippled.py)")
+    parser.add_argument("--issuer", default=config.KYC_CREDENTIAL_ISSUER,
+                        help="XRPL address of the KYC credential issuer (default: KYC_CREDENTIAL_ISSUER)")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    resolve_parser = subcommands.add_parser("resolve", help="Resolve one or more DIDs")
+    resolve_parser.add_argument("dids", nargs="+")
+    bench_parser = subcommands.add_parser("bench", help="Measure cached resolution throughput over the DIDs in a KYC data file")
+    bench_parser.add_argument("--data", default="gcb_kyc_data.json")
+    bench_parser.add_argument("--lookups", type=int, default=10000)
+    bench_parser.add_argument("--concurrency", type=int, default=200)
+    bench_parser.add_argument("--pool-size", type=int, default=config.XRPL_WS_POOL_SIZE)
+    args = parser.parse_args()
+
+    if args.command == "resolve":
+        async def resolve_all():
+            resolver = DIDResolver(args.url, credential_issuer=args.issuer)
+            try:
+                for did in args.dids:
+                    resolution = await resolver.resolve(did)
+                    print(f"  {did}: {resolution._asdict() if resolution else 'not found'}")
+            finally:
+                await resolver.close()
+        asyncio.run(resolve_all())
+    else:
+        from kyc_store import iter_investors_json
+        dids = [investor["xrpl_did"] for investor in iter_investors_json(args.data)]
+        result = asyncio.run(bench(args.url, dids, args.lookups, args.concurrency, args.pool_size, args.issuer))
+        for key, value in result.items():
+            print(f"  {key}: {value:.2f}" if isinstance(value, float) else f"  {key}: {value}")
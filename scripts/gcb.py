@@ -0,0 +1,176 @@
+# scripts/gcb.py
+import argparse
+import importlib
+import json
+import os
+import sys
+import urllib.error
+import urllib.request
+from decimal import Decimal
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import config
+
+# One entry point for the prototype: `python scripts/gcb.py <command> [args]`. Each
+# command imports only what it needs, when it runs: the commands that drive a chain hand
+# their arguments to the script that implements them (so `gcb allocate --help` is
+# allocate_tokens.py's own help), while `status` and `attest` talk JSON-RPC and HTTP with
+# the standard library and never import web3, Flask or xrpl-py, so they start in a
+# fraction of the time. config.py (and .env) is read once, here.
+
+# command -> (module with main(argv, prog), description)
+SCRIPT_COMMANDS = {
+    "setup": ("xrpl_did_kyc_setup", "Provision XRPL investor wallets, DIDs and simulated KYC data"),
+    "deploy": ("deploy_gcb_token", "Deploy GCBToken and write its address to .env"),
+    "deploy-properties": ("deploy_property_tokens", "Deploy a GCBToken clone per property in a manifest"),
+    "serve-oracle": ("gcb_kyc_oracle", "Run the KYC oracle (--async for the asyncio server)"),
+    "allocate": ("allocate_tokens", "Allocate GCBS to many investors from an address,amount CSV"),
+    "sync-ledger": ("ledger_kyc_sync", "Load on-ledger DIDs and KYC credentials into the KYC store"),
+}
+# Token views read by `status`, in output order.
+STATUS_CALLS = (
+    ("isWhitelisted(address)", "whitelisted"),
+    ("balanceOf(address)", "balance"),
+    ("withdrawableIncome(address)", "withdrawable income"),
+)
+
+
+class RPCError(Exception):
+    pass
+
+
+def rpc(method, params, url=None):
+    # A single JSON-RPC call to the EVM node, without web3.
+    body = json.dumps({"jsonrpc": "2.0", "id": 1, "method": method, "params": params}).encode()
+    request = urllib.request.Request(url or config.EVM_NETWORK_URL, data=body, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            reply = json.load(response)
+    except (urllib.error.URLError, OSError) as e:
+        raise RPCError(f"Could not reach EVM network at {url or config.EVM_NETWORK_URL}: {e}") from e
+    if "error" in reply:
+        raise RPCError(f"{method} failed: {reply['error'].get('message', reply['error'])}")
+    return reply["result"]
+
+
+def resolve_token_address(token_address=None, property_id=None):
+    # --token, --property (looked up in the token registry), ACCESS_CONTROL_CONTRACT_ADDRESS,
+    # or the only registered token, in that order.
+    if token_address:
+        return token_address
+    from token_registry import TokenRegistry
+
+    registry = None
+    if property_id is not None or not config.ACCESS_CONTROL_CONTRACT_ADDRESS:
+        registry = TokenRegistry(chain_id=int(rpc("eth_chainId", []), 16))
+    if property_id is not None:
+        entry = registry.get(property_id)
+        if entry is None:
+            raise SystemExit(f"Unknown property {property_id} in {registry.path} (chain {registry.chain_id})")
+        return entry["address"]
+    if config.ACCESS_CONTROL_CONTRACT_ADDRESS:
+        return config.ACCESS_CONTROL_CONTRACT_ADDRESS
+    if len(registry) == 1:
+        return registry.tokens()[0]["address"]
+    raise SystemExit("No token given: pass --token or --property, or set ACCESS_CONTROL_CONTRACT_ADDRESS in .env.")
+
+
+def status(argv, prog):
+    parser = argparse.ArgumentParser(prog=prog, description="Show an investor's whitelist status, balance and income on a GCBToken.")
+    parser.add_argument("address", help="Investor EVM address")
+    parser.add_argument("--token", help="GCBToken address (default: ACCESS_CONTROL_CONTRACT_ADDRESS)")
+    parser.add_argument("--property", help="Property id of a token in the token registry")
+    parser.add_argument("--json", action="store_true", help="Print the result as JSON")
+    args = parser.parse_args(argv)
+
+    from eth_utils import function_signature_to_4byte_selector, is_address, to_checksum_address
+
+    if not is_address(args.address):
+        raise SystemExit(f"Invalid EVM address: {args.address}")
+    address = to_checksum_address(args.address)
+    try:
+        token_address = to_checksum_address(resolve_token_address(args.token, args.property))
+        # All three views take one address: selector + the address left-padded to 32 bytes.
+        calldata = bytes(12) + bytes.fromhex(address[2:])
+        values = {}
+        for signature, label in STATUS_CALLS:
+            data = "0x" + (function_signature_to_4byte_selector(signature) + calldata).hex()
+            result = rpc("eth_call", [{"to": token_address, "data": data}, "latest"])
+            values[label] = int(result, 16) if result not in ("0x", "") else None
+    except RPCError as e:
+        raise SystemExit(f"Error: {e}")
+
+    if args.json:
+        fields = {label.replace(' ', '_'): value for label, value in values.items()}
+        print(json.dumps(dict(fields, address=address, token=token_address, whitelisted=bool(values['whitelisted']))))
+        return
+    print(f"{address} on GCBToken {token_address}:")
+    print(f"  whitelisted: {'yes' if values['whitelisted'] else 'no'}")
+    print(f"  balance: {Decimal(values['balance'] or 0) / 10**18:f} GCBS")
+    print(f"  withdrawable income: {Decimal(values['withdrawable income'] or 0) / 10**18:f}")
+
+
+def attest(argv, prog):
+    parser = argparse.ArgumentParser(prog=prog, description="Ask a running KYC oracle to attest an investor.")
+    parser.add_argument("xrpl_did", help="The investor's did:xrpl: DID")
+    parser.add_argument("address", help="The investor's EVM address")
+    parser.add_argument("--token", help="GCBToken address (default: the oracle's default token)")
+    parser.add_argument("--property", help="Property id of a registered token")
+    parser.add_argument("--signed", action="store_true",
+                        help="Get a signed EIP-712 attestation (/kyc-attestation) instead of an oracle transaction")
+    parser.add_argument("--oracle", default=f"http://localhost:{config.ORACLE_PORT}", help="Oracle base URL")
+    args = parser.parse_args(argv)
+
+    payload = {"xrplDID": args.xrpl_did, "investorEVMAddress": args.address}
+    if args.token:
+        payload["tokenAddress"] = args.token
+    if args.property:
+        payload["propertyId"] = args.property
+    url = args.oracle.rstrip('/') + ("/kyc-attestation" if args.signed else "/attest-kyc")
+    request = urllib.request.Request(url, data=json.dumps(payload).encode(), headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=120) as response:
+            body = json.load(response)
+    except urllib.error.HTTPError as e:
+        body = json.load(e) if e.headers.get_content_type() == "application/json" else {"success": False, "error": str(e)}
+    except (urllib.error.URLError, OSError) as e:
+        raise SystemExit(f"Error: could not reach the oracle at {args.oracle}: {e}")
+    print(json.dumps(body, indent=4))
+    if not body.get("success"):
+        sys.exit(1)
+
+
+def run_script(command, argv):
+    module_name, _ = SCRIPT_COMMANDS[command]
+    if command == "serve-oracle" and "--async" in argv:
+        module_name = "gcb_kyc_oracle_async"
+        argv = [arg for arg in argv if arg != "--async"]
+    importlib.import_module(module_name).main(argv, prog=f"gcb {command}")
+
+
+def main(argv=None):
+    commands = {"status": "Show an investor's whitelist status, balance and income",
+                "attest": "Ask a running KYC oracle to attest an investor"}
+    commands.update({command: description for command, (_, description) in SCRIPT_COMMANDS.items()})
+    parser = argparse.ArgumentParser(
+        prog="gcb",
+        description="GCB tokenization prototype.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="commands:\n" + "\n".join(f"  {command:<18} {description}" for command, description in commands.items())
+               + "\n\nRun 'gcb <command> --help' for a command's options.",
+    )
+    parser.add_argument("command", choices=commands, metavar="command")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.command == "status":
+        status(args.args, "gcb status")
+    elif args.command == "attest":
+        attest(args.args, "gcb attest")
+    else:
+        run_script(args.command, args.args)
+
+
+if __name__ == "__main__":
+    main()
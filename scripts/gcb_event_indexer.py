@@ -0,0 +1,325 @@
+# scripts/gcb_event_indexer.py
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from web3 import Web3
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import config
+
+# Streams GCBToken events into a local SQLite index: holder balances (current and per
+# block), whitelist state, income distributions and claims. Logs are fetched with one
+# eth_getLogs per block range, the range adapts to what the node accepts, and each range
+# is committed together with the checkpoint, so a restart resumes exactly where it stopped.
+# Queries ("holders at block N", "all whitelisted addresses") then never touch the RPC.
+
+TRANSFER_TOPIC = Web3.keccak(text="Transfer(address,address,uint256)")
+KYC_STATUS_UPDATED_TOPIC = Web3.keccak(text="KYCStatusUpdated(address,bool)")
+INCOME_DISTRIBUTED_TOPIC = Web3.keccak(text="IncomeDistributed(address,uint256,uint256)")
+INCOME_CLAIMED_TOPIC = Web3.keccak(text="IncomeClaimed(address,uint256)")
+INDEXED_TOPICS = [TRANSFER_TOPIC, KYC_STATUS_UPDATED_TOPIC, INCOME_DISTRIBUTED_TOPIC, INCOME_CLAIMED_TOPIC]
+
+ZERO_ADDRESS = "0x" + "00" * 20
+
+# Node error fragments that mean the provider caps the block range or result size of
+# eth_getLogs: the range is halved and never grows back past that cap.
+RANGE_LIMIT_MARKERS = ('query returned more than', 'limit exceeded', 'too many', 'block range', 'range too large',
+                       'range is too large', 'is limited to', 'response size')
+# Timeouts only say this range was slow (a busy node, a dense stretch of blocks): the
+# range is halved but may grow again once responses are small.
+TIMEOUT_MARKERS = ('timeout', 'timed out')
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS checkpoints (
+        contract TEXT PRIMARY KEY,
+        last_block INTEGER NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS balances (
+        contract TEXT NOT NULL,
+        address TEXT NOT NULL,
+        balance TEXT NOT NULL,
+        PRIMARY KEY (contract, address)
+    );
+    CREATE TABLE IF NOT EXISTS balance_history (
+        contract TEXT NOT NULL,
+        address TEXT NOT NULL,
+        block INTEGER NOT NULL,
+        balance TEXT NOT NULL,
+        PRIMARY KEY (contract, address, block)
+    );
+    CREATE TABLE IF NOT EXISTS whitelist (
+        contract TEXT NOT NULL,
+        address TEXT NOT NULL,
+        status INTEGER NOT NULL,
+        block INTEGER NOT NULL,
+        PRIMARY KEY (contract, address)
+    );
+    CREATE INDEX IF NOT EXISTS whitelist_status ON whitelist (contract, status);
+    CREATE TABLE IF NOT EXISTS income_events (
+        contract TEXT NOT NULL,
+        block INTEGER NOT NULL,
+        log_index INTEGER NOT NULL,
+        tx_hash TEXT NOT NULL,
+        kind TEXT NOT NULL,
+        account TEXT NOT NULL,
+        amount TEXT NOT NULL,
+        timestamp INTEGER,
+        PRIMARY KEY (contract, block, log_index)
+    );
+"""
+
+
+def _topic_address(topic):
+    return Web3.to_checksum_address(bytes(topic)[-20:])
+
+
+def _word(data, index):
+    return int.from_bytes(data[32 * index:32 * (index + 1)], 'big')
+
+
+def decode_logs(logs):
+    # Decodes a whole eth_getLogs response by topic without going through the ABI codec.
+    transfers, whitelist_updates, income_events = [], [], []
+    for log in logs:
+        topic = log['topics'][0]
+        data = bytes(log['data'])
+        if topic == TRANSFER_TOPIC:
+            transfers.append((log['blockNumber'], _topic_address(log['topics'][1]), _topic_address(log['topics'][2]), _word(data, 0)))
+        elif topic == KYC_STATUS_UPDATED_TOPIC:
+            whitelist_updates.append((log['blockNumber'], _topic_address(log['topics'][1]), bool(_word(data, 0))))
+        elif topic == INCOME_DISTRIBUTED_TOPIC:
+            income_events.append((log['blockNumber'], log['logIndex'], log['transactionHash'].hex(), 'distributed',
+                                  _topic_address(log['topics'][1]), str(_word(data, 0)), _word(data, 1)))
+        elif topic == INCOME_CLAIMED_TOPIC:
+            income_events.append((log['blockNumber'], log['logIndex'], log['transactionHash'].hex(), 'claimed',
+                                  _topic_address(log['topics'][1]), str(_word(data, 0)), None))
+    return transfers, whitelist_updates, income_events
+
+
+class GCBEventIndex:
+    def __init__(self, path, contract_address):
+        self.contract = Web3.to_checksum_address(contract_address)
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+
+    def checkpoint(self):
+        row = self.connection.execute("SELECT last_block FROM checkpoints WHERE contract = ?", (self.contract,)).fetchone()
+        return row[0] if row else None
+
+    def apply(self, to_block, transfers, whitelist_updates, income_events):
+        # Writes one decoded block range and moves the checkpoint, atomically.
+        touched = {}
+        for block, sender, recipient, value in transfers:
+            for address, delta in ((sender, -value), (recipient, value)):
+                if address == ZERO_ADDRESS:
+                    continue
+                if address not in touched:
+                    row = self.connection.execute(
+                        "SELECT balance FROM balances WHERE contract = ? AND address = ?", (self.contract, address)
+                    ).fetchone()
+                    touched[address] = [int(row[0]) if row else 0, {}]
+                touched[address][0] += delta
+                touched[address][1][block] = touched[address][0]
+
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO balances (contract, address, balance) VALUES (?, ?, ?)",
+                [(self.contract, address, str(balance)) for address, (balance, _) in touched.items()],
+            )
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO balance_history (contract, address, block, balance) VALUES (?, ?, ?, ?)",
+                [(self.contract, address, block, str(balance))
+                 for address, (_, per_block) in touched.items() for block, balance in per_block.items()],
+            )
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO whitelist (contract, address, status, block) VALUES (?, ?, ?, ?)",
+                [(self.contract, address, int(status), block) for block, address, status in whitelist_updates],
+            )
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO income_events (contract, block, log_index, tx_hash, kind, account, amount, timestamp) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(self.contract,) + event for event in income_events],
+            )
+            self.connection.execute(
+                "INSERT OR REPLACE INTO checkpoints (contract, last_block) VALUES (?, ?)", (self.contract, to_block)
+            )
+
+    # --- Queries (local only, no RPC) ---
+
+    def holders_at(self, block=None):
+        if block is None:
+            rows = self.connection.execute(
+                "SELECT address, balance FROM balances WHERE contract = ? AND balance != '0'", (self.contract,)
+            )
+        else:
+            rows = self.connection.execute(
+                "SELECT h.address, h.balance FROM balance_history h "
+                "WHERE h.contract = ? AND h.block = (SELECT MAX(block) FROM balance_history "
+                "WHERE contract = h.contract AND address = h.address AND block <= ?) AND h.balance != '0'",
+                (self.contract, block),
+            )
+        return {address: int(balance) for address, balance in rows}
+
+    def whitelisted_addresses(self):
+        rows = self.connection.execute(
+            "SELECT address FROM whitelist WHERE contract = ? AND status = 1", (self.contract,)
+        )
+        return [address for (address,) in rows]
+
+    def whitelist_status(self, address):
+        row = self.connection.execute(
+            "SELECT status FROM whitelist WHERE contract = ? AND address = ?", (self.contract, Web3.to_checksum_address(address))
+        ).fetchone()
+        return bool(row[0]) if row else False
+
+    def income_history(self, kind=None):
+        query = "SELECT block, tx_hash, kind, account, amount, timestamp FROM income_events WHERE contract = ?"
+        params = [self.contract]
+        if kind:
+            query += " AND kind = ?"
+            params.append(kind)
+        rows = self.connection.execute(query + " ORDER BY block, log_index", params)
+        return [
+            {"block": block, "tx_hash": tx_hash, "kind": kind, "account": account, "amount": int(amount), "timestamp": timestamp}
+            for block, tx_hash, kind, account, amount, timestamp in rows
+        ]
+
+    def close(self):
+        self.connection.close()
+
+
+class GCBEventIndexer:
+    def __init__(self, w3, index, start_block=0, confirmations=2, initial_chunk=2000, max_chunk=50000, target_logs=5000):
+        self.w3 = w3
+        self.index = index
+        self.start_block = start_block
+        self.confirmations = confirmations
+        self.chunk = initial_chunk
+        self.max_chunk = max_chunk
+        self.target_logs = target_logs
+
+    def fetch_logs(self, from_block, to_block):
+        return self.w3.eth.get_logs({
+            'address': self.index.contract,
+            'fromBlock': from_block,
+            'toBlock': to_block,
+            'topics': [INDEXED_TOPICS],
+        })
+
+    def sync(self):
+        # Indexes everything up to the confirmed head; returns the number of logs processed.
+        checkpoint = self.index.checkpoint()
+        from_block = self.start_block if checkpoint is None else checkpoint + 1
+        head = self.w3.eth.block_number - self.confirmations
+        processed = 0
+        while from_block <= head:
+            to_block = min(head, from_block + self.chunk - 1)
+            try:
+                logs = self.fetch_logs(from_block, to_block)
+            except Exception as e:
+                message = str(e).lower()
+                if self.chunk > 1 and any(marker in message for marker in RANGE_LIMIT_MARKERS):
+                    # The node's limit is below this range; never grow back past it.
+                    self.chunk = max(1, self.chunk // 2)
+                    self.max_chunk = self.chunk
+                    continue
+                if self.chunk > 1 and any(marker in message for marker in TIMEOUT_MARKERS):
+                    self.chunk = max(1, self.chunk // 2)
+                    continue
+                raise
+            self.index.apply(to_block, *decode_logs(logs))
+            processed += len(logs)
+            # Grow the range while responses stay small, shrink it when they get large.
+            if len(logs) < self.target_logs // 2:
+                self.chunk = min(self.max_chunk, self.chunk * 2)
+            elif len(logs) > self.target_logs:
+                self.chunk = max(1, self.chunk // 2)
+            from_block = to_block + 1
+        return processed
+
+    def follow(self, poll_interval=5):
+        while True:
+            processed = self.sync()
+            if processed:
+                print(f"Indexed {processed} log(s) up to block {self.index.checkpoint()}.")
+            time.sleep(poll_interval)
+
+
+def reconcile(w3, index, block_identifier=None):
+    # Compares the index with on-chain state for every address it knows about, using
+    # batched reads, and returns the addresses whose whitelist flag or balance differ.
+    from batch_reads import BatchReader
+    from contract_artifacts import load_artifact
+
+    block_identifier = block_identifier if block_identifier is not None else index.checkpoint()
+    contract = w3.eth.contract(address=index.contract, abi=load_artifact('GCBToken')['abi'])
+    addresses = sorted(
+        {address for (address,) in index.connection.execute("SELECT address FROM balances WHERE contract = ?", (index.contract,))}
+        | {address for (address,) in index.connection.execute("SELECT address FROM whitelist WHERE contract = ?", (index.contract,))}
+    )
+    whitelisted = set(index.whitelisted_addresses())
+    balances = index.holders_at()
+    mismatches = []
+    for address, state in BatchReader(w3, contract).holder_states(addresses, block_identifier).items():
+        if state.is_whitelisted != (address in whitelisted) or state.balance != balances.get(address, 0):
+            mismatches.append(state)
+    return addresses, mismatches
+
+
+def open_index(contract_address=None, path=None):
+    return GCBEventIndex(path or config.GCB_EVENT_INDEX_PATH, contract_address or config.ACCESS_CONTROL_CONTRACT_ADDRESS)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Index GCBToken events into a local SQLite store.")
+    parser.add_argument("--contract", default=config.ACCESS_CONTROL_CONTRACT_ADDRESS, help="GCBToken address")
+    parser.add_argument("--db", default=config.GCB_EVENT_INDEX_PATH, help="SQLite index file")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    run_parser = subcommands.add_parser("run", help="Index new events (and keep following with --follow)")
+    run_parser.add_argument("--from-block", type=int, default=config.GCB_TOKEN_DEPLOY_BLOCK)
+    run_parser.add_argument("--confirmations", type=int, default=2)
+    run_parser.add_argument("--follow", action="store_true")
+    holders_parser = subcommands.add_parser("holders", help="List holders (optionally as of a block)")
+    holders_parser.add_argument("--block", type=int)
+    subcommands.add_parser("whitelisted", help="List whitelisted addresses")
+    subcommands.add_parser("income", help="List income distributions and claims")
+    subcommands.add_parser("reconcile", help="Check the index against on-chain state with batched reads")
+    args = parser.parse_args()
+
+    if not args.contract:
+        print("ERROR: ACCESS_CONTROL_CONTRACT_ADDRESS (GCBToken address) not set in .env. Please run deploy_gcb_token.py first.")
+        sys.exit(1)
+    index = open_index(args.contract, args.db)
+
+    if args.command == "run":
+        w3 = Web3(Web3.HTTPProvider(config.EVM_NETWORK_URL))
+        indexer = GCBEventIndexer(w3, index, start_block=args.from_block, confirmations=args.confirmations)
+        started = time.perf_counter()
+        processed = indexer.sync()
+        print(f"Indexed {processed} log(s) up to block {index.checkpoint()} in {time.perf_counter() - started:.2f}s.")
+        if args.follow:
+            indexer.follow()
+    elif args.command == "reconcile":
+        w3 = Web3(Web3.HTTPProvider(config.EVM_NETWORK_URL))
+        started = time.perf_counter()
+        addresses, mismatches = reconcile(w3, index)
+        for state in mismatches:
+            print(f"  MISMATCH {state.address}: on-chain whitelisted={state.is_whitelisted} balance={state.balance}")
+        print(f"Reconciled {len(addresses)} address(es) at block {index.checkpoint()}: "
+              f"{len(mismatches)} mismatch(es) in {time.perf_counter() - started:.2f}s.")
+    else:
+        started = time.perf_counter()
+        if args.command == "holders":
+            results = [f"{address}: {balance}" for address, balance in sorted(index.holders_at(args.block).items())]
+        elif args.command == "whitelisted":
+            results = index.whitelisted_addresses()
+        else:
+            results = [f"block {e['block']}: {e['kind']} {e['amount']} ({e['account']})" for e in index.income_history()]
+        elapsed = (time.perf_counter() - started) * 1000
+        for line in results:
+            print(f"  {line}")
+        print(f"{len(results)} result(s) in {elapsed:.1f} ms")
@@ -1,77 +1,366 @@
+import argparse
 import os
-import json
-import time
 import sys
-from flask import Flask, request, jsonify
+import threading
+import uuid
+from functools import partial
+from flask import Flask, Response, g, request, jsonify
 from web3 import Web3
 from web3.exceptions import ContractCustomError, ContractLogicError
 
 # Add the project root to the Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 import config
+from attestation_journal import FINAL_STATUSES, AttestationJournal, reconcile_journal, replay_journal
+from batch_reads import BatchReader
+from contract_artifacts import load_artifact
+from did_resolver import BlockingDIDResolver
+from kyc_attestations import AttestationSigner
+from kyc_batcher import KYCBatcher
+from kyc_credentials import CredentialVerifier
+from kyc_store import import_json, open_kyc_store, record_kyc_approved
+import oracle_metrics as metrics
+from oracle_metrics import annotate, span
+from signer_pool import create_signer_pool
+from token_registry import TokenRegistry
+from whitelist_cache import WhitelistCache, WhitelistFollower
 
 app = Flask(__name__)
 
 # --- SIMULATED XRPL DID & KYC DATASTORE ---
-# This will be populated from gcb_kyc_data.json generated by xrpl_did_kyc_setup.py
-simulated_kyc_lookup = {}
+# Indexed by XRPL DID and linked EVM address (see kyc_store.py). xrpl_did_kyc_setup.py
+# upserts investors into it as they are created, and lookups always see the latest
+# committed rows, so the oracle never has to reload it. gcb_kyc_data.json is only
+# bulk-imported when the store is still empty.
+kyc_store = None
 KYC_DATA_FILE = "gcb_kyc_data.json"
+# With KYC_SOURCE=ledger, DIDs and KYC credentials are resolved on the XRPL ledger instead
+# (cached, see did_resolver.py); the store then only records linked EVM addresses.
+did_resolver = None
+# Checks the signed KYC credential behind each store record (KYC_VERIFY_CREDENTIALS).
+credential_verifier = None
 
-# EVM Sidechain setup for sending data back to GCBToken contract
-w3 = Web3(Web3.HTTPProvider(config.EVM_NETWORK_URL))
-deployer_private_key = config.EVM_DEPLOYER_PRIVATE_KEY
-if not deployer_private_key.startswith('0x'):
-    deployer_private_key = '0x' + deployer_private_key
-oracle_account = w3.eth.account.from_key(deployer_private_key) # Oracle uses deployer key for simplicity
+# EVM Sidechain setup for sending data back to GCBToken contract. Connected by init_oracle,
+# so importing this module opens no connection.
+w3 = None
+deployer_private_key = None
+oracle_account = None # Oracle uses deployer key for simplicity
 
-gcb_token_contract = None
 gcb_token_abi = None
+# One nonce lane (NonceManager) per oracle signer key: hands out nonces locally, confirms
+# receipts in the background (so /attest-kyc returns as soon as the transaction is
+# broadcast) and routes each batch to the least loaded healthy signer.
+signer_pool = None
+# The GCBTokens the oracle attests for (token address -> OracleToken). Requests name one by
+# tokenAddress or propertyId; tokens from the registry (deploy_property_tokens.py) are
+# added on first use, and requests that name none go to default_token.
+tokens = {}
+tokens_lock = threading.Lock()
+default_token = None
+token_registry = None
+# Keeps every token's whitelist cache current with one eth_getLogs per poll.
+whitelist_follower = None
+# Signs EIP-712 KYC attestations (/kyc-attestation) with the first oracle signer key;
+# investors submit them to GCBToken themselves, so no oracle transaction is needed.
+attestation_signer = None
+# attestation id -> request details and the id of the transaction record that carries it
+attestations = {}
+# Durable record of signed transactions and attestations (see attestation_journal.py).
+journal = None
 
 def load_contract_abi():
     try:
-        from solcx import compile_standard
-        CONTRACT_PATH = os.path.join(os.path.dirname(__file__), '..', 'contracts', 'GCBToken.sol')
-        with open(CONTRACT_PATH, 'r') as f:
-            contract_content = f.read()
-        compiled_sol = compile_standard(
-            {"language": "Solidity", "sources": {CONTRACT_PATH: {"content": contract_content}},
-             "settings": {"outputSelection": {"*": {"*": ["abi"]}}}},
-            solc_version="0.8.20",
-            allow_paths=[os.path.dirname(CONTRACT_PATH), os.path.join(os.path.dirname(__file__), '..', 'node_modules', '@openzeppelin')]
-        )
-        return compiled_sol['contracts'][CONTRACT_PATH]['GCBToken']['abi']
+        return load_artifact('GCBToken')['abi']
     except Exception as e:
         print(f"Could not compile or load ABI for GCBToken: {e}. Please ensure contracts/GCBToken.sol is correct.")
         sys.exit(1)
 
-def init_oracle():
-    global gcb_token_contract, gcb_token_abi, simulated_kyc_lookup
+class OracleToken:
+    # One GCBToken the oracle attests for, with its own whitelist cache and micro-batcher:
+    # updates for different tokens never share a batchUpdateKYCStatus transaction.
+
+    def __init__(self, address, from_block, property_id=None):
+        self.contract = w3.eth.contract(address=Web3.to_checksum_address(address), abi=gcb_token_abi)
+        self.address = self.contract.address
+        self.property_id = property_id
+        # Current and in-flight isWhitelisted status per address, so repeated attestations don't send transactions.
+        self.whitelist_cache = WhitelistCache(self.address, from_block=from_block)
+        self.batch_reader = BatchReader(w3, self.contract)
+        # Collects attestations for a short window and flushes them as one transaction.
+        self.batcher = KYCBatcher(
+            partial(submit_kyc_batch, self),
+            window=config.ORACLE_BATCH_WINDOW_MS / 1000.0,
+            max_size=config.ORACLE_BATCH_MAX_SIZE,
+        )
+
+
+def add_token(address, property_id=None):
+    with tokens_lock:
+        address = Web3.to_checksum_address(address)
+        if address not in tokens:
+            tokens[address] = OracleToken(address, w3.eth.block_number, property_id)
+            whitelist_follower.add(tokens[address].whitelist_cache)
+            print(f"Oracle attesting for GCBToken {address}" + (f" (property {property_id})" if property_id else ""))
+        elif property_id is not None:
+            tokens[address].property_id = property_id
+        return tokens[address]
+
+
+def find_token(token_address=None, property_id=None):
+    # The OracleToken for a token address or registered property id (None if unknown).
+    # The registry is re-read on a miss if its file changed, so newly deployed tokens need
+    # no restart and requests for unknown tokens cost one stat() call.
+    if token_address is not None:
+        token = tokens.get(Web3.to_checksum_address(token_address))
+    else:
+        token = next((token for token in list(tokens.values()) if token.property_id == property_id), None)
+    if token is not None or token_registry is None:
+        return token
+    token_registry.reload_if_changed()
+    entry = token_registry.find(token_address) if token_address is not None else token_registry.get(property_id)
+    return add_token(entry['address'], entry['property_id']) if entry is not None else None
+
+
+def resolve_token(data):
+    # Returns (OracleToken, error message, HTTP status) for a request's tokenAddress or
+    # propertyId; requests that name neither go to the default token.
+    token_address = data.get('tokenAddress')
+    property_id = data.get('propertyId')
+    if token_address is None and property_id is None:
+        if default_token is None:
+            return None, "Missing required field (tokenAddress or propertyId)", 400
+        return default_token, None, None
+    if token_address is not None and not Web3.is_address(token_address):
+        return None, f"Invalid token address: {token_address}", 400
+    token = find_token(token_address, property_id)
+    if token is None:
+        return None, f"Unknown token: {token_address or property_id}", 404
+    return token, None, None
+
+
+def init_oracle(evm_w3=None, private_key=None, contract_address=None, store=None, verifier=None, journal_path=None,
+                signer_keys=None, registry_path=None):
+    # The arguments default to the .env configuration; benchmarks and simulations pass
+    # their own local EVM connection, signing key, default GCBToken, KYC store, credential
+    # verifier, journal file ('' for none), oracle signer keys (default: ORACLE_SIGNER_KEYS,
+    # or just `private_key` when that is given) and token registry file.
+    global w3, deployer_private_key, oracle_account
+    global gcb_token_abi, kyc_store, signer_pool, default_token, token_registry, whitelist_follower, did_resolver
+    global credential_verifier, journal, attestation_signer
+
+    w3 = evm_w3 if evm_w3 is not None else Web3(Web3.HTTPProvider(config.EVM_NETWORK_URL))
+    deployer_private_key = private_key if private_key is not None else config.EVM_DEPLOYER_PRIVATE_KEY
+    if not deployer_private_key.startswith('0x'):
+        deployer_private_key = '0x' + deployer_private_key
+    oracle_account = w3.eth.account.from_key(deployer_private_key)
+    contract_address = contract_address or config.ACCESS_CONTROL_CONTRACT_ADDRESS
+    if 'oracle_metrics' not in w3.middleware_onion:
+        w3.middleware_onion.add(metrics.rpc_metrics_middleware, name='oracle_metrics')
 
     if not w3.is_connected():
         print(f"Error: Oracle could not connect to EVM network at {config.EVM_NETWORK_URL}")
         sys.exit(1)
     print(f"Oracle connected to EVM network (chain ID: {w3.eth.chain_id}).")
 
-    if not config.ACCESS_CONTROL_CONTRACT_ADDRESS:
-        print("ERROR: ACCESS_CONTROL_CONTRACT_ADDRESS (GCBToken address) not set in .env. Please run deploy_gcb_token.py first.")
+    token_registry = TokenRegistry(registry_path, chain_id=w3.eth.chain_id)
+    if not contract_address and len(token_registry) == 1:
+        contract_address = token_registry.tokens()[0]['address']
+    if not contract_address and len(token_registry) == 0:
+        print("ERROR: ACCESS_CONTROL_CONTRACT_ADDRESS (GCBToken address) not set in .env and no tokens in "
+              f"{token_registry.path}. Please run deploy_gcb_token.py or deploy_property_tokens.py first.")
         sys.exit(1)
-
     gcb_token_abi = load_contract_abi()
-    gcb_token_contract = w3.eth.contract(
-        address=config.ACCESS_CONTROL_CONTRACT_ADDRESS,
-        abi=gcb_token_abi
-    )
-    print(f"Oracle connected to GCBToken contract at: {config.ACCESS_CONTROL_CONTRACT_ADDRESS}")
-
-    # Load simulated XRPL DID KYC data
-    if os.path.exists(KYC_DATA_FILE):
-        with open(KYC_DATA_FILE, "r") as f:
-            data = json.load(f)
-            for investor in data['investors']:
-                simulated_kyc_lookup[investor['xrpl_did']] = investor['kyc_approved']
-        print(f"Loaded simulated XRPL DID KYC data from {KYC_DATA_FILE}: {simulated_kyc_lookup}")
+    print(f"Oracle serving {len(token_registry)} registered property token(s) from {token_registry.path}.")
+
+    # Settle what a previous run left in flight before sending anything new.
+    journal_path = config.ORACLE_JOURNAL_PATH if journal_path is None else journal_path
+    state = replay_journal(journal_path)
+    if signer_keys is None:
+        signer_keys = [deployer_private_key] if private_key is not None else config.ORACLE_SIGNER_KEYS
+    in_flight = []
+    if journal_path:
+        for signer_key in signer_keys:
+            in_flight += reconcile_journal(w3, state, w3.eth.account.from_key(signer_key).address)
+    journal = AttestationJournal(journal_path, state) if journal_path else None
+    if state['transactions']:
+        print(f"Oracle replayed {len(state['transactions'])} journaled transaction(s) from {journal_path} "
+              f"({len(in_flight)} still in flight).")
+
+    signer_pool = create_signer_pool(w3, journal=journal, private_keys=signer_keys)
+    attestation_signer = AttestationSigner(signer_keys[0], w3.eth.chain_id)
+    print(f"Oracle signing EIP-712 KYC attestations as {attestation_signer.address} "
+          f"(valid {attestation_signer.ttl}s, {attestation_signer.workers} worker process(es)).")
+    restored = {}
+    for entry in state['transactions'].values():
+        if entry['status'] in FINAL_STATUSES or entry in in_flight:
+            restored[entry['record_id']] = signer_pool.restore(entry)
+    attestations.update(state['attestations'])
+    signer_pool.start()
+    metrics.PENDING_TRANSACTIONS.set_function(signer_pool.pending_count)
+    for lane in signer_pool.lanes:
+        print(f"Oracle signer {lane.account.address} started (next nonce: {lane.next_nonce()}).")
+
+    whitelist_follower = WhitelistFollower()
+    default_token = add_token(contract_address) if contract_address else None
+    for entry in in_flight:
+        # Repeats of these updates join the recovered transaction instead of sending another.
+        intent = entry.get('intent') or {}
+        token = find_token(intent['token']) if intent.get('token') else default_token
+        if token is not None:
+            token.whitelist_cache.mark_sent(intent.get('addresses', []), intent.get('statuses', []), restored[entry['record_id']])
+    whitelist_follower.start(w3, poll_interval=config.ORACLE_RECEIPT_POLL_INTERVAL)
+
+    metrics.QUEUE_DEPTH.set_function(lambda: sum(token.batcher.queue_depth() for token in list(tokens.values())))
+    print(f"Oracle batching KYC updates (window: {config.ORACLE_BATCH_WINDOW_MS}ms, max size: {config.ORACLE_BATCH_MAX_SIZE}).")
+
+    if config.KYC_SOURCE == 'ledger':
+        did_resolver = BlockingDIDResolver()
+        print(f"Oracle resolving DIDs and KYC credentials on {config.XRPL_NETWORK_URL}.")
+    elif verifier is not None or config.KYC_VERIFY_CREDENTIALS:
+        credential_verifier = verifier or CredentialVerifier()
+        if not credential_verifier.trusted:
+            print("WARNING: no trusted KYC credential issuers (KYC_TRUSTED_ISSUERS); every investor will be NOT APPROVED.")
+        print(f"Oracle verifying KYC credentials from {', '.join(sorted(credential_verifier.trusted)) or 'no issuer'} "
+              f"({credential_verifier.workers} worker process(es)).")
+
+    if store is not None:
+        kyc_store = store
+        print(f"Oracle using the provided KYC store ({kyc_store.count()} investor(s)).")
+        return
+
+    # Open the simulated XRPL DID KYC datastore
+    kyc_store = open_kyc_store(config.KYC_STORE_URL)
+    if kyc_store.count() == 0 and os.path.exists(KYC_DATA_FILE):
+        imported = import_json(kyc_store, KYC_DATA_FILE)
+        print(f"Imported {imported} investor(s) from {KYC_DATA_FILE} into the KYC store.")
+    if kyc_store.count() == 0:
+        print(f"WARNING: KYC store {config.KYC_STORE_URL} is empty. Please run xrpl_did_kyc_setup.py first.")
     else:
-        print(f"WARNING: {KYC_DATA_FILE} not found. Please run xrpl_did_kyc_setup.py first.")
+        print(f"Oracle using KYC store {config.KYC_STORE_URL} ({kyc_store.count()} investor(s)).")
+
+
+def resolve_kyc_statuses(requests):
+    # requests: [(xrpl_did, investor_evm_address)] -> [kyc status, or None for an unknown DID].
+    if did_resolver is not None:
+        resolutions = [did_resolver.resolve(xrpl_did) for xrpl_did, _ in requests]
+        kyc_statuses = [resolution.kyc_approved if resolution is not None else None for resolution in resolutions]
+    elif credential_verifier is not None:
+        # Only a valid credential from a trusted issuer counts; a whole batch is verified at once.
+        # Records from ledger_kyc_sync.py already reflect on-ledger credentials.
+        investors = [kyc_store.get_investor(xrpl_did) for xrpl_did, _ in requests]
+        with span('credential_verify'):
+            checks = credential_verifier.verify_many([
+                (investor.get('kyc_credential') if investor else None, xrpl_did)
+                for investor, (xrpl_did, _) in zip(investors, requests)
+            ])
+        kyc_statuses = [check.kyc_approved if investor else None for investor, check in zip(investors, checks)]
+        kyc_statuses = [record_kyc_approved(investor) if investor and credential_verifier.trusts_ledger_record(investor) else kyc_status
+                        for investor, kyc_status in zip(investors, kyc_statuses)]
+    else:
+        kyc_statuses = [kyc_store.get_kyc_status(xrpl_did) for xrpl_did, _ in requests]
+
+    for (xrpl_did, investor_evm_address), kyc_status in zip(requests, kyc_statuses):
+        if kyc_status is not None:
+            kyc_store.link_evm_address(xrpl_did, investor_evm_address)
+    return kyc_statuses
+
+
+def lookup_kyc_statuses(requests):
+    # As resolve_kyc_statuses, but unknown DIDs are not approved.
+    return [bool(kyc_status) for kyc_status in resolve_kyc_statuses(requests)]
+
+
+def lookup_kyc_status(xrpl_did, investor_evm_address):
+    return lookup_kyc_statuses([(xrpl_did, investor_evm_address)])[0]
+
+
+def submit_kyc_batch(token, investor_evm_addresses, kyc_statuses):
+    # One batchUpdateKYCStatus transaction on `token` for a whole micro-batch of attestations.
+    metrics.BATCH_SIZE.observe(len(investor_evm_addresses))
+    with metrics.trace('kyc_batch', batch_size=len(investor_evm_addresses)):
+        record = signer_pool.submit(
+            token.contract.functions.batchUpdateKYCStatus(investor_evm_addresses, kyc_statuses),
+            meta={"batch_size": len(investor_evm_addresses), "token": token.address},
+            intent={"token": token.address, "addresses": investor_evm_addresses, "statuses": kyc_statuses},
+        )
+        annotate(tx_hash=record['tx_hash'], nonce=record['nonce'], signer=record['meta']['signer'])
+    token.whitelist_cache.mark_sent(investor_evm_addresses, kyc_statuses, record)
+    print(f"  -> Sent KYC batch of {len(investor_evm_addresses)} update(s) (nonce {record['nonce']}). Tx Hash: {record['tx_hash']}")
+    return record
+
+
+def existing_update(token, investor_evm_address, kyc_status):
+    # Returns (state, record) for an update on `token` that needs no new transaction:
+    # ('unchanged', None) when the contract already has this status, or
+    # ('in_flight', record) when an unconfirmed transaction already carries it.
+    # (None, None) means the update must be sent.
+    whitelist_cache = token.whitelist_cache
+    entry = whitelist_cache.expected(investor_evm_address)
+    if entry is not None:
+        return ('in_flight', entry[1]) if entry[0] == kyc_status else (None, None)
+    current = whitelist_cache.current(investor_evm_address)
+    whitelist_cache.record_lookup(current is not None)
+    if current is None:
+        whitelist_cache.load(token.batch_reader, [investor_evm_address])
+        current = whitelist_cache.current(investor_evm_address)
+    return ('unchanged', None) if current == kyc_status else (None, None)
+
+
+def record_attestation(token, xrpl_did, investor_evm_address, kyc_status, tx_record):
+    attestation_id = uuid.uuid4().hex
+    attestations[attestation_id] = {
+        "token_address": token.address,
+        "xrpl_did": xrpl_did,
+        "investor_evm_address": investor_evm_address,
+        "kyc_status": kyc_status,
+        "tx_record_id": tx_record['id'] if tx_record else None,
+    }
+    if journal is not None:
+        # Not waited for: the transaction itself is already durable, and a lost entry only
+        # means this id is unknown after a restart (the client's retry is then "in_flight").
+        journal.append(journal.attestation_entry(attestation_id, attestations[attestation_id]))
+    return attestation_id
+
+
+def contract_error_response(e):
+    metrics.ATTESTATIONS.inc(outcome='error')
+    annotate(outcome='error', error=str(e))
+    if isinstance(e, ContractCustomError):
+        print(f"Contract Custom Error sending KYC status to EVM contract: {e}")
+        return jsonify({"success": False, "error": f"Contract Custom Error: {str(e)}"}), 500
+    if isinstance(e, ContractLogicError):
+        print(f"Contract Logic Error sending KYC status to EVM contract: {e}")
+        return jsonify({"success": False, "error": f"Contract Logic Error: {str(e)}"}), 500
+    print(f"Error sending KYC status to EVM contract: {e}")
+    return jsonify({"success": False, "error": f"Failed to send KYC status to EVM: {str(e)}"}), 500
+
+
+def parse_attestation_request(data):
+    # Returns (xrpl_did, checksummed EVM address, error message).
+    xrpl_did = data.get('xrplDID')
+    investor_evm_address = data.get('investorEVMAddress')
+    if not all([xrpl_did, investor_evm_address]):
+        return None, None, "Missing required fields (xrplDID, investorEVMAddress)"
+    if not Web3.is_address(investor_evm_address):
+        return None, None, f"Invalid EVM address: {investor_evm_address}"
+    return xrpl_did, Web3.to_checksum_address(investor_evm_address), None
+
+
+@app.before_request
+def start_request_trace():
+    g.trace = metrics.start_trace('request', endpoint=request.endpoint)
+
+
+@app.teardown_request
+def finish_request_trace(_exception=None):
+    active, token = g.pop('trace', (None, None))
+    if active is not None:
+        metrics.REQUEST_SECONDS.observe(metrics.finish_trace(active, token), endpoint=request.endpoint)
+
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
 
 
 @app.route('/attest-kyc', methods=['POST'])
@@ -80,62 +369,266 @@ def attest_kyc():
         return jsonify({"success": False, "error": "Request must be JSON"}), 400
 
     data = request.get_json()
-    xrpl_did = data.get('xrplDID')
-    investor_evm_address = data.get('investorEVMAddress')
-
-    if not all([xrpl_did, investor_evm_address]):
-        return jsonify({"success": False, "error": "Missing required fields (xrplDID, investorEVMAddress)"}), 400
+    xrpl_did, investor_evm_address, error = parse_attestation_request(data)
+    if error:
+        return jsonify({"success": False, "error": error}), 400
+    token, error, status_code = resolve_token(data)
+    if error:
+        return jsonify({"success": False, "error": error}), status_code
 
-    print(f"\nOracle received KYC attestation request for DID: {xrpl_did}, EVM Address: {investor_evm_address}")
+    print(f"\nOracle received KYC attestation request for DID: {xrpl_did}, EVM Address: {investor_evm_address}, token: {token.address}")
 
     # --- SIMULATED XRPL DID KYC RESOLUTION ---
     # In a real setup, this would involve complex XRPL DID resolution and VC verification.
-    kyc_status = simulated_kyc_lookup.get(xrpl_did, False) # Default to False if DID not found
+    with span('did_lookup'):
+        kyc_status = lookup_kyc_status(xrpl_did, investor_evm_address)
 
     print(f"  -> KYC Status for {xrpl_did}: {'APPROVED' if kyc_status else 'NOT APPROVED'}")
 
     # --- SIMULATED AXELAR GMP (Sending KYC status back to EVM) ---
+    # The update joins the current micro-batch, which is flushed as one transaction when
+    # the batch window closes or the batch is full. The transaction is confirmed in the
+    # background; callers poll /attest-kyc/<attestation_id> for the final outcome.
     try:
-        print(f"  -> Sending KYC status '{kyc_status}' to GCBToken contract for EVM address: {investor_evm_address}")
-
-        nonce = w3.eth.get_transaction_count(oracle_account.address)
-        
-        # Call the updateKYCStatus function on the smart contract
-        transaction = gcb_token_contract.functions.updateKYCStatus(
-            investor_evm_address,
-            kyc_status
-        ).build_transaction({
-            'chainId': w3.eth.chain_id,
-            'gasPrice': w3.eth.gas_price,
-            'from': oracle_account.address,
-            'nonce': nonce,
-        })
-
-        signed_txn = w3.eth.account.sign_transaction(transaction, private_key=deployer_private_key)
-        tx_hash = w3.eth.send_raw_transaction(signed_txn.rawTransaction)
-        
-        # Wait for the transaction receipt
-        tx_receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
-        
-        if tx_receipt.status == 1:
-            print(f"  -> KYC status updated on GCBToken contract. Tx Hash: {tx_hash.hex()}")
-            return jsonify({"success": True, "message": "KYC status updated on EVM.", "tx_hash": tx_hash.hex()}), 200
+        with span('whitelist_check'):
+            state, record = existing_update(token, investor_evm_address, kyc_status)
+        outcome = state or 'sent'
+        metrics.ATTESTATIONS.inc(outcome=outcome)
+        annotate(xrpl_did=xrpl_did, address=investor_evm_address, kyc_status=kyc_status, outcome=outcome)
+        if state == 'unchanged':
+            print(f"  -> KYC status '{kyc_status}' already set on GCBToken for {investor_evm_address}; no transaction needed")
+            return jsonify({
+                "success": True,
+                "message": "KYC status already up to date on EVM; no transaction sent.",
+                "attestation_id": record_attestation(token, xrpl_did, investor_evm_address, kyc_status, None),
+                "token_address": token.address,
+                "kyc_status": kyc_status,
+                "status": "unchanged",
+                "tx_hash": None,
+            }), 200
+        if record is None:
+            print(f"  -> Queueing KYC status '{kyc_status}' for GCBToken contract, EVM address: {investor_evm_address}")
+            with span('batch_wait'):
+                record = token.batcher.add(investor_evm_address, kyc_status).result()
         else:
-            print(f"  -> EVM transaction failed for KYC status update. Tx Hash: {tx_hash.hex()}")
-            return jsonify({"success": False, "error": "EVM transaction failed for KYC update."}), 500
+            print(f"  -> KYC status '{kyc_status}' for {investor_evm_address} already in flight in {record['tx_hash']}")
+        attestation_id = record_attestation(token, xrpl_did, investor_evm_address, kyc_status, record)
+        annotate(tx_hash=record['tx_hash'])
+
+        return jsonify({
+            "success": True,
+            "message": "KYC status update sent to EVM.",
+            "attestation_id": attestation_id,
+            "token_address": token.address,
+            "kyc_status": kyc_status,
+            "status": record['status'],
+            "tx_hash": record['tx_hash'],
+        }), 200
 
-    except ContractCustomError as e:
-        print(f"Contract Custom Error sending KYC status to EVM contract: {e}")
-        return jsonify({"success": False, "error": f"Contract Custom Error: {str(e)}"}), 500
-    except ContractLogicError as e:
-        print(f"Contract Logic Error sending KYC status to EVM contract: {e}")
-        return jsonify({"success": False, "error": f"Contract Logic Error: {str(e)}"}), 500
     except Exception as e:
-        print(f"Error sending KYC status to EVM contract: {e}")
-        return jsonify({"success": False, "error": f"Failed to send KYC status to EVM: {str(e)}"}), 500
+        return contract_error_response(e)
+
+
+@app.route('/attest-kyc/batch', methods=['POST'])
+def attest_kyc_batch():
+    if not request.is_json:
+        return jsonify({"success": False, "error": "Request must be JSON"}), 400
+
+    data = request.get_json()
+    requested = data.get('attestations')
+    if not isinstance(requested, list) or not requested:
+        return jsonify({"success": False, "error": "Missing required field (attestations: non-empty list)"}), 400
+
+    print(f"\nOracle received batch KYC attestation request for {len(requested)} investor(s)")
+
+    results = []
+    accepted = []  # (index into results, token, xrpl_did, address, status)
+    for item in requested:
+        item = item if isinstance(item, dict) else {}
+        xrpl_did, investor_evm_address, error = parse_attestation_request(item)
+        if not error:
+            # Items may name their own token; otherwise the request's token (or the default) applies.
+            token, error, _ = resolve_token(item if 'tokenAddress' in item or 'propertyId' in item else data)
+        if error:
+            results.append({"success": False, "error": error})
+            continue
+        accepted.append((len(results), token, xrpl_did, investor_evm_address))
+        results.append(None)
+    with span('did_lookup'):
+        kyc_statuses = lookup_kyc_statuses([(xrpl_did, address) for _, _, xrpl_did, address in accepted])
+    accepted = [entry + (kyc_status,) for entry, kyc_status in zip(accepted, kyc_statuses)]
+
+    try:
+        with span('whitelist_check'):
+            by_token = {}
+            for _, token, _, address, _ in accepted:
+                by_token.setdefault(token, []).append(address)
+            for token, addresses in by_token.items():
+                # One batched read per token for every address its cache has not seen yet.
+                token.whitelist_cache.load(token.batch_reader, addresses)
+            planned = []  # (state, record) per accepted entry; record is filled in below for new updates
+            to_send = {}  # token -> {address: status}, deduplicated within the request
+            for _, token, _, investor_evm_address, kyc_status in accepted:
+                state, record = existing_update(token, investor_evm_address, kyc_status)
+                if state is None:
+                    to_send.setdefault(token, {})[investor_evm_address] = kyc_status
+                planned.append((state, record))
+                metrics.ATTESTATIONS.inc(outcome=state or 'sent')
+        records = []
+        sent_in = {}  # (token address, address) -> record
+        for token, updates in to_send.items():
+            token_records = token.batcher.submit_now(list(updates.items()))
+            for position, address in enumerate(updates):
+                sent_in[(token.address, address)] = token_records[position // token.batcher.max_size]
+            records += token_records
+        annotate(attestations=len(requested), transactions=len(records))
+    except Exception as e:
+        return contract_error_response(e)
+
+    for (index, token, xrpl_did, investor_evm_address, kyc_status), (state, record) in zip(accepted, planned):
+        record = record or sent_in.get((token.address, investor_evm_address))
+        results[index] = {
+            "success": True,
+            "attestation_id": record_attestation(token, xrpl_did, investor_evm_address, kyc_status, record),
+            "token_address": token.address,
+            "xrplDID": xrpl_did,
+            "investorEVMAddress": investor_evm_address,
+            "kyc_status": kyc_status,
+            "status": record['status'] if record else "unchanged",
+            "tx_hash": record['tx_hash'] if record else None,
+        }
+
+    return jsonify({
+        "success": all(result["success"] for result in results),
+        "transactions": [record['tx_hash'] for record in records],
+        "results": results,
+    }), 200
+
+
+@app.route('/kyc-attestation', methods=['POST'])
+def kyc_attestation():
+    # Returns a signed attestation instead of sending a transaction; the investor submits
+    # it with GCBToken.registerWithAttestation or transferWithAttestation.
+    if not request.is_json:
+        return jsonify({"success": False, "error": "Request must be JSON"}), 400
+
+    data = request.get_json()
+    xrpl_did, investor_evm_address, error = parse_attestation_request(data)
+    if error:
+        return jsonify({"success": False, "error": error}), 400
+    token, error, status_code = resolve_token(data)
+    if error:
+        return jsonify({"success": False, "error": error}), status_code
+
+    print(f"\nOracle received signed KYC attestation request for DID: {xrpl_did}, EVM Address: {investor_evm_address}, token: {token.address}")
+    try:
+        with span('did_lookup'):
+            kyc_status = resolve_kyc_statuses([(xrpl_did, investor_evm_address)])[0]
+        if kyc_status is None:
+            # Signing "not approved" for any DID would let anyone de-whitelist any address.
+            return jsonify({"success": False, "error": f"Unknown DID: {xrpl_did}"}), 404
+        with span('attestation_sign'):
+            attestation = attestation_signer.sign(token.address, investor_evm_address, kyc_status)
+    except Exception as e:
+        return contract_error_response(e)
+    metrics.ATTESTATIONS.inc(outcome='signed')
+    annotate(xrpl_did=xrpl_did, address=investor_evm_address, kyc_status=kyc_status, outcome='signed')
+    print(f"  -> Signed KYC status '{kyc_status}' for {investor_evm_address} (expires {attestation['expiry']})")
+    return jsonify({"success": True, "attestation": attestation}), 200
+
+
+@app.route('/kyc-attestation/batch', methods=['POST'])
+def kyc_attestation_batch():
+    if not request.is_json:
+        return jsonify({"success": False, "error": "Request must be JSON"}), 400
+
+    data = request.get_json()
+    requested = data.get('attestations')
+    if not isinstance(requested, list) or not requested:
+        return jsonify({"success": False, "error": "Missing required field (attestations: non-empty list)"}), 400
+
+    print(f"\nOracle received batch signed KYC attestation request for {len(requested)} investor(s)")
+
+    results = []
+    accepted = []  # (index into results, token, xrpl_did, address)
+    for item in requested:
+        item = item if isinstance(item, dict) else {}
+        xrpl_did, investor_evm_address, error = parse_attestation_request(item)
+        if not error:
+            token, error, _ = resolve_token(item if 'tokenAddress' in item or 'propertyId' in item else data)
+        if error:
+            results.append({"success": False, "error": error})
+            continue
+        accepted.append((len(results), token, xrpl_did, investor_evm_address))
+        results.append(None)
+    try:
+        with span('did_lookup'):
+            kyc_statuses = resolve_kyc_statuses([(xrpl_did, address) for _, _, xrpl_did, address in accepted])
+
+        by_token = {}  # token -> [(index, address, status)]
+        for (index, token, xrpl_did, address), kyc_status in zip(accepted, kyc_statuses):
+            if kyc_status is None:
+                results[index] = {"success": False, "error": f"Unknown DID: {xrpl_did}"}
+                continue
+            by_token.setdefault(token, []).append((index, address, kyc_status))
+        signed_count = 0
+        with span('attestation_sign'):
+            for token, entries in by_token.items():
+                signed = attestation_signer.sign_many(token.address, [(address, kyc_status) for _, address, kyc_status in entries])
+                for (index, _, _), attestation in zip(entries, signed):
+                    results[index] = {"success": True, "attestation": attestation}
+                signed_count += len(signed)
+    except Exception as e:
+        return contract_error_response(e)
+    metrics.ATTESTATIONS.inc(signed_count, outcome='signed')
+    annotate(attestations=len(requested), signed=signed_count)
+
+    return jsonify({
+        "success": all(result["success"] for result in results),
+        "results": results,
+    }), 200
+
+
+@app.route('/attest-kyc/<attestation_id>', methods=['GET'])
+def attestation_status(attestation_id):
+    attestation = attestations.get(attestation_id)
+    if attestation and attestation['tx_record_id'] is None:
+        # The contract already had this status, so no transaction was needed.
+        return jsonify({"success": True, "attestation": dict(attestation, transaction=None)}), 200
+    record = signer_pool.status(attestation['tx_record_id']) if attestation and signer_pool else None
+    if record is None:
+        return jsonify({"success": False, "error": "Unknown attestation id"}), 404
+    return jsonify({"success": record['status'] != 'reverted', "attestation": dict(attestation, transaction=record)}), 200
+
+
+def shutdown_oracle(drain_timeout=0):
+    # Flush queued attestations and wait (up to drain_timeout) for their transactions.
+    for token in list(tokens.values()):
+        token.batcher.stop()
+    if signer_pool is not None:
+        signer_pool.stop(drain_timeout=drain_timeout)
+    if whitelist_follower is not None:
+        whitelist_follower.stop()
+    if journal is not None:
+        journal.close()
+    if did_resolver is not None:
+        did_resolver.close()
+    if credential_verifier is not None:
+        credential_verifier.close()
+    if attestation_signer is not None:
+        attestation_signer.close()
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Run the GCB KYC oracle.")
+    parser.add_argument("--port", type=int, default=config.ORACLE_PORT)
+    args = parser.parse_args(argv)
 
-if __name__ == '__main__':
     init_oracle()
-    print(f"GCB KYC Oracle running on http://localhost:{config.ORACLE_PORT}")
+    print(f"GCB KYC Oracle running on http://localhost:{args.port}")
     print("Waiting for /attest-kyc POST requests...")
-    app.run(port=config.ORACLE_PORT, debug=False) # Set debug=True for development to auto-reload
+    app.run(port=args.port, debug=False, threaded=True) # Set debug=True for development to auto-reload
+
+
+if __name__ == '__main__':
+    main()
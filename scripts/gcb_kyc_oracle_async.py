@@ -0,0 +1,630 @@
+# scripts/gcb_kyc_oracle_async.py
+import argparse
+import asyncio
+import os
+import sys
+import uuid
+from functools import partial
+
+import aiohttp
+from aiohttp import web
+from web3 import AsyncWeb3, AsyncHTTPProvider, Web3
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import config
+from attestation_journal import FINAL_STATUSES, AttestationJournal, reconcile_journal_async, replay_journal
+from contract_artifacts import load_artifact
+from did_resolver import DIDResolver
+from kyc_attestations import AttestationSigner
+from kyc_batcher import AsyncKYCBatcher
+from kyc_credentials import CredentialVerifier
+from kyc_store import import_json, open_kyc_store, record_kyc_approved
+import oracle_metrics as metrics
+from oracle_metrics import annotate, span
+from signer_pool import AsyncSignerPool, create_signer_pool
+from token_registry import TokenRegistry
+from whitelist_cache import WhitelistCache, WhitelistFollower
+from gcb_kyc_oracle import KYC_DATA_FILE, parse_attestation_request
+
+# asyncio serving mode for the KYC oracle, with the same HTTP contract as
+# gcb_kyc_oracle.py (POST /attest-kyc, POST /attest-kyc/batch, GET /attest-kyc/<id>).
+# Requests never hold a thread: they await their micro-batch, and the transaction is
+# confirmed in the background. All RPC traffic goes through one AsyncWeb3 provider with
+# a cached keep-alive aiohttp session. Once ORACLE_MAX_IN_FLIGHT attestations are
+# waiting, new ones get 429, and shutdown drains pending transactions before exiting.
+# Like the threaded oracle it attests for any number of GCBTokens (tokenAddress or
+# propertyId in the request, resolved through the token registry).
+
+def json_response(body, status=200, headers=None):
+    return web.json_response(body, status=status, headers=headers)
+
+
+def contract_error_response(e):
+    metrics.ATTESTATIONS.inc(outcome='error')
+    annotate(outcome='error', error=str(e))
+    print(f"Error sending KYC status to EVM contract: {e}")
+    return json_response({"success": False, "error": f"Failed to send KYC status to EVM: {str(e)}"}, status=500)
+
+
+class OracleToken:
+    # One GCBToken the oracle attests for, with its own whitelist cache and micro-batcher
+    # (see gcb_kyc_oracle.OracleToken).
+
+    def __init__(self, contract, submit_batch, from_block, property_id=None):
+        self.contract = contract
+        self.address = contract.address
+        self.property_id = property_id
+        self.whitelist_cache = WhitelistCache(self.address, from_block=from_block)
+        self.batcher = AsyncKYCBatcher(
+            partial(submit_batch, self),
+            window=config.ORACLE_BATCH_WINDOW_MS / 1000.0,
+            max_size=config.ORACLE_BATCH_MAX_SIZE,
+        )
+
+
+class Oracle:
+    def __init__(self, w3, signer_pool, kyc_store, max_in_flight, token_registry=None, did_resolver=None,
+                 credential_verifier=None, attestation_signer=None):
+        self.w3 = w3
+        self.signer_pool = signer_pool
+        self.kyc_store = kyc_store
+        self.did_resolver = did_resolver  # Set when KYC_SOURCE is 'ledger'
+        self.credential_verifier = credential_verifier  # Set when KYC_VERIFY_CREDENTIALS is on
+        self.attestation_signer = attestation_signer  # Signs EIP-712 attestations for /kyc-attestation
+        self.token_registry = token_registry
+        self.token_abi = load_artifact('GCBToken')['abi']
+        self.tokens = {}  # token address -> OracleToken
+        self.default_token = None  # For requests that name no token
+        self.whitelist_follower = WhitelistFollower()
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self.draining = False
+        self.attestations = {}
+
+    # --- Tokens ---
+
+    async def add_token(self, address, property_id=None):
+        address = Web3.to_checksum_address(address)
+        if address not in self.tokens:
+            from_block = await self.w3.eth.block_number
+            if address not in self.tokens:  # Another request may have added it meanwhile
+                contract = self.w3.eth.contract(address=address, abi=self.token_abi)
+                self.tokens[address] = OracleToken(contract, self.submit_kyc_batch, from_block, property_id)
+                self.whitelist_follower.add(self.tokens[address].whitelist_cache)
+                print(f"Oracle attesting for GCBToken {address}" + (f" (property {property_id})" if property_id else ""))
+        if property_id is not None:
+            self.tokens[address].property_id = property_id
+        return self.tokens[address]
+
+    async def find_token(self, token_address=None, property_id=None):
+        # Same lookup as gcb_kyc_oracle.find_token.
+        if token_address is not None:
+            token = self.tokens.get(Web3.to_checksum_address(token_address))
+        else:
+            token = next((token for token in self.tokens.values() if token.property_id == property_id), None)
+        if token is not None or self.token_registry is None:
+            return token
+        registry = self.token_registry
+        registry.reload_if_changed()
+        entry = registry.find(token_address) if token_address is not None else registry.get(property_id)
+        return await self.add_token(entry['address'], entry['property_id']) if entry is not None else None
+
+    async def resolve_token(self, data):
+        # Returns (OracleToken, error message, HTTP status), as gcb_kyc_oracle.resolve_token.
+        token_address = data.get('tokenAddress')
+        property_id = data.get('propertyId')
+        if token_address is None and property_id is None:
+            if self.default_token is None:
+                return None, "Missing required field (tokenAddress or propertyId)", 400
+            return self.default_token, None, None
+        if token_address is not None and not Web3.is_address(token_address):
+            return None, f"Invalid token address: {token_address}", 400
+        token = await self.find_token(token_address, property_id)
+        if token is None:
+            return None, f"Unknown token: {token_address or property_id}", 404
+        return token, None, None
+
+    def queue_depth(self):
+        return sum(token.batcher.queue_depth() for token in self.tokens.values())
+
+    # --- Attestations ---
+
+    async def resolve_kyc_statuses(self, requests):
+        # requests: [(xrpl_did, investor_evm_address)] -> [kyc status, or None for an unknown DID].
+        if self.did_resolver is not None:
+            # Ledger lookups run concurrently (and share the resolver's cache).
+            resolutions = await asyncio.gather(*(self.did_resolver.resolve(xrpl_did) for xrpl_did, _ in requests))
+            kyc_statuses = [resolution.kyc_approved if resolution is not None else None for resolution in resolutions]
+        elif self.credential_verifier is not None:
+            investors = [self.kyc_store.get_investor(xrpl_did) for xrpl_did, _ in requests]
+            with span('credential_verify'):
+                checks = await self.credential_verifier.verify_many_async([
+                    (investor.get('kyc_credential') if investor else None, xrpl_did)
+                    for investor, (xrpl_did, _) in zip(investors, requests)
+                ])
+            kyc_statuses = [check.kyc_approved if investor else None for investor, check in zip(investors, checks)]
+            # Records from ledger_kyc_sync.py already reflect on-ledger credentials.
+            kyc_statuses = [record_kyc_approved(investor) if investor and self.credential_verifier.trusts_ledger_record(investor)
+                            else kyc_status
+                            for investor, kyc_status in zip(investors, kyc_statuses)]
+        else:
+            kyc_statuses = [self.kyc_store.get_kyc_status(xrpl_did) for xrpl_did, _ in requests]
+
+        for (xrpl_did, investor_evm_address), kyc_status in zip(requests, kyc_statuses):
+            if kyc_status is not None:
+                self.kyc_store.link_evm_address(xrpl_did, investor_evm_address)
+        return kyc_statuses
+
+    async def lookup_kyc_statuses(self, requests):
+        # As resolve_kyc_statuses, but unknown DIDs are not approved.
+        return [bool(kyc_status) for kyc_status in await self.resolve_kyc_statuses(requests)]
+
+    async def lookup_kyc_status(self, xrpl_did, investor_evm_address):
+        return (await self.lookup_kyc_statuses([(xrpl_did, investor_evm_address)]))[0]
+
+    async def submit_kyc_batch(self, token, investor_evm_addresses, kyc_statuses):
+        metrics.BATCH_SIZE.observe(len(investor_evm_addresses))
+        with metrics.trace('kyc_batch', batch_size=len(investor_evm_addresses)):
+            record = await self.signer_pool.submit(
+                token.contract.functions.batchUpdateKYCStatus(investor_evm_addresses, kyc_statuses),
+                meta={"batch_size": len(investor_evm_addresses), "token": token.address},
+                intent={"token": token.address, "addresses": investor_evm_addresses, "statuses": kyc_statuses},
+            )
+            annotate(tx_hash=record['tx_hash'], nonce=record['nonce'], signer=record['meta']['signer'])
+        token.whitelist_cache.mark_sent(investor_evm_addresses, kyc_statuses, record)
+        print(f"  -> Sent KYC batch of {len(investor_evm_addresses)} update(s) (nonce {record['nonce']}). Tx Hash: {record['tx_hash']}")
+        return record
+
+    async def existing_update(self, token, investor_evm_address, kyc_status):
+        # Same rules as gcb_kyc_oracle.existing_update.
+        whitelist_cache = token.whitelist_cache
+        entry = whitelist_cache.expected(investor_evm_address)
+        if entry is not None:
+            return ('in_flight', entry[1]) if entry[0] == kyc_status else (None, None)
+        current = whitelist_cache.current(investor_evm_address)
+        whitelist_cache.record_lookup(current is not None)
+        if current is None:
+            await whitelist_cache.load_async(token.contract, [investor_evm_address])
+            current = whitelist_cache.current(investor_evm_address)
+        return ('unchanged', None) if current == kyc_status else (None, None)
+
+    async def follow_whitelist(self):
+        while True:
+            try:
+                await self.whitelist_follower.refresh_async(self.w3)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"  [whitelist-cache] Error while reading KYCStatusUpdated events: {e}")
+            await asyncio.sleep(config.ORACLE_RECEIPT_POLL_INTERVAL)
+
+    def record_attestation(self, token, xrpl_did, investor_evm_address, kyc_status, tx_record):
+        attestation_id = uuid.uuid4().hex
+        self.attestations[attestation_id] = {
+            "token_address": token.address,
+            "xrpl_did": xrpl_did,
+            "investor_evm_address": investor_evm_address,
+            "kyc_status": kyc_status,
+            "tx_record_id": tx_record['id'] if tx_record else None,
+        }
+        journal = self.signer_pool.journal
+        if journal is not None:
+            journal.append(journal.attestation_entry(attestation_id, self.attestations[attestation_id]))
+        return attestation_id
+
+    def admit(self, count=1):
+        # Returns an error response when the oracle cannot take `count` more attestations.
+        if self.draining:
+            return json_response({"success": False, "error": "Oracle is shutting down"}, status=503)
+        if self.in_flight + count > self.max_in_flight:
+            metrics.ATTESTATIONS.inc(count, outcome='rejected')
+            retry_after = max(1, round(config.ORACLE_BATCH_WINDOW_MS / 1000.0))
+            return json_response(
+                {"success": False, "error": f"Oracle is busy ({self.in_flight} attestations in flight), retry later"},
+                status=429, headers={"Retry-After": str(retry_after)},
+            )
+        self.in_flight += count
+        return None
+
+
+ORACLE_KEY = web.AppKey("oracle", Oracle)
+
+
+async def read_json(request):
+    if request.content_type != 'application/json':
+        return None
+    try:
+        return await request.json()
+    except ValueError:
+        return None
+
+
+async def attest_kyc(request):
+    oracle = request.app[ORACLE_KEY]
+    data = await read_json(request)
+    if not isinstance(data, dict):
+        return json_response({"success": False, "error": "Request must be JSON"}, status=400)
+
+    xrpl_did, investor_evm_address, error = parse_attestation_request(data)
+    if error:
+        return json_response({"success": False, "error": error}, status=400)
+    token, error, status_code = await oracle.resolve_token(data)
+    if error:
+        return json_response({"success": False, "error": error}, status=status_code)
+
+    rejected = oracle.admit()
+    if rejected is not None:
+        return rejected
+    try:
+        with span('did_lookup'):
+            kyc_status = await oracle.lookup_kyc_status(xrpl_did, investor_evm_address)
+        with span('whitelist_check'):
+            state, record = await oracle.existing_update(token, investor_evm_address, kyc_status)
+        metrics.ATTESTATIONS.inc(outcome=state or 'sent')
+        annotate(xrpl_did=xrpl_did, address=investor_evm_address, kyc_status=kyc_status, outcome=state or 'sent')
+        if state is None:
+            with span('batch_wait'):
+                record = await token.batcher.add(investor_evm_address, kyc_status)
+    except Exception as e:
+        return contract_error_response(e)
+    finally:
+        oracle.in_flight -= 1
+
+    if state == 'unchanged':
+        return json_response({
+            "success": True,
+            "message": "KYC status already up to date on EVM; no transaction sent.",
+            "attestation_id": oracle.record_attestation(token, xrpl_did, investor_evm_address, kyc_status, None),
+            "token_address": token.address,
+            "kyc_status": kyc_status,
+            "status": "unchanged",
+            "tx_hash": None,
+        })
+    return json_response({
+        "success": True,
+        "message": "KYC status update sent to EVM.",
+        "attestation_id": oracle.record_attestation(token, xrpl_did, investor_evm_address, kyc_status, record),
+        "token_address": token.address,
+        "kyc_status": kyc_status,
+        "status": record['status'],
+        "tx_hash": record['tx_hash'],
+    })
+
+
+async def attest_kyc_batch(request):
+    oracle = request.app[ORACLE_KEY]
+    data = await read_json(request)
+    if not isinstance(data, dict):
+        return json_response({"success": False, "error": "Request must be JSON"}, status=400)
+
+    requested = data.get('attestations')
+    if not isinstance(requested, list) or not requested:
+        return json_response({"success": False, "error": "Missing required field (attestations: non-empty list)"}, status=400)
+
+    rejected = oracle.admit(len(requested))
+    if rejected is not None:
+        return rejected
+    try:
+        results = []
+        accepted = []  # (index into results, token, xrpl_did, address, status)
+        for item in requested:
+            item = item if isinstance(item, dict) else {}
+            xrpl_did, investor_evm_address, error = parse_attestation_request(item)
+            if not error:
+                token, error, _ = await oracle.resolve_token(item if 'tokenAddress' in item or 'propertyId' in item else data)
+            if error:
+                results.append({"success": False, "error": error})
+                continue
+            accepted.append((len(results), token, xrpl_did, investor_evm_address))
+            results.append(None)
+        with span('did_lookup'):
+            kyc_statuses = await oracle.lookup_kyc_statuses([(xrpl_did, address) for _, _, xrpl_did, address in accepted])
+        accepted = [entry + (kyc_status,) for entry, kyc_status in zip(accepted, kyc_statuses)]
+        with span('whitelist_check'):
+            by_token = {}
+            for _, token, _, address, _ in accepted:
+                by_token.setdefault(token, []).append(address)
+            await asyncio.gather(*(
+                token.whitelist_cache.load_async(token.contract, addresses) for token, addresses in by_token.items()
+            ))
+            planned = []
+            to_send = {}  # token -> {address: status}
+            for _, token, _, investor_evm_address, kyc_status in accepted:
+                state, record = await oracle.existing_update(token, investor_evm_address, kyc_status)
+                if state is None:
+                    to_send.setdefault(token, {})[investor_evm_address] = kyc_status
+                planned.append((state, record))
+                metrics.ATTESTATIONS.inc(outcome=state or 'sent')
+        records = []
+        sent_in = {}  # (token address, address) -> record
+        for token, updates in to_send.items():
+            token_records = await token.batcher.submit_now(list(updates.items()))
+            for position, address in enumerate(updates):
+                sent_in[(token.address, address)] = token_records[position // token.batcher.max_size]
+            records += token_records
+        annotate(attestations=len(requested), transactions=len(records))
+    except Exception as e:
+        return contract_error_response(e)
+    finally:
+        oracle.in_flight -= len(requested)
+
+    for (index, token, xrpl_did, investor_evm_address, kyc_status), (state, record) in zip(accepted, planned):
+        record = record or sent_in.get((token.address, investor_evm_address))
+        results[index] = {
+            "success": True,
+            "attestation_id": oracle.record_attestation(token, xrpl_did, investor_evm_address, kyc_status, record),
+            "token_address": token.address,
+            "xrplDID": xrpl_did,
+            "investorEVMAddress": investor_evm_address,
+            "kyc_status": kyc_status,
+            "status": record['status'] if record else "unchanged",
+            "tx_hash": record['tx_hash'] if record else None,
+        }
+
+    return json_response({
+        "success": all(result["success"] for result in results),
+        "transactions": [record['tx_hash'] for record in records],
+        "results": results,
+    })
+
+
+async def kyc_attestation(request):
+    # Signed attestation instead of a transaction, as gcb_kyc_oracle.kyc_attestation.
+    oracle = request.app[ORACLE_KEY]
+    data = await read_json(request)
+    if not isinstance(data, dict):
+        return json_response({"success": False, "error": "Request must be JSON"}, status=400)
+
+    xrpl_did, investor_evm_address, error = parse_attestation_request(data)
+    if error:
+        return json_response({"success": False, "error": error}, status=400)
+    token, error, status_code = await oracle.resolve_token(data)
+    if error:
+        return json_response({"success": False, "error": error}, status=status_code)
+
+    rejected = oracle.admit()
+    if rejected is not None:
+        return rejected
+    try:
+        with span('did_lookup'):
+            kyc_status = (await oracle.resolve_kyc_statuses([(xrpl_did, investor_evm_address)]))[0]
+        if kyc_status is None:
+            # Signing "not approved" for any DID would let anyone de-whitelist any address.
+            return json_response({"success": False, "error": f"Unknown DID: {xrpl_did}"}, status=404)
+        with span('attestation_sign'):
+            attestation = (await oracle.attestation_signer.sign_many_async(token.address, [(investor_evm_address, kyc_status)]))[0]
+    except Exception as e:
+        return contract_error_response(e)
+    finally:
+        oracle.in_flight -= 1
+    metrics.ATTESTATIONS.inc(outcome='signed')
+    annotate(xrpl_did=xrpl_did, address=investor_evm_address, kyc_status=kyc_status, outcome='signed')
+    return json_response({"success": True, "attestation": attestation})
+
+
+async def kyc_attestation_batch(request):
+    oracle = request.app[ORACLE_KEY]
+    data = await read_json(request)
+    if not isinstance(data, dict):
+        return json_response({"success": False, "error": "Request must be JSON"}, status=400)
+
+    requested = data.get('attestations')
+    if not isinstance(requested, list) or not requested:
+        return json_response({"success": False, "error": "Missing required field (attestations: non-empty list)"}, status=400)
+
+    rejected = oracle.admit(len(requested))
+    if rejected is not None:
+        return rejected
+    try:
+        results = []
+        accepted = []  # (index into results, token, xrpl_did, address)
+        for item in requested:
+            item = item if isinstance(item, dict) else {}
+            xrpl_did, investor_evm_address, error = parse_attestation_request(item)
+            if not error:
+                token, error, _ = await oracle.resolve_token(item if 'tokenAddress' in item or 'propertyId' in item else data)
+            if error:
+                results.append({"success": False, "error": error})
+                continue
+            accepted.append((len(results), token, xrpl_did, investor_evm_address))
+            results.append(None)
+        with span('did_lookup'):
+            kyc_statuses = await oracle.resolve_kyc_statuses([(xrpl_did, address) for _, _, xrpl_did, address in accepted])
+
+        by_token = {}  # token -> [(index, address, status)]
+        for (index, token, xrpl_did, address), kyc_status in zip(accepted, kyc_statuses):
+            if kyc_status is None:
+                results[index] = {"success": False, "error": f"Unknown DID: {xrpl_did}"}
+                continue
+            by_token.setdefault(token, []).append((index, address, kyc_status))
+        with span('attestation_sign'):
+            signed = await asyncio.gather(*(
+                oracle.attestation_signer.sign_many_async(token.address, [(address, kyc_status) for _, address, kyc_status in entries])
+                for token, entries in by_token.items()
+            ))
+        for entries, attestations in zip(by_token.values(), signed):
+            for (index, _, _), attestation in zip(entries, attestations):
+                results[index] = {"success": True, "attestation": attestation}
+    except Exception as e:
+        return contract_error_response(e)
+    finally:
+        oracle.in_flight -= len(requested)
+
+    signed_count = sum(len(attestations) for attestations in signed)
+    metrics.ATTESTATIONS.inc(signed_count, outcome='signed')
+    annotate(attestations=len(requested), signed=signed_count)
+
+    return json_response({
+        "success": all(result["success"] for result in results),
+        "results": results,
+    })
+
+
+async def attestation_status(request):
+    oracle = request.app[ORACLE_KEY]
+    attestation = oracle.attestations.get(request.match_info['attestation_id'])
+    if attestation and attestation['tx_record_id'] is None:
+        return json_response({"success": True, "attestation": dict(attestation, transaction=None)})
+    record = oracle.signer_pool.status(attestation['tx_record_id']) if attestation else None
+    if record is None:
+        return json_response({"success": False, "error": "Unknown attestation id"}, status=404)
+    return json_response({"success": record['status'] != 'reverted', "attestation": dict(attestation, transaction=record)})
+
+
+def oracle_context(rpc_url, signer_keys, contract_address, kyc_store_url, journal_path, registry_path):
+    async def context(app):
+        # One keep-alive connection pool to the EVM RPC for the whole process.
+        session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=config.ORACLE_RPC_POOL_SIZE, keepalive_timeout=60),
+            timeout=aiohttp.ClientTimeout(total=60),
+        )
+        provider = AsyncHTTPProvider(rpc_url)
+        await provider.cache_async_session(session)
+        w3 = AsyncWeb3(provider)
+        w3.middleware_onion.add(metrics.async_rpc_metrics_middleware, name='oracle_metrics')
+        if not await w3.is_connected():
+            await session.close()
+            raise RuntimeError(f"Oracle could not connect to EVM network at {rpc_url}")
+        chain_id = await w3.eth.chain_id
+        print(f"Oracle connected to EVM network (chain ID: {chain_id}).")
+
+        token_registry = TokenRegistry(registry_path, chain_id=chain_id)
+        default_address = contract_address
+        if not default_address and len(token_registry) == 1:
+            default_address = token_registry.tokens()[0]['address']
+        if not default_address and len(token_registry) == 0:
+            await session.close()
+            raise RuntimeError("ACCESS_CONTROL_CONTRACT_ADDRESS (GCBToken address) not set in .env and no tokens in "
+                               f"{token_registry.path}. Please run deploy_gcb_token.py or deploy_property_tokens.py first.")
+        print(f"Oracle serving {len(token_registry)} registered property token(s) from {token_registry.path}.")
+
+        # Settle what a previous run left in flight before sending anything new.
+        state = replay_journal(journal_path)
+        in_flight = []
+        if journal_path:
+            for signer_key in signer_keys:
+                in_flight += await reconcile_journal_async(w3, state, w3.eth.account.from_key(signer_key).address)
+        journal = AttestationJournal(journal_path, state) if journal_path else None
+        if state['transactions']:
+            print(f"Oracle replayed {len(state['transactions'])} journaled transaction(s) from {journal_path} "
+                  f"({len(in_flight)} still in flight).")
+        signer_pool = create_signer_pool(w3, journal=journal, private_keys=signer_keys, pool_class=AsyncSignerPool)
+        restored = {}
+        for entry in state['transactions'].values():
+            if entry['status'] in FINAL_STATUSES or entry in in_flight:
+                restored[entry['record_id']] = signer_pool.restore(entry)
+        await signer_pool.start()
+        print(f"Oracle signing with {len(signer_pool.lanes)} signer(s): {', '.join(signer_pool.addresses)}")
+
+        kyc_store = open_kyc_store(kyc_store_url)
+        if kyc_store.count() == 0 and os.path.exists(KYC_DATA_FILE):
+            imported = import_json(kyc_store, KYC_DATA_FILE)
+            print(f"Imported {imported} investor(s) from {KYC_DATA_FILE} into the KYC store.")
+        print(f"Oracle using KYC store {kyc_store_url} ({kyc_store.count()} investor(s)).")
+        did_resolver = credential_verifier = None
+        if config.KYC_SOURCE == 'ledger':
+            did_resolver = DIDResolver()
+            print(f"Oracle resolving DIDs and KYC credentials on {config.XRPL_NETWORK_URL}.")
+        elif config.KYC_VERIFY_CREDENTIALS:
+            credential_verifier = CredentialVerifier()
+            print(f"Oracle verifying KYC credentials from {', '.join(sorted(credential_verifier.trusted)) or 'no issuer'} "
+                  f"({credential_verifier.workers} worker process(es)).")
+
+        attestation_signer = AttestationSigner(signer_keys[0], chain_id)
+        print(f"Oracle signing EIP-712 KYC attestations as {attestation_signer.address} "
+              f"(valid {attestation_signer.ttl}s, {attestation_signer.workers} worker process(es)).")
+
+        oracle = Oracle(w3, signer_pool, kyc_store, config.ORACLE_MAX_IN_FLIGHT, token_registry, did_resolver,
+                        credential_verifier, attestation_signer)
+        if default_address:
+            oracle.default_token = await oracle.add_token(default_address)
+        for entry in in_flight:
+            intent = entry.get('intent') or {}
+            token = await oracle.find_token(intent['token']) if intent.get('token') else oracle.default_token
+            if token is not None:
+                token.whitelist_cache.mark_sent(intent.get('addresses', []), intent.get('statuses', []),
+                                                restored[entry['record_id']])
+        oracle.attestations.update(state['attestations'])
+        follower = asyncio.get_running_loop().create_task(oracle.follow_whitelist())
+        app[ORACLE_KEY] = oracle
+        metrics.QUEUE_DEPTH.set_function(oracle.queue_depth)
+        metrics.PENDING_TRANSACTIONS.set_function(signer_pool.pending_count)
+        metrics.IN_FLIGHT.set_function(lambda: oracle.in_flight)
+        yield
+
+        # Shutdown: flush the open batch and wait for receipts.
+        oracle.draining = True
+        await asyncio.gather(*(token.batcher.stop() for token in list(oracle.tokens.values())))
+        pending = signer_pool.pending_count()
+        if pending:
+            print(f"Draining {pending} pending transaction(s) (up to {config.ORACLE_DRAIN_TIMEOUT:.0f}s)...")
+        await signer_pool.stop(drain_timeout=config.ORACLE_DRAIN_TIMEOUT)
+        follower.cancel()
+        if journal is not None:
+            journal.close()
+        if did_resolver is not None:
+            await did_resolver.close()
+        if credential_verifier is not None:
+            credential_verifier.close()
+        attestation_signer.close()
+        kyc_store.close()
+        await session.close()
+    return context
+
+
+@web.middleware
+async def request_trace(request, handler):
+    resource = request.match_info.route.resource
+    endpoint = resource.canonical if resource is not None else "unmatched"  # Route pattern, not the raw path
+    active, token = metrics.start_trace('request', endpoint=endpoint)
+    try:
+        return await handler(request)
+    finally:
+        metrics.REQUEST_SECONDS.observe(metrics.finish_trace(active, token), endpoint=endpoint)
+
+
+async def prometheus_metrics(request):
+    return web.Response(body=metrics.render().encode(), headers={"Content-Type": metrics.CONTENT_TYPE})
+
+
+async def stop_admitting(app):
+    if ORACLE_KEY in app:
+        app[ORACLE_KEY].draining = True
+
+
+def create_app(rpc_url=None, private_key=None, contract_address=None, kyc_store_url=None, journal_path=None, signer_keys=None,
+               registry_path=None):
+    app = web.Application(middlewares=[request_trace])
+    app.on_shutdown.append(stop_admitting)
+    app.cleanup_ctx.append(oracle_context(
+        rpc_url or config.EVM_NETWORK_URL,
+        signer_keys or ([private_key] if private_key else config.ORACLE_SIGNER_KEYS),
+        contract_address or config.ACCESS_CONTROL_CONTRACT_ADDRESS,
+        kyc_store_url or config.KYC_STORE_URL,
+        config.ORACLE_JOURNAL_PATH if journal_path is None else journal_path,
+        registry_path or config.TOKEN_REGISTRY_PATH,
+    ))
+    app.router.add_post('/attest-kyc', attest_kyc)
+    app.router.add_post('/attest-kyc/batch', attest_kyc_batch)
+    app.router.add_get('/attest-kyc/{attestation_id}', attestation_status)
+    app.router.add_post('/kyc-attestation', kyc_attestation)
+    app.router.add_post('/kyc-attestation/batch', kyc_attestation_batch)
+    app.router.add_get('/metrics', prometheus_metrics)
+    return app
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Run the GCB KYC oracle on asyncio.")
+    parser.add_argument("--port", type=int, default=config.ORACLE_PORT)
+    args = parser.parse_args(argv)
+
+    print(f"GCB KYC Oracle (async) running on http://localhost:{args.port}")
+    print("Waiting for /attest-kyc POST requests...")
+    # run_app stops accepting connections on SIGINT/SIGTERM, lets running requests finish,
+    # then runs the cleanup context above to drain pending transactions.
+    web.run_app(create_app(), port=args.port, print=None, backlog=4096)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+# scripts/income_distribution.py
+import argparse
+import os
+import sys
+from web3 import Web3
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import config
+from batch_reads import BatchReader
+from contract_artifacts import load_artifact
+from receipt_tracker import ReceiptTracker
+
+# Helpers around GCBToken's pull-based income distribution: the owner funds a
+# distribution with distributeIncome (constant gas), and each holder claims their
+# share with claimIncome whenever they like. Receipts come from a ReceiptTracker
+# (`tracker`, or a temporary one), so many claims are confirmed by one head poll.
+
+
+def fund_distribution(w3, gcb_token_contract, owner_account, amount_wei, tracker=None):
+    nonce = w3.eth.get_transaction_count(owner_account.address, 'pending')
+    tx = gcb_token_contract.functions.distributeIncome(amount_wei).build_transaction({
+        'chainId': w3.eth.chain_id,
+        'gasPrice': w3.eth.gas_price,
+        'from': owner_account.address,
+        'nonce': nonce,
+        'value': amount_wei,
+    })
+    signed_tx = owner_account.sign_transaction(tx)
+    tx_hash = w3.eth.send_raw_transaction(signed_tx.rawTransaction)
+    return (tracker or ReceiptTracker(w3)).wait(tx_hash, sender=owner_account.address, nonce=nonce)
+
+
+def withdrawable_income_many(gcb_token_contract, addresses):
+    return BatchReader(gcb_token_contract.w3, gcb_token_contract).withdrawable_income_many(addresses)
+
+
+def claim_income_many(w3, gcb_token_contract, holder_accounts, tracker=None, timeout=120):
+    # Every holder signs with their own key, so all claims can be in flight at once:
+    # send them all first, then collect the receipts.
+    tracker = tracker or ReceiptTracker(w3)
+    chain_id = w3.eth.chain_id
+    gas_price = w3.eth.gas_price
+    sent = {}
+    for account in holder_accounts:
+        try:
+            nonce = w3.eth.get_transaction_count(account.address, 'pending')
+            tx = gcb_token_contract.functions.claimIncome().build_transaction({
+                'chainId': chain_id,
+                'gasPrice': gas_price,
+                'from': account.address,
+                'nonce': nonce,
+            })
+            signed_tx = account.sign_transaction(tx)
+            tx_hash = w3.eth.send_raw_transaction(signed_tx.rawTransaction)
+            sent[account.address] = tracker.track(tx_hash, sender=account.address, nonce=nonce)
+        except Exception as e:
+            print(f"  Could not claim income for {account.address}: {e}")
+    return dict(zip(sent, tracker.wait_for(list(sent.values()), timeout=timeout)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fund and inspect GCBToken income distributions.")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    fund_parser = subcommands.add_parser("fund", help="Distribute income from the deployer account")
+    fund_parser.add_argument("amount", type=float, help="Amount of native currency (in ether units) to distribute")
+    query_parser = subcommands.add_parser("query", help="Show withdrawable income for holders")
+    query_parser.add_argument("addresses", nargs="+")
+    args = parser.parse_args()
+
+    w3 = Web3(Web3.HTTPProvider(config.EVM_NETWORK_URL))
+    if not w3.is_connected():
+        print(f"Error: Could not connect to EVM network at {config.EVM_NETWORK_URL}")
+        sys.exit(1)
+    if not config.ACCESS_CONTROL_CONTRACT_ADDRESS:
+        print("ERROR: ACCESS_CONTROL_CONTRACT_ADDRESS (GCBToken address) not set in .env. Please run deploy_gcb_token.py first.")
+        sys.exit(1)
+    gcb_token_contract = w3.eth.contract(address=config.ACCESS_CONTROL_CONTRACT_ADDRESS, abi=load_artifact('GCBToken')['abi'])
+
+    if args.command == "fund":
+        deployer_private_key = config.EVM_DEPLOYER_PRIVATE_KEY
+        if not deployer_private_key.startswith('0x'):
+            deployer_private_key = '0x' + deployer_private_key
+        owner_account = w3.eth.account.from_key(deployer_private_key)
+        receipt = fund_distribution(w3, gcb_token_contract, owner_account, w3.to_wei(args.amount, 'ether'))
+        print(f"Income distribution {'succeeded' if receipt.status == 1 else 'FAILED'}. "
+              f"Tx Hash: {receipt.transactionHash.hex()} (gas used: {receipt.gasUsed})")
+    else:
+        addresses = [Web3.to_checksum_address(address) for address in args.addresses]
+        for address, amount in withdrawable_income_many(gcb_token_contract, addresses).items():
+            print(f"  {address}: {w3.from_wei(amount, 'ether')} withdrawable")
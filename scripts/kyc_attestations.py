@@ -0,0 +1,154 @@
+# scripts/kyc_attestations.py
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from eth_abi import encode
+from eth_keys import keys
+from web3 import Web3
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import config
+
+# EIP-712 KYC attestations: the oracle signs "investor has KYC status S until T" for one
+# GCBToken instead of sending a transaction, and the investor submits it with
+# GCBToken.registerWithAttestation or transferWithAttestation. Each attestation carries
+# the time it was issued, and the token only accepts it if no KYC write for the investor
+# (an oracle update or another attestation) has landed since, so it is used at most once
+# and is void once the oracle updates the investor. Signing therefore needs no chain
+# reads: the digest is built here from a cached domain separator, and signatures are made
+# with eth_keys (which uses coincurve when it is installed, and pure Python otherwise).
+# Large batches are signed across a process pool.
+
+DOMAIN_NAME = "GCBToken"
+DOMAIN_VERSION = "1"
+EIP712_DOMAIN_TYPEHASH = Web3.keccak(text="EIP712Domain(string name,string version,uint256 chainId,address verifyingContract)")
+KYC_ATTESTATION_TYPEHASH = Web3.keccak(text="KYCAttestation(address investor,bool status,uint256 issuedAt,uint256 expiry)")
+
+
+@lru_cache(maxsize=1024)
+def domain_separator(chain_id, token_address):
+    return Web3.keccak(encode(
+        ['bytes32', 'bytes32', 'bytes32', 'uint256', 'address'],
+        [EIP712_DOMAIN_TYPEHASH, Web3.keccak(text=DOMAIN_NAME), Web3.keccak(text=DOMAIN_VERSION), chain_id, token_address],
+    ))
+
+
+def attestation_digest(separator, investor, status, issued_at, expiry):
+    # GCBToken.attestationDigest: keccak256("\x19\x01" || domain separator || struct hash).
+    struct_hash = Web3.keccak(encode(
+        ['bytes32', 'address', 'bool', 'uint256', 'uint256'],
+        [KYC_ATTESTATION_TYPEHASH, investor, status, issued_at, expiry],
+    ))
+    return Web3.keccak(b'\x19\x01' + separator + struct_hash)
+
+
+def sign_digests(private_key, digests):
+    # 65-byte r || s || v signatures (v = 27/28, as ECDSA.recover expects). Module level so
+    # the process pool can run it.
+    key = keys.PrivateKey(private_key)
+    signatures = []
+    for digest in digests:
+        signature = key.sign_msg_hash(digest)
+        signatures.append(signature.r.to_bytes(32, 'big') + signature.s.to_bytes(32, 'big') + bytes([signature.v + 27]))
+    return signatures
+
+
+def recover_signer(chain_id, token_address, attestation):
+    # The address that signed an attestation (as returned by AttestationSigner), like the contract does.
+    digest = attestation_digest(
+        domain_separator(chain_id, Web3.to_checksum_address(token_address)),
+        attestation["investor"], attestation["status"], attestation["issued_at"], attestation["expiry"],
+    )
+    signature = bytes.fromhex(attestation["signature"][2:])
+    vrs = (signature[64] - 27, int.from_bytes(signature[:32], 'big'), int.from_bytes(signature[32:64], 'big'))
+    return keys.Signature(vrs=vrs).recover_public_key_from_msg_hash(digest).to_checksum_address()
+
+
+def attestation_args(attestation):
+    # (KYCAttestation tuple, signature) for registerWithAttestation / transferWithAttestation.
+    return (
+        (attestation["investor"], attestation["status"], attestation["issued_at"], attestation["expiry"]),
+        bytes.fromhex(attestation["signature"][2:]),
+    )
+
+
+class AttestationSigner:
+    """
+    Signs KYC attestations with one oracle signer key. Attestations are issued now and
+    valid for `ttl` seconds, unless the investor's KYC status is written on chain first.
+    Batches with at least `inline_below` attestations are signed in `workers` processes,
+    `chunk_size` per task.
+    """
+
+    def __init__(self, private_key, chain_id, ttl=None, workers=None, chunk_size=256, inline_below=64):
+        private_key = private_key if isinstance(private_key, bytes) else bytes.fromhex(private_key.removeprefix('0x'))
+        self.private_key = private_key
+        self.address = keys.PrivateKey(private_key).public_key.to_checksum_address()
+        self.chain_id = chain_id
+        self.ttl = config.ORACLE_ATTESTATION_TTL if ttl is None else ttl
+        self.workers = config.ORACLE_ATTESTATION_WORKERS if workers is None else workers
+        self.chunk_size = chunk_size
+        self.inline_below = inline_below
+        self._pool = ProcessPoolExecutor(self.workers) if self.workers > 0 else None
+
+    def _prepare(self, token_address, items):
+        # items: [(investor address, status)] -> (unsigned attestations, digests).
+        separator = domain_separator(self.chain_id, token_address)
+        issued_at = int(time.time())
+        expiry = issued_at + self.ttl
+        attestations, digests = [], []
+        for investor, status in items:
+            attestations.append({
+                "investor": investor,
+                "status": status,
+                "issued_at": issued_at,
+                "expiry": expiry,
+                "token_address": token_address,
+                "chain_id": self.chain_id,
+                "signer": self.address,
+            })
+            digests.append(attestation_digest(separator, investor, status, issued_at, expiry))
+        return attestations, digests
+
+    @staticmethod
+    def _finish(attestations, signatures):
+        for attestation, signature in zip(attestations, signatures):
+            attestation["signature"] = "0x" + signature.hex()
+        return attestations
+
+    def _chunks(self, digests):
+        return [digests[start:start + self.chunk_size] for start in range(0, len(digests), self.chunk_size)]
+
+    def sign_many(self, token_address, items):
+        attestations, digests = self._prepare(Web3.to_checksum_address(token_address), items)
+        if self._pool is None or len(digests) < self.inline_below:
+            signatures = sign_digests(self.private_key, digests)
+        else:
+            chunks = self._pool.map(sign_digests, [self.private_key] * len(self._chunks(digests)), self._chunks(digests))
+            signatures = [signature for chunk in chunks for signature in chunk]
+        return self._finish(attestations, signatures)
+
+    async def sign_many_async(self, token_address, items):
+        # The same without blocking the event loop: signatures are made in the pool (or a thread).
+        attestations, digests = self._prepare(Web3.to_checksum_address(token_address), items)
+        loop = asyncio.get_running_loop()
+        if self._pool is None or len(digests) < self.inline_below:
+            signatures = await loop.run_in_executor(None, sign_digests, self.private_key, digests)
+        else:
+            chunks = await asyncio.gather(*(
+                loop.run_in_executor(self._pool, sign_digests, self.private_key, chunk) for chunk in self._chunks(digests)
+            ))
+            signatures = [signature for chunk in chunks for signature in chunk]
+        return self._finish(attestations, signatures)
+
+    def sign(self, token_address, investor, status):
+        return self.sign_many(token_address, [(investor, status)])[0]
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
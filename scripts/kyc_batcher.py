@@ -0,0 +1,182 @@
+# scripts/kyc_batcher.py
+import asyncio
+import threading
+import time
+from concurrent.futures import Future
+
+
+class KYCBatcher:
+    """
+    Collects KYC status updates for up to `window` seconds (or until `max_size`
+    updates are queued) and flushes them as one batchUpdateKYCStatus transaction.
+
+    `submit_batch(addresses, statuses)` does the actual sending and returns the
+    transaction record; every update in the batch resolves to that record.
+    """
+
+    def __init__(self, submit_batch, window=0.2, max_size=200):
+        self.submit_batch = submit_batch
+        self.window = window
+        self.max_size = max(1, max_size)
+
+        self._queue = []
+        self._queued = {}  # (address, status) -> future of the queued or sending update
+        self._oldest = None
+        self._cond = threading.Condition()
+        self._stop = False
+        self._worker = threading.Thread(target=self._run, name='kyc-batcher', daemon=True)
+        self._worker.start()
+
+    def add(self, investor_evm_address, kyc_status):
+        with self._cond:
+            # Once stopped, nothing would ever flush the update.
+            if self._stop:
+                raise RuntimeError("KYCBatcher is stopped")
+            # An identical update already waiting for the next flush is sent only once.
+            future = self._queued.get((investor_evm_address, kyc_status))
+            if future is not None:
+                return future
+            future = Future()
+            if not self._queue:
+                self._oldest = time.monotonic()
+            self._queue.append((investor_evm_address, kyc_status, future))
+            self._queued[(investor_evm_address, kyc_status)] = future
+            self._cond.notify()
+        return future
+
+    def submit_now(self, updates):
+        # Bulk callers already have a full batch: send it in max_size chunks without waiting.
+        records = []
+        for start in range(0, len(updates), self.max_size):
+            chunk = updates[start:start + self.max_size]
+            records.append(self.submit_batch([a for a, _ in chunk], [s for _, s in chunk]))
+        return records
+
+    def queue_depth(self):
+        return len(self._queue)
+
+    def stop(self):
+        with self._cond:
+            self._stop = True
+            self._cond.notify()
+        self._worker.join()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._stop:
+                    self._cond.wait()
+                if not self._queue and self._stop:
+                    return
+                # Wait for the window to close unless the batch is already full.
+                while len(self._queue) < self.max_size and not self._stop:
+                    remaining = self.window - (time.monotonic() - self._oldest)
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._queue[:self.max_size]
+                self._queue = self._queue[self.max_size:]
+                self._oldest = time.monotonic() if self._queue else None
+            self._flush(batch)
+
+    def _flush(self, batch):
+        try:
+            record = self.submit_batch([a for a, _, _ in batch], [s for _, s, _ in batch])
+        except Exception as e:
+            for _, _, future in batch:
+                future.set_exception(e)
+        else:
+            for _, _, future in batch:
+                future.set_result(record)
+        # Until now, identical updates joined this batch instead of queueing a new one.
+        with self._cond:
+            for address, status, future in batch:
+                if self._queued.get((address, status)) is future:
+                    del self._queued[(address, status)]
+
+
+class AsyncKYCBatcher:
+    """
+    KYCBatcher for the asyncio oracle: the same window/max_size batching, run as a
+    task on the event loop. `submit_batch(addresses, statuses)` is a coroutine.
+    """
+
+    def __init__(self, submit_batch, window=0.2, max_size=200):
+        self.submit_batch = submit_batch
+        self.window = window
+        self.max_size = max(1, max_size)
+
+        self._queue = []
+        self._queued = {}  # (address, status) -> future of the queued or sending update
+        self._oldest = None
+        self._wakeup = asyncio.Event()
+        self._stop = False
+        self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    def add(self, investor_evm_address, kyc_status):
+        if self._stop:
+            raise RuntimeError("AsyncKYCBatcher is stopped")
+        future = self._queued.get((investor_evm_address, kyc_status))
+        if future is not None:
+            return future
+        future = asyncio.get_running_loop().create_future()
+        if not self._queue:
+            self._oldest = time.monotonic()
+        self._queue.append((investor_evm_address, kyc_status, future))
+        self._queued[(investor_evm_address, kyc_status)] = future
+        self._wakeup.set()
+        return future
+
+    async def submit_now(self, updates):
+        records = []
+        for start in range(0, len(updates), self.max_size):
+            chunk = updates[start:start + self.max_size]
+            records.append(await self.submit_batch([a for a, _ in chunk], [s for _, s in chunk]))
+        return records
+
+    def queue_depth(self):
+        return len(self._queue)
+
+    async def stop(self):
+        self._stop = True
+        self._wakeup.set()
+        await self._worker
+
+    async def _wait(self, timeout=None):
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _run(self):
+        while True:
+            while not self._queue and not self._stop:
+                await self._wait()
+            if not self._queue and self._stop:
+                return
+            # Wait for the window to close unless the batch is already full.
+            while len(self._queue) < self.max_size and not self._stop:
+                remaining = self.window - (time.monotonic() - self._oldest)
+                if remaining <= 0:
+                    break
+                await self._wait(remaining)
+            batch = self._queue[:self.max_size]
+            self._queue = self._queue[self.max_size:]
+            self._oldest = time.monotonic() if self._queue else None
+            await self._flush(batch)
+
+    async def _flush(self, batch):
+        try:
+            record = await self.submit_batch([a for a, _, _ in batch], [s for _, s, _ in batch])
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_result(record)
+        for address, status, future in batch:
+            if self._queued.get((address, status)) is future:
+                del self._queued[(address, status)]
@@ -0,0 +1,272 @@
+# scripts/kyc_credentials.py
+import asyncio
+import hashlib
+import heapq
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+from xrpl.core import keypairs
+from xrpl.wallet import Wallet
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import config
+import oracle_metrics as metrics
+
+# Signed KYC credentials: a W3C-style verifiable credential stating that the subject
+# (did:xrpl:<address>) passed KYC, signed by the issuer's XRPL key (ed25519 or
+# secp256k1) over the canonical JSON of everything but the proof. xrpl_did_kyc_setup.py
+# issues them; the oracle checks them with a CredentialVerifier, which caches results by
+# credential hash until the credential expires and spreads signature checks for large
+# batches over a process pool.
+
+ISSUER_FILE = "gcb_kyc_issuer.json"
+CREDENTIAL_CONTEXT = ["https://www.w3.org/2018/credentials/v1"]
+CREDENTIAL_TYPE = ["VerifiableCredential", "KYCCredential"]
+PROOF_TYPES = {"ED": "XRPLEd25519Signature"}  # Everything else is secp256k1
+SECP256K1_PROOF = "XRPLSecp256k1Signature"
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+CredentialCheck = namedtuple("CredentialCheck", ["valid", "kyc_approved", "reason"])
+
+
+def _timestamp(epoch):
+    return datetime.fromtimestamp(epoch, timezone.utc).strftime(TIMESTAMP_FORMAT)
+
+
+def _epoch(timestamp):
+    return datetime.strptime(timestamp, TIMESTAMP_FORMAT).replace(tzinfo=timezone.utc).timestamp()
+
+
+def _did_address(xrpl_did):
+    return xrpl_did.split(":")[-1] if isinstance(xrpl_did, str) and xrpl_did.startswith("did:xrpl:") else None
+
+
+def canonical_payload(credential):
+    # The signed bytes: the credential without its proof, with sorted keys and no whitespace.
+    unsigned = {key: value for key, value in credential.items() if key != "proof"}
+    return json.dumps(unsigned, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def credential_hash(credential):
+    return hashlib.sha256(json.dumps(credential, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+def issue_credential(issuer_wallet, subject_did, kyc_approved, validity_days=None, now=None):
+    now = time.time() if now is None else now
+    validity_days = config.KYC_CREDENTIAL_VALIDITY_DAYS if validity_days is None else validity_days
+    credential = {
+        "@context": CREDENTIAL_CONTEXT,
+        "type": CREDENTIAL_TYPE,
+        "id": f"urn:uuid:{uuid.uuid4()}",
+        "issuer": f"did:xrpl:{issuer_wallet.address}",
+        "issuanceDate": _timestamp(now),
+        "expirationDate": _timestamp(now + validity_days * 86400),
+        "credentialSubject": {"id": subject_did, "kycApproved": bool(kyc_approved)},
+    }
+    credential["proof"] = {
+        "type": PROOF_TYPES.get(issuer_wallet.public_key[:2].upper(), SECP256K1_PROOF),
+        "verificationMethod": f"did:xrpl:{issuer_wallet.address}#{issuer_wallet.public_key}",
+        "publicKey": issuer_wallet.public_key,
+        "proofValue": keypairs.sign(canonical_payload(credential), issuer_wallet.private_key),
+    }
+    return credential
+
+
+def load_issuer(path=ISSUER_FILE):
+    # The issuing wallet: KYC_ISSUER_SEED, else the one saved in `path`, else a new one (saved).
+    if config.KYC_ISSUER_SEED:
+        return Wallet.from_seed(config.KYC_ISSUER_SEED)
+    if os.path.exists(path):
+        with open(path) as f:
+            return Wallet.from_seed(json.load(f)["seed"])
+    wallet = Wallet.create()
+    # The file holds the issuer's seed: readable by its owner only.
+    with os.fdopen(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), "w") as f:
+        json.dump({"did": f"did:xrpl:{wallet.address}", "public_key": wallet.public_key, "seed": wallet.seed}, f, indent=4)
+    return wallet
+
+
+def trusted_issuers(path=ISSUER_FILE):
+    if config.KYC_TRUSTED_ISSUERS:
+        return set(config.KYC_TRUSTED_ISSUERS)
+    if os.path.exists(path):
+        with open(path) as f:
+            return {json.load(f)["did"]}
+    return set()
+
+
+def check_signature(credential):
+    # The expensive part of verification; returns None if the proof is valid, else a reason.
+    # Runs in the worker processes, so it must not depend on verifier state.
+    try:
+        proof = credential["proof"]
+        public_key = proof["publicKey"]
+        if keypairs.derive_classic_address(public_key) != _did_address(credential["issuer"]):
+            return "proof key does not belong to the issuer"
+        if not keypairs.is_valid_message(canonical_payload(credential), bytes.fromhex(proof["proofValue"]), public_key):
+            return "invalid signature"
+    except Exception as e:
+        return f"malformed proof: {e}"
+    return None
+
+
+def check_signatures(credentials):
+    return [check_signature(credential) for credential in credentials]
+
+
+class CredentialVerifier:
+    """
+    Verifies KYC credentials for the oracle. The cheap checks (subject, trusted issuer,
+    expiry) run on every call; signature results are cached by credential hash and
+    dropped once the credential expires. Batches with more than `inline_below` uncached
+    credentials are verified in `workers` processes, `chunk_size` credentials per task.
+    """
+
+    def __init__(self, trusted=None, workers=None, cache_size=None, chunk_size=64, inline_below=16):
+        self.trusted = set(trusted_issuers() if trusted is None else trusted)
+        self.workers = config.KYC_VERIFY_WORKERS if workers is None else workers
+        self.cache_size = config.KYC_VERIFY_CACHE_SIZE if cache_size is None else cache_size
+        self.chunk_size = chunk_size
+        self.inline_below = inline_below
+        self._cache = OrderedDict()  # credential hash -> (signature check result, expires_at)
+        self._expiry = []  # heap of (expires_at, credential hash)
+        self._lock = threading.Lock()
+        self._pool = ProcessPoolExecutor(self.workers) if self.workers > 0 else None
+        self.stats = {"cache_hits": 0, "verified": 0, "rejected": 0}
+
+    # --- Cache ---
+
+    def _expire(self, now):
+        while self._expiry and self._expiry[0][0] <= now:
+            _, digest = heapq.heappop(self._expiry)
+            self._cache.pop(digest, None)
+
+    def _cached(self, digest):
+        with self._lock:
+            entry = self._cache.get(digest)
+            if entry is not None:
+                self._cache.move_to_end(digest)
+            return entry
+
+    def _store(self, digest, reason, expires_at):
+        with self._lock:
+            self._cache[digest] = (reason, expires_at)
+            heapq.heappush(self._expiry, (expires_at, digest))
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def cache_entries(self):
+        return len(self._cache)
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
+            self._expiry.clear()
+
+    # --- Verification ---
+
+    def _precheck(self, credential, xrpl_did, now):
+        # Returns (reason, expires_at); reason is None when only the signature is left to check.
+        if not isinstance(credential, dict):
+            return "no credential", None
+        try:
+            subject = credential["credentialSubject"]
+            if subject["id"] != xrpl_did:
+                return "credential subject does not match the DID", None
+            if credential["issuer"] not in self.trusted:
+                return "issuer not trusted", None
+            expires_at = _epoch(credential["expirationDate"])
+        except (KeyError, TypeError, ValueError) as e:
+            return f"malformed credential: {e}", None
+        if expires_at <= now:
+            return "credential expired", None
+        return None, expires_at
+
+    def _plan(self, items):
+        # Splits (credential, xrpl_did) pairs into finished results and unique uncached credentials.
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+        results = [None] * len(items)
+        pending = {}  # credential hash -> [credential, expires_at, indexes]
+        for index, (credential, xrpl_did) in enumerate(items):
+            reason, expires_at = self._precheck(credential, xrpl_did, now)
+            if reason is None:
+                digest = credential_hash(credential)
+                cached = self._cached(digest)
+                if cached is None:
+                    pending.setdefault(digest, [credential, expires_at, []])[2].append(index)
+                    continue
+                reason = cached[0]
+                self._count("cache_hits")
+            results[index] = self._result(credential, reason)
+        return results, pending
+
+    def _finish(self, results, pending, reasons):
+        for (digest, (credential, expires_at, indexes)), reason in zip(pending.items(), reasons):
+            self._store(digest, reason, expires_at)
+            self._count("verified" if reason is None else "rejected")
+            for index in indexes:
+                results[index] = self._result(credential, reason)
+        return results
+
+    @staticmethod
+    def _result(credential, reason):
+        if reason is not None:
+            return CredentialCheck(False, False, reason)
+        return CredentialCheck(True, credential["credentialSubject"].get("kycApproved") is True, None)
+
+    def _count(self, result):
+        self.stats[result] += 1
+        metrics.CREDENTIAL_CHECKS.inc(result=result)
+
+    def _chunks(self, credentials):
+        return [credentials[start:start + self.chunk_size] for start in range(0, len(credentials), self.chunk_size)]
+
+    def verify_many(self, items):
+        # items: [(credential, xrpl_did)] -> [CredentialCheck], in order.
+        results, pending = self._plan(items)
+        if not pending:
+            return results
+        credentials = [entry[0] for entry in pending.values()]
+        if self._pool is None or len(credentials) < self.inline_below:
+            reasons = check_signatures(credentials)
+        else:
+            reasons = [reason for chunk in self._pool.map(check_signatures, self._chunks(credentials)) for reason in chunk]
+        return self._finish(results, pending, reasons)
+
+    async def verify_many_async(self, items):
+        # The same without blocking the event loop: signatures are checked in the pool (or a thread).
+        results, pending = self._plan(items)
+        if not pending:
+            return results
+        credentials = [entry[0] for entry in pending.values()]
+        loop = asyncio.get_running_loop()
+        if self._pool is None or len(credentials) < self.inline_below:
+            reasons = await loop.run_in_executor(None, check_signatures, credentials)
+        else:
+            chunks = await asyncio.gather(*(
+                loop.run_in_executor(self._pool, check_signatures, chunk) for chunk in self._chunks(credentials)
+            ))
+            reasons = [reason for chunk in chunks for reason in chunk]
+        return self._finish(results, pending, reasons)
+
+    def verify(self, credential, xrpl_did):
+        return self.verify_many([(credential, xrpl_did)])[0]
+
+    def trusts_ledger_record(self, investor):
+        # Records from ledger_kyc_sync.py carry the DID of the issuer whose on-ledger
+        # credentials set their status; that status stands only if the issuer is trusted here.
+        return investor.get("kyc_source") == "ledger" and investor.get("kyc_issuer") in self.trusted
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
@@ -0,0 +1,321 @@
+# scripts/kyc_store.py
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import config
+
+# KYC datastore backends for the oracle. Records use the same shape as the entries of
+# gcb_kyc_data.json ("investor_id", "xrpl_did", "kyc_approved", "evm_address_linked", ...)
+# and are indexed by XRPL DID and by linked EVM address. A record may carry
+# "kyc_expires_at" (Unix time), after which it no longer counts as approved.
+
+
+def record_kyc_approved(investor, now=None):
+    return bool(investor['kyc_approved']) and not _expired(investor.get('kyc_expires_at'), now)
+
+
+def _expired(expires_at, now=None):
+    return expires_at is not None and expires_at <= (time.time() if now is None else now)
+
+
+class KYCStore(ABC):
+    @abstractmethod
+    def get_investor(self, xrpl_did):
+        pass
+
+    @abstractmethod
+    def get_by_evm_address(self, evm_address):
+        pass
+
+    @abstractmethod
+    def upsert_many(self, investors):
+        pass
+
+    @abstractmethod
+    def link_evm_address(self, xrpl_did, evm_address):
+        pass
+
+    @abstractmethod
+    def count(self):
+        pass
+
+    @abstractmethod
+    def ledger_dids(self, kyc_issuer):
+        # DIDs of the records ledger_kyc_sync.py wrote from `kyc_issuer`'s credentials.
+        pass
+
+    def upsert(self, investor):
+        self.upsert_many([investor])
+
+    def get_kyc_status(self, xrpl_did):
+        investor = self.get_investor(xrpl_did)
+        return record_kyc_approved(investor) if investor else None
+
+    def close(self):
+        pass
+
+
+class MemoryKYCStore(KYCStore):
+    # Plain dictionaries; used for simulations and short-lived tools.
+
+    def __init__(self):
+        self._by_did = {}
+        self._by_evm_address = {}
+        self._lock = threading.Lock()
+
+    def get_investor(self, xrpl_did):
+        return self._by_did.get(xrpl_did)
+
+    def get_by_evm_address(self, evm_address):
+        xrpl_did = self._by_evm_address.get(evm_address.lower())
+        return self._by_did.get(xrpl_did) if xrpl_did else None
+
+    def upsert_many(self, investors):
+        with self._lock:
+            for investor in investors:
+                previous = self._by_did.get(investor['xrpl_did'], {})
+                record = dict(previous, **investor)
+                self._by_did[record['xrpl_did']] = record
+                if record.get('evm_address_linked'):
+                    self._index_evm_address(record['xrpl_did'], previous.get('evm_address_linked'), record['evm_address_linked'])
+
+    def link_evm_address(self, xrpl_did, evm_address):
+        with self._lock:
+            record = self._by_did.get(xrpl_did)
+            if record is not None:
+                self._index_evm_address(xrpl_did, record.get('evm_address_linked'), evm_address)
+                record['evm_address_linked'] = evm_address
+
+    def _index_evm_address(self, xrpl_did, previous, evm_address):
+        # Re-linking moves the investor: the old address must stop resolving to it.
+        if previous and self._by_evm_address.get(previous.lower()) == xrpl_did:
+            del self._by_evm_address[previous.lower()]
+        self._by_evm_address[evm_address.lower()] = xrpl_did
+
+    def count(self):
+        return len(self._by_did)
+
+    def ledger_dids(self, kyc_issuer):
+        with self._lock:
+            return [xrpl_did for xrpl_did, record in self._by_did.items()
+                    if record.get('kyc_source') == 'ledger' and record.get('kyc_issuer') == kyc_issuer]
+
+
+class SQLiteKYCStore(KYCStore):
+    # One SQLite file shared by the setup script (writer) and the oracle (reader).
+    # WAL mode lets the oracle keep reading while new investors are upserted, and every
+    # lookup sees the latest committed rows, so nothing has to be reloaded.
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS investors (
+            xrpl_did TEXT PRIMARY KEY,
+            investor_id INTEGER,
+            kyc_approved INTEGER NOT NULL,
+            evm_address TEXT,
+            record TEXT NOT NULL,
+            updated_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS investors_evm_address ON investors (evm_address);
+    """
+
+    UPSERT = """
+        INSERT INTO investors (xrpl_did, investor_id, kyc_approved, evm_address, record, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT (xrpl_did) DO UPDATE SET
+            investor_id = excluded.investor_id,
+            kyc_approved = excluded.kyc_approved,
+            evm_address = COALESCE(excluded.evm_address, investors.evm_address),
+            record = excluded.record,
+            updated_at = excluded.updated_at
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._connection().executescript(self.SCHEMA)
+
+    def _connection(self):
+        # sqlite3 connections cannot be shared across threads; Flask serves from many.
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    @staticmethod
+    def _row(investor):
+        evm_address = investor.get('evm_address_linked')
+        return (
+            investor['xrpl_did'],
+            investor.get('investor_id'),
+            1 if investor.get('kyc_approved') else 0,
+            evm_address.lower() if evm_address else None,
+            json.dumps(investor),
+            time.time(),
+        )
+
+    def get_investor(self, xrpl_did):
+        row = self._connection().execute(
+            "SELECT record, evm_address FROM investors WHERE xrpl_did = ?", (xrpl_did,)
+        ).fetchone()
+        return self._decode(row)
+
+    def get_kyc_status(self, xrpl_did):
+        # Hot path for /attest-kyc: only an approved record's expiry is read from the JSON.
+        row = self._connection().execute(
+            "SELECT kyc_approved, CASE WHEN kyc_approved THEN json_extract(record, '$.kyc_expires_at') END "
+            "FROM investors WHERE xrpl_did = ?", (xrpl_did,)
+        ).fetchone()
+        return bool(row[0]) and not _expired(row[1]) if row else None
+
+    def get_by_evm_address(self, evm_address):
+        row = self._connection().execute(
+            "SELECT record, evm_address FROM investors WHERE evm_address = ?", (evm_address.lower(),)
+        ).fetchone()
+        return self._decode(row)
+
+    @staticmethod
+    def _decode(row):
+        if row is None:
+            return None
+        investor = json.loads(row[0])
+        if row[1] and (investor.get('evm_address_linked') or '').lower() != row[1]:
+            # The column is the lookup key, so it wins over a stale copy in the record.
+            investor['evm_address_linked'] = row[1]
+        return investor
+
+    def upsert_many(self, investors):
+        connection = self._connection()
+        with connection:
+            connection.executemany(self.UPSERT, (self._row(investor) for investor in investors))
+
+    def link_evm_address(self, xrpl_did, evm_address):
+        connection = self._connection()
+        with connection:
+            connection.execute(
+                "UPDATE investors SET evm_address = ?, record = json_set(record, '$.evm_address_linked', ?), "
+                "updated_at = ? WHERE xrpl_did = ? AND (evm_address IS NULL OR evm_address != ?)",
+                (evm_address.lower(), evm_address, time.time(), xrpl_did, evm_address.lower()),
+            )
+
+    def count(self):
+        return self._connection().execute("SELECT COUNT(*) FROM investors").fetchone()[0]
+
+    def ledger_dids(self, kyc_issuer):
+        rows = self._connection().execute(
+            "SELECT xrpl_did FROM investors WHERE json_extract(record, '$.kyc_source') = 'ledger' "
+            "AND json_extract(record, '$.kyc_issuer') = ?", (kyc_issuer,)
+        )
+        return [row[0] for row in rows]
+
+    def bulk_import(self, investors, batch_size=10000):
+        # Fast path for large imports: one transaction per batch and no fsync per commit.
+        connection = self._connection()
+        connection.execute("PRAGMA synchronous=OFF")
+        imported = 0
+        try:
+            batch = []
+            for investor in investors:
+                batch.append(self._row(investor))
+                if len(batch) >= batch_size:
+                    with connection:
+                        connection.executemany(self.UPSERT, batch)
+                    imported += len(batch)
+                    batch = []
+            if batch:
+                with connection:
+                    connection.executemany(self.UPSERT, batch)
+                imported += len(batch)
+        finally:
+            connection.execute("PRAGMA synchronous=NORMAL")
+        return imported
+
+    def close(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+
+def open_kyc_store(url=None):
+    # "sqlite:///path/to/file.db" or "memory://"
+    url = url or config.KYC_STORE_URL
+    if url.startswith('sqlite:///'):
+        return SQLiteKYCStore(url[len('sqlite:///'):])
+    if url.startswith('memory://'):
+        return MemoryKYCStore()
+    raise ValueError(f"Unsupported KYC store URL: {url}")
+
+
+def iter_investors_json(file_path, chunk_size=1 << 20):
+    # Streams the "investors" array of a gcb_kyc_data.json file one record at a time,
+    # so multi-million-investor files never have to be loaded whole.
+    decoder = json.JSONDecoder()
+    with open(file_path, 'r') as f:
+        buffer = f.read(chunk_size)
+        while '"investors"' not in buffer or '[' not in buffer[buffer.index('"investors"'):]:
+            more = f.read(chunk_size)
+            if not more:
+                raise ValueError(f"{file_path} has no \"investors\" array")
+            buffer += more
+        position = buffer.index('[', buffer.index('"investors"')) + 1
+
+        while True:
+            while position < len(buffer) and buffer[position] in ' \t\r\n,':
+                position += 1
+            if position < len(buffer) and buffer[position] == ']':
+                return
+            try:
+                investor, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                more = f.read(chunk_size)
+                if not more:
+                    raise
+                buffer = buffer[position:] + more
+                position = 0
+                continue
+            yield investor
+
+
+def import_json(store, file_path):
+    investors = iter_investors_json(file_path)
+    if isinstance(store, SQLiteKYCStore):
+        return store.bulk_import(investors)
+    count = 0
+    for investor in investors:
+        store.upsert(investor)
+        count += 1
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the oracle's KYC datastore.")
+    parser.add_argument("--store", default=config.KYC_STORE_URL, help="KYC store URL (default: KYC_STORE_URL)")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    import_parser = subcommands.add_parser("import", help="Bulk import a gcb_kyc_data.json file")
+    import_parser.add_argument("file", nargs="?", default="gcb_kyc_data.json")
+    lookup_parser = subcommands.add_parser("lookup", help="Look up an investor by XRPL DID or EVM address")
+    lookup_parser.add_argument("key")
+    subcommands.add_parser("count", help="Print the number of investors in the store")
+    args = parser.parse_args()
+
+    store = open_kyc_store(args.store)
+    if args.command == "import":
+        started = time.perf_counter()
+        imported = import_json(store, args.file)
+        print(f"Imported {imported} investor(s) from {args.file} in {time.perf_counter() - started:.2f}s.")
+    elif args.command == "lookup":
+        investor = store.get_investor(args.key) if args.key.startswith('did:') else store.get_by_evm_address(args.key)
+        print(json.dumps(investor, indent=4) if investor else f"No investor found for {args.key}")
+    else:
+        print(f"{store.count()} investor(s) in {args.store}")
@@ -0,0 +1,399 @@
+# scripts/ledger_kyc_sync.py
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from xrpl.core.addresscodec import is_valid_classic_address
+from xrpl.models.requests import Ledger, LedgerData, ServerInfo
+from xrpl.models.requests.ledger_entry import LedgerEntryType
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import config
+from did_resolver import DID_PREFIX, WebsocketPool, credential_expires_at, hex_text, is_kyc_credential
+from kyc_credentials import trusted_issuers
+from kyc_store import MemoryKYCStore, open_kyc_store
+
+# Loads every DID on the XRPL ledger, with its KYC status from the account's credentials,
+# into the oracle's KYC store, so the oracle can answer attestations from the store
+# instead of resolving each DID when its first attestation arrives. The sync reads one
+# pinned validated ledger with ledger_data (type filter, paged by marker). The key space
+# is split into LEDGER_SYNC_RANGES ranges that are paged concurrently; rippled treats a
+# marker as an exclusive lower bound on the ledger key, so a range starts at a synthetic
+# marker and stops at the next range's first key. Each page is handled as it arrives and
+# written to the store in batches, so memory stays flat however large the ledger is.
+# Follow mode then applies the DID and credential changes in each later validated ledger
+# (from transaction metadata) to the store. Only credentials from KYC_CREDENTIAL_ISSUER
+# count, and the sync refuses to run unless that issuer is also one of the oracle's
+# trusted issuers (KYC_TRUSTED_ISSUERS). Records written here carry "kyc_source": "ledger"
+# and "kyc_issuer"; the oracle takes their status as verified while that issuer is trusted.
+# "kyc_expires_at" carries the credential's expiration, so an approval lapses on time even
+# if no later ledger touches the record, and a full sync marks the issuer's records whose
+# DID is gone from the synced ledger (e.g. deleted while the sync was down) as not approved.
+
+KEY_SPACE = 1 << 256
+
+
+def key_ranges(count):
+    # [(marker, end)] covering the ledger key space: each range returns keys above `marker`
+    # (None: from the start) and below `end` (None: to the end).
+    bounds = [KEY_SPACE * i // count for i in range(count + 1)]
+    return [
+        (f"{start - 1:064X}" if start else None, end if end < KEY_SPACE else None)
+        for start, end in zip(bounds, bounds[1:])
+    ]
+
+
+class LedgerKYCSync:
+    def __init__(self, store, url=None, pool_size=None, ranges=None, page_limit=None, batch_size=1000,
+                 credential_type=None, credential_issuer=None, trusted=None, timeout=30):
+        self.store = store
+        self.pool = WebsocketPool(url or config.XRPL_NETWORK_URL, pool_size or config.XRPL_WS_POOL_SIZE, timeout)
+        self.ranges = ranges or config.LEDGER_SYNC_RANGES
+        self.page_limit = page_limit or config.LEDGER_SYNC_PAGE_LIMIT
+        self.batch_size = batch_size
+        self.credential_type = (credential_type or config.KYC_CREDENTIAL_TYPE).encode().hex().upper()
+        self.credential_issuer = credential_issuer or config.KYC_CREDENTIAL_ISSUER
+        if not is_valid_classic_address(self.credential_issuer or ""):
+            raise ValueError("Syncing KYC from the ledger needs a credential issuer: set KYC_CREDENTIAL_ISSUER "
+                             f"to the issuer's XRPL address (got {self.credential_issuer!r})")
+        self.issuer_did = DID_PREFIX + self.credential_issuer
+        if self.issuer_did not in set(trusted_issuers() if trusted is None else trusted):
+            raise ValueError(f"KYC credential issuer {self.issuer_did} is not a trusted issuer (KYC_TRUSTED_ISSUERS)")
+        self.ledger_index = None  # Last ledger whose state is in the store
+        self.kyc_credentials = {}  # subject account -> {key: Unix expiry or None} of its accepted KYC credentials
+        self.did_accounts = set()  # Accounts with a DID on the ledger
+        self.stats = {"pages": 0, "dids": 0, "credentials": 0, "ledgers_followed": 0, "updates": 0, "removed": 0}
+        # Store writes run on one thread: SQLite connections are per thread, and writes
+        # from one thread never contend with each other.
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='ledger-sync-writer')
+
+    async def _request(self, request):
+        response = await self.pool.request(request)
+        if not response.is_successful():
+            raise RuntimeError(f"{request.method} failed: {response.result.get('error')}")
+        return response.result
+
+    async def validated_ledger_index(self):
+        result = await self._request(ServerInfo())
+        return result["info"]["validated_ledger"]["seq"]
+
+    # --- Bulk sync ---
+
+    async def _pages(self, entry_type, ledger_index, marker=None, end=None):
+        # The objects of `entry_type` in one key range at `ledger_index`, a page at a time.
+        while True:
+            result = await self._request(LedgerData(ledger_index=ledger_index, type=entry_type,
+                                                    limit=self.page_limit, marker=marker))
+            self.stats["pages"] += 1
+            objects = result.get("state", [])
+            marker = result.get("marker")
+            if end is not None:
+                objects = [node for node in objects if int(node["index"], 16) < end]
+                try:
+                    if marker is not None and int(marker, 16) >= end - 1:
+                        marker = None
+                except ValueError:
+                    raise RuntimeError(f"Node returned a marker that is not a ledger key ({marker}); "
+                                       "sync with --ranges 1") from None
+            yield objects
+            if marker is None:
+                return
+
+    async def _scan(self, entry_type, ledger_index, handle_page):
+        # Pages every key range concurrently; handle_page(objects) is awaited as each page arrives.
+        async def scan_range(marker, end):
+            async for objects in self._pages(entry_type, ledger_index, marker, end):
+                await handle_page(objects)
+
+        await asyncio.gather(*(scan_range(marker, end) for marker, end in key_ranges(self.ranges)))
+
+    def _kyc_approved(self, account):
+        return bool(self.kyc_credentials.get(account))
+
+    def _kyc_expires_at(self, account):
+        expirations = list(self.kyc_credentials.get(account, {}).values())
+        if not expirations or None in expirations:
+            return None
+        return max(expirations)
+
+    def _did_record(self, node, ledger_index):
+        account = node["Account"]
+        return {
+            "xrpl_did": DID_PREFIX + account,
+            "kyc_approved": self._kyc_approved(account),
+            "kyc_expires_at": self._kyc_expires_at(account),
+            "kyc_source": "ledger",
+            "kyc_issuer": self.issuer_did,
+            "did_on_ledger": True,
+            "did_uri": hex_text(node.get("URI")),
+            "did_document": hex_text(node.get("DIDDocument")),
+            "ledger_index": ledger_index,
+        }
+
+    def _write(self, records):
+        # Merges into existing records, so investor ids, credentials and linked EVM
+        # addresses from xrpl_did_kyc_setup.py survive.
+        merged = []
+        for record in records:
+            existing = self.store.get_investor(record["xrpl_did"])
+            merged.append(dict(existing, **record) if existing else record)
+        self.store.upsert_many(merged)
+
+    async def _write_async(self, records):
+        await asyncio.get_running_loop().run_in_executor(self._writer, self._write, records)
+
+    def _remove_unseen(self, ledger_index):
+        # Records this issuer's sync wrote earlier whose DID is not in the synced ledger.
+        unseen = [xrpl_did for xrpl_did in self.store.ledger_dids(self.issuer_did)
+                  if xrpl_did[len(DID_PREFIX):] not in self.did_accounts]
+        for start in range(0, len(unseen), self.batch_size):
+            self._write([
+                {"xrpl_did": xrpl_did, "kyc_approved": False, "kyc_expires_at": None, "did_on_ledger": False,
+                 "did_uri": None, "did_document": None, "ledger_index": ledger_index}
+                for xrpl_did in unseen[start:start + self.batch_size]
+            ])
+        return len(unseen)
+
+    async def sync(self, ledger_index=None):
+        # Loads every DID as of one validated ledger (the latest by default) and returns a summary.
+        ledger_index = ledger_index or await self.validated_ledger_index()
+        started = time.perf_counter()
+        self.kyc_credentials.clear()
+        self.did_accounts.clear()
+
+        # Credentials first: a DID's status depends on credentials anywhere in the key space.
+        async def load_credentials(objects):
+            self.stats["credentials"] += len(objects)
+            for node in objects:
+                if is_kyc_credential(node, self.credential_type, self.credential_issuer):
+                    self.kyc_credentials.setdefault(node["Subject"], {})[node["index"]] = credential_expires_at(node)
+
+        await self._scan(LedgerEntryType.CREDENTIAL, ledger_index, load_credentials)
+
+        pending = []
+
+        async def load_dids(objects):
+            self.stats["dids"] += len(objects)
+            for node in objects:
+                self.did_accounts.add(node["Account"])
+                pending.append(self._did_record(node, ledger_index))
+            if len(pending) >= self.batch_size:
+                batch = pending[:]
+                pending.clear()
+                await self._write_async(batch)
+
+        await self._scan(LedgerEntryType.DID, ledger_index, load_dids)
+        if pending:
+            await self._write_async(pending)
+        removed = await asyncio.get_running_loop().run_in_executor(self._writer, self._remove_unseen, ledger_index)
+        self.stats["removed"] += removed
+        self.ledger_index = ledger_index
+        elapsed = time.perf_counter() - started
+        return {
+            "ledger_index": ledger_index,
+            "dids": len(self.did_accounts),
+            "kyc_approved": sum(1 for account in self.did_accounts if self._kyc_approved(account)),
+            "removed": removed,
+            "credentials": self.stats["credentials"],
+            "pages": self.stats["pages"],
+            "seconds": elapsed,
+            "dids_per_second": len(self.did_accounts) / elapsed if elapsed else None,
+        }
+
+    # --- Following later ledgers ---
+
+    async def _ledger_transactions(self, ledger_index):
+        result = await self._request(Ledger(ledger_index=ledger_index, transactions=True, expand=True))
+        return result["ledger"].get("transactions", [])
+
+    def _changes(self, ledger_index, transactions):
+        # account -> partial record, for the DID and credential changes in one ledger's metadata.
+        updates = {}
+        for transaction in transactions:
+            meta = transaction.get("meta") or transaction.get("metaData") or {}  # API v2 / v1
+            if meta.get("TransactionResult") != "tesSUCCESS":
+                continue
+            for affected in meta.get("AffectedNodes", []):
+                kind, node = next(iter(affected.items()))
+                fields = node.get("FinalFields") or node.get("NewFields") or {}
+                if node.get("LedgerEntryType") == "Credential":
+                    subject = fields.get("Subject")
+                    keys = self.kyc_credentials.setdefault(subject, {})
+                    if kind != "DeletedNode" and is_kyc_credential(fields, self.credential_type, self.credential_issuer):
+                        keys[node["LedgerIndex"]] = credential_expires_at(fields)
+                    else:
+                        keys.pop(node["LedgerIndex"], None)
+                    if not keys:
+                        del self.kyc_credentials[subject]
+                    updates.setdefault(subject, {})
+                elif node.get("LedgerEntryType") == "DID":
+                    account = fields.get("Account")
+                    if kind == "DeletedNode":
+                        self.did_accounts.discard(account)
+                        updates[account] = {"did_on_ledger": False, "did_uri": None, "did_document": None}
+                    else:
+                        self.did_accounts.add(account)
+                        updates[account] = self._did_record(fields, ledger_index)
+        records = []
+        for account, update in updates.items():
+            if account not in self.did_accounts and not update:
+                continue  # A credential change for an account without a DID
+            records.append(dict(update, xrpl_did=DID_PREFIX + account, kyc_source="ledger", kyc_issuer=self.issuer_did,
+                                ledger_index=ledger_index,
+                                kyc_approved=account in self.did_accounts and self._kyc_approved(account),
+                                kyc_expires_at=self._kyc_expires_at(account) if account in self.did_accounts else None))
+        return records
+
+    async def catch_up(self):
+        # Applies every validated ledger after the synced one, in order; returns how many.
+        # Up to `ranges` ledgers are fetched at once when the sync has fallen behind.
+        validated = await self.validated_ledger_index()
+        applied = 0
+        while self.ledger_index < validated:
+            indexes = range(self.ledger_index + 1, min(validated, self.ledger_index + self.ranges) + 1)
+            ledgers = await asyncio.gather(*(self._ledger_transactions(index) for index in indexes))
+            for index, transactions in zip(indexes, ledgers):
+                records = self._changes(index, transactions)
+                if records:
+                    await self._write_async(records)
+                self.ledger_index = index
+                self.stats["ledgers_followed"] += 1
+                self.stats["updates"] += len(records)
+                applied += 1
+        return applied
+
+    async def follow(self, poll_interval=None):
+        poll_interval = config.LEDGER_SYNC_POLL_INTERVAL if poll_interval is None else poll_interval
+        while True:
+            try:
+                updates = self.stats["updates"]
+                if await self.catch_up():
+                    print(f"Ledger sync at ledger {self.ledger_index} ({self.stats['updates'] - updates} update(s)).")
+            except (RuntimeError, asyncio.TimeoutError, ConnectionError, OSError) as e:
+                print(f"Ledger sync: {e}; retrying in {poll_interval}s")
+            await asyncio.sleep(poll_interval)
+
+    async def close(self):
+        await self.pool.close()
+        self._writer.shutdown()
+
+
+async def bench(dids, approved_ratio, ranges_counts, latency_ms, page_limit, pool_size):
+    # Syncs a synthetic ledger served by an in-process mock rippled, once per range count,
+    # then closes a few ledgers and checks that follow mode picks up their changes.
+    from mock_rippled import ISSUER, MockLedger, serve, synthetic_investors
+
+    investors = synthetic_investors(dids, approved_ratio, seed=1)
+    ledger = MockLedger(investors)
+    server = await serve(ledger, "127.0.0.1", 0, latency_ms)
+    url = f"ws://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+    expected_approved = sum(1 for investor in investors if investor["kyc_approved"])
+    results = []
+    try:
+        for ranges in ranges_counts:
+            store = MemoryKYCStore()
+            sync = LedgerKYCSync(store, url=url, pool_size=pool_size, ranges=ranges, page_limit=page_limit,
+                                 credential_issuer=ISSUER, trusted={DID_PREFIX + ISSUER})
+            requests = ledger.requests
+            try:
+                summary = await sync.sync()
+            finally:
+                await sync.close()
+            summary.update(ranges=ranges, requests=ledger.requests - requests,
+                           complete=summary["dids"] == dids and summary["kyc_approved"] == expected_approved
+                           and store.count() == dids)
+            results.append(summary)
+
+        # Follow: new investors and a revoked credential in later ledgers. The store also
+        # holds an approved record from an earlier sync whose DID is no longer on the ledger.
+        store = MemoryKYCStore()
+        gone = DID_PREFIX + "rGoneFromTheLedgerXXXXXXXXXXXXXXXX"
+        store.upsert({"xrpl_did": gone, "kyc_approved": True, "kyc_source": "ledger", "kyc_issuer": DID_PREFIX + ISSUER})
+        sync = LedgerKYCSync(store, url=url, pool_size=pool_size, ranges=max(ranges_counts), page_limit=page_limit,
+                             credential_issuer=ISSUER, trusted={DID_PREFIX + ISSUER})
+        try:
+            summary = await sync.sync()
+            revoked = next(investor["xrpl_did"] for investor in investors if investor["kyc_approved"])
+            added = synthetic_investors(5, 1.0, seed=2)
+            ledger.close_ledger(added[:3])
+            ledger.close_ledger(added[3:], revoked=[revoked.split(":")[-1]])
+            applied = await sync.catch_up()
+        finally:
+            await sync.close()
+        follow_ok = (applied == 2 and store.get_kyc_status(revoked) is False
+                     and summary["removed"] == 1 and store.get_kyc_status(gone) is False
+                     and all(store.get_kyc_status(investor["xrpl_did"]) for investor in added))
+    finally:
+        server.close()
+        await server.wait_closed()
+    return {"dids": dids, "latency_ms": latency_ms, "page_limit": page_limit, "results": results, "follow_ok": follow_ok}
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Load on-ledger DIDs and KYC credentials into the KYC store.")
+    parser.add_argument("--url", default=config.XRPL_NETWORK_URL, help="rippled websocket URL (e.g. ws://127.0.0.1:6006 for mock_rippled.py)")
+    parser.add_argument("--ranges", type=int, default=config.LEDGER_SYNC_RANGES, help="Key-space ranges paged concurrently")
+    parser.add_argument("--page-limit", type=int, default=config.LEDGER_SYNC_PAGE_LIMIT, help="Objects per ledger_data page")
+    parser.add_argument("--issuer", default=config.KYC_CREDENTIAL_ISSUER,
+                        help="XRPL address of the KYC credential issuer (default: KYC_CREDENTIAL_ISSUER)")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    sync_parser = subcommands.add_parser("sync", help="Sync the KYC store with a validated ledger")
+    sync_parser.add_argument("--store", default=config.KYC_STORE_URL, help="KYC store URL (default: KYC_STORE_URL)")
+    sync_parser.add_argument("--ledger-index", type=int, help="Ledger to sync at (default: the latest validated)")
+    sync_parser.add_argument("--follow", action="store_true", help="Keep applying changes from later ledgers")
+    bench_parser = subcommands.add_parser("bench", help="Measure sync throughput against an in-process mock rippled")
+    bench_parser.add_argument("--dids", type=int, default=20000)
+    bench_parser.add_argument("--approved-ratio", type=float, default=0.6)
+    bench_parser.add_argument("--range-counts", type=int, nargs="+", default=[1, 4, 16], help="Range counts to compare")
+    bench_parser.add_argument("--latency-ms", type=float, default=20, help="Delay the mock adds to every response")
+    bench_parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    if args.command == "bench":
+        result = asyncio.run(bench(args.dids, args.approved_ratio, args.range_counts, args.latency_ms, args.page_limit,
+                                   config.XRPL_WS_POOL_SIZE))
+        print(f"{args.dids} DID(s), {args.latency_ms:.0f}ms per request:")
+        for run in result["results"]:
+            print(f"  {run['ranges']:>3} range(s): {run['seconds']:.2f}s ({run['dids_per_second']:.0f} DIDs/s, "
+                  f"{run['requests']} requests){'' if run['complete'] else ' -- INCOMPLETE'}")
+        print(f"  follow mode: {'ok' if result['follow_ok'] else 'FAILED'}")
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(result, f, indent=4)
+            print(f"Results saved to {args.output}")
+        return
+
+    store = open_kyc_store(args.store)
+    try:
+        sync = LedgerKYCSync(store, url=args.url, ranges=args.ranges, page_limit=args.page_limit, credential_issuer=args.issuer)
+    except ValueError as e:
+        store.close()
+        raise SystemExit(f"Error: {e}")
+
+    async def run():
+        try:
+            summary = await sync.sync(args.ledger_index)
+            print(f"Synced {summary['dids']} DID(s) ({summary['kyc_approved']} KYC approved) at ledger "
+                  f"{summary['ledger_index']} in {summary['seconds']:.2f}s ({summary['pages']} page(s)) into {args.store}; "
+                  f"{summary['removed']} earlier record(s) no longer on the ledger.")
+            if args.follow:
+                print(f"Following new validated ledgers every {config.LEDGER_SYNC_POLL_INTERVAL}s...")
+                await sync.follow()
+        finally:
+            await sync.close()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# scripts/local_evm.py
+from web3 import Web3
+
+from contract_artifacts import load_artifact
+
+# Helpers for running benchmarks and simulations against a local EVM: either the
+# in-process eth-tester backend ("tester", needs `pip install "web3[tester]"`) or an
+# anvil/hardhat-style node URL whose first account is unlocked and funded.
+
+
+def connect(evm="tester"):
+    if evm == "tester":
+        from web3 import EthereumTesterProvider
+        w3 = Web3(EthereumTesterProvider())
+    else:
+        w3 = Web3(Web3.HTTPProvider(evm))
+    if not w3.is_connected():
+        raise ConnectionError(f"Could not connect to local EVM at {evm}")
+    return w3
+
+
+def funded_account(w3, amount_ether=1000, private_key=None):
+    # A keyed account (so it can sign raw transactions like the real scripts do),
+    # funded from the node's unlocked default account.
+    account = w3.eth.account.from_key(private_key) if private_key else w3.eth.account.create()
+    tx_hash = w3.eth.send_transaction({
+        'from': w3.eth.accounts[0],
+        'to': account.address,
+        'value': w3.to_wei(amount_ether, 'ether'),
+    })
+    w3.eth.wait_for_transaction_receipt(tx_hash)
+    return account
+
+
+def send_transaction(w3, account, contract_function, value=0, gas=None):
+    # Build, sign and send one transaction, then wait for its receipt.
+    tx_params = {
+        'chainId': w3.eth.chain_id,
+        'gasPrice': w3.eth.gas_price,
+        'from': account.address,
+        'nonce': w3.eth.get_transaction_count(account.address, 'pending'),
+    }
+    if value:
+        tx_params['value'] = value
+    if gas is not None:
+        tx_params['gas'] = gas
+    transaction = contract_function.build_transaction(tx_params)
+    signed_txn = account.sign_transaction(transaction)
+    tx_hash = w3.eth.send_raw_transaction(signed_txn.rawTransaction)
+    return w3.eth.wait_for_transaction_receipt(tx_hash)
+
+
+def deploy_contract(w3, account, contract_name, *constructor_args):
+    return deploy_artifact(w3, account, load_artifact(contract_name), *constructor_args)
+
+
+def deploy_artifact(w3, account, artifact, *constructor_args):
+    # Same as deploy_contract, for an artifact compiled from other sources (e.g. an older revision).
+    factory = w3.eth.contract(abi=artifact['abi'], bytecode=artifact['bytecode'])
+    receipt = send_transaction(w3, account, factory.constructor(*constructor_args))
+    return w3.eth.contract(address=receipt.contractAddress, abi=artifact['abi']), receipt
+
+
+def deploy_gcb_token(w3, owner, initial_supply_tokens=1_000_000, kyc_oracle_address=None):
+    return deploy_contract(
+        w3, owner, "GCBToken",
+        w3.to_wei(initial_supply_tokens, 'ether'),
+        kyc_oracle_address or owner.address,
+    )
@@ -0,0 +1,303 @@
+# scripts/merkle_payouts.py
+import argparse
+import csv
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from Crypto.Hash import keccak
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import config
+
+# Snapshot-based payouts for GCBMerkleDistributor.
+#
+#   build:  holder-balance snapshot CSV (address,balance) + amount to distribute
+#           -> pro-rata shares -> sorted-pair Merkle tree -> indexed proof file
+#   proof:  look up one holder's proof from the proof file
+#   serve:  HTTP proof service (GET /proof/<address>)
+#   publish: fund a distribution on-chain with the tree's root
+#
+# Leaves are keccak256(abi.encodePacked(uint256 index, address account, uint256 amount)),
+# with holders ordered by address, so a holder's leaf index is their rank in the file.
+#
+# Proof file layout (little-endian):
+#   header    magic "GCBMRKL1", leaf count (u64), level count (u32), root (32 bytes)
+#   offsets   start of every tree level in the file (u64 per level)
+#   buckets   65537 x u32: first record index for each 2-byte address prefix
+#   records   leaf count x (address 20 bytes + amount 32 bytes), sorted by address
+#   levels    every tree level, 32 bytes per node, leaves first
+# Proofs are read straight from an mmap of the file: a bucket lookup finds the holder
+# in a handful of records and each proof node is one fixed-offset read, so serving
+# never loads the tree into memory.
+
+PROOF_FILE_MAGIC = b"GCBMRKL1"
+HEADER = struct.Struct("<8sQI32s")
+RECORD_SIZE = 52
+BUCKET_COUNT = 1 << 16
+PARALLEL_THRESHOLD = 1 << 16  # Levels smaller than this are hashed in-process.
+
+
+def _keccak(data):
+    return keccak.new(digest_bits=256, data=data).digest()
+
+
+def _hash_leaves(args):
+    first_index, records = args
+    hashes = bytearray()
+    for offset in range(0, len(records), RECORD_SIZE):
+        index = first_index + offset // RECORD_SIZE
+        hashes += _keccak(index.to_bytes(32, 'big') + records[offset:offset + RECORD_SIZE])
+    return bytes(hashes)
+
+
+def _hash_pairs(level):
+    # Sorted-pair hashing as in OpenZeppelin's MerkleProof. An odd last node is
+    # promoted unchanged to the next level.
+    parents = bytearray()
+    for offset in range(0, len(level) - 32, 64):
+        left = level[offset:offset + 32]
+        right = level[offset + 32:offset + 64]
+        parents += _keccak(left + right if left <= right else right + left)
+    if (len(level) // 32) % 2 == 1:
+        parents += level[-32:]
+    return bytes(parents)
+
+
+def _split(buffer, item_size, parts, align=1):
+    # Cut a buffer of fixed-size items into roughly equal chunks on item boundaries.
+    items = len(buffer) // item_size
+    per_chunk = max(align, -(-items // parts) // align * align)
+    return [(start, buffer[start * item_size:(start + per_chunk) * item_size]) for start in range(0, items, per_chunk)]
+
+
+def build_tree(records, pool=None, workers=1):
+    # records: concatenated 52-byte leaf records. Returns the list of levels (leaves first).
+    if pool is not None and len(records) // RECORD_SIZE >= PARALLEL_THRESHOLD:
+        leaves = b"".join(pool.map(_hash_leaves, _split(records, RECORD_SIZE, workers * 4)))
+    else:
+        leaves = _hash_leaves((0, records))
+
+    levels = [leaves]
+    while len(levels[-1]) > 32:
+        level = levels[-1]
+        if pool is not None and len(level) // 32 >= PARALLEL_THRESHOLD:
+            # Chunks hold an even number of nodes so no pair is split between workers.
+            chunks = [chunk for _, chunk in _split(level, 32, workers * 4, align=2)]
+            levels.append(b"".join(pool.map(_hash_pairs, chunks)))
+        else:
+            levels.append(_hash_pairs(level))
+    return levels
+
+
+def load_snapshot(snapshot_path):
+    # CSV with "address,balance" columns (balances in token base units).
+    balances = {}
+    with open(snapshot_path, newline='') as f:
+        for row in csv.DictReader(f):
+            balance = int(row['balance'])
+            if balance > 0:
+                address = bytes.fromhex(row['address'][2:] if row['address'].startswith('0x') else row['address'])
+                balances[address] = balances.get(address, 0) + balance
+    return balances
+
+
+def compute_shares(balances, total_amount):
+    # Pro-rata shares, rounded down; the rounding dust stays undistributed.
+    total_balance = sum(balances.values())
+    if total_balance == 0:
+        raise ValueError("Snapshot has no balances")
+    shares = {address: total_amount * balance // total_balance for address, balance in balances.items()}
+    return {address: amount for address, amount in shares.items() if amount > 0}
+
+
+def write_proof_file(path, records, levels):
+    leaf_count = len(records) // RECORD_SIZE
+    buckets = [0] * (BUCKET_COUNT + 1)
+    for offset in range(0, len(records), RECORD_SIZE):
+        buckets[int.from_bytes(records[offset:offset + 2], 'big') + 1] += 1
+    for prefix in range(1, BUCKET_COUNT + 1):
+        buckets[prefix] += buckets[prefix - 1]
+
+    offsets_start = HEADER.size
+    records_start = offsets_start + 8 * len(levels) + 4 * (BUCKET_COUNT + 1)
+    level_offsets = []
+    position = records_start + len(records)
+    for level in levels:
+        level_offsets.append(position)
+        position += len(level)
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(PROOF_FILE_MAGIC, leaf_count, len(levels), levels[-1]))
+        f.write(struct.pack(f"<{len(levels)}Q", *level_offsets))
+        f.write(struct.pack(f"<{BUCKET_COUNT + 1}I", *buckets))
+        f.write(records)
+        for level in levels:
+            f.write(level)
+    os.replace(tmp_path, path)
+
+
+def build_payouts(snapshot_path, total_amount, output_path, workers=None):
+    started = time.perf_counter()
+    shares = compute_shares(load_snapshot(snapshot_path), total_amount)
+    records = b"".join(address + amount.to_bytes(32, 'big') for address, amount in sorted(shares.items()))
+    loaded = time.perf_counter()
+
+    workers = workers or os.cpu_count() or 1
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            levels = build_tree(records, pool, workers)
+    else:
+        levels = build_tree(records)
+    built = time.perf_counter()
+
+    write_proof_file(output_path, records, levels)
+    distributed = sum(shares.values())
+    summary = {
+        "root": "0x" + levels[-1].hex(),
+        "holders": len(shares),
+        "total_amount": str(total_amount),
+        "distributed_amount": str(distributed),
+        "dust": str(total_amount - distributed),
+        "proof_file": output_path,
+    }
+    with open(output_path + ".json", "w") as f:
+        json.dump(summary, f, indent=4)
+    print(f"Built payout tree for {len(shares)} holder(s): root {summary['root']}")
+    print(f"  snapshot + shares: {loaded - started:.2f}s, tree ({workers} worker(s)): {built - loaded:.2f}s, "
+          f"write: {time.perf_counter() - built:.2f}s")
+    return summary
+
+
+class ProofFile:
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.leaf_count, level_count, self.root = HEADER.unpack_from(self._mm, 0)
+        if magic != PROOF_FILE_MAGIC:
+            raise ValueError(f"{path} is not a payout proof file")
+        self._level_offsets = struct.unpack_from(f"<{level_count}Q", self._mm, HEADER.size)
+        self._buckets_start = HEADER.size + 8 * level_count
+        self._records_start = self._buckets_start + 4 * (BUCKET_COUNT + 1)
+        self._level_sizes = []
+        size = self.leaf_count
+        for _ in range(level_count):
+            self._level_sizes.append(size)
+            size = (size + 1) // 2
+
+    def find(self, address):
+        # Returns (leaf index, amount) or None.
+        address = bytes.fromhex(address[2:] if address.startswith('0x') else address)
+        prefix = int.from_bytes(address[:2], 'big')
+        first, last = struct.unpack_from("<II", self._mm, self._buckets_start + 4 * prefix)
+        for index in range(first, last):
+            offset = self._records_start + index * RECORD_SIZE
+            if self._mm[offset:offset + 20] == address:
+                return index, int.from_bytes(self._mm[offset + 20:offset + RECORD_SIZE], 'big')
+        return None
+
+    def proof(self, address):
+        found = self.find(address)
+        if found is None:
+            return None
+        index, amount = found
+        proof = []
+        position = index
+        for level_offset, level_size in zip(self._level_offsets[:-1], self._level_sizes[:-1]):
+            sibling = position ^ 1
+            if sibling < level_size:
+                node_offset = level_offset + sibling * 32
+                proof.append("0x" + self._mm[node_offset:node_offset + 32].hex())
+            position //= 2
+        return {"index": index, "amount": str(amount), "proof": proof, "root": "0x" + self.root.hex()}
+
+    def close(self):
+        self._mm.close()
+        self._file.close()
+
+
+def serve(proof_file_path, port):
+    from flask import Flask, jsonify
+
+    app = Flask(__name__)
+    proofs = ProofFile(proof_file_path)
+
+    @app.route('/proof/<address>', methods=['GET'])
+    def get_proof(address):
+        if len(address) not in (40, 42):
+            return jsonify({"success": False, "error": "Invalid address"}), 400
+        result = proofs.proof(address.lower())
+        if result is None:
+            return jsonify({"success": False, "error": "Address is not in this distribution"}), 404
+        return jsonify(dict(result, success=True, account=address)), 200
+
+    print(f"Serving proofs for root 0x{proofs.root.hex()} ({proofs.leaf_count} holders) on http://localhost:{port}")
+    app.run(port=port, debug=False, threaded=True)
+
+
+def publish(summary_path, distributor_address, snapshot_block):
+    from web3 import Web3
+    from contract_artifacts import load_artifact
+
+    with open(summary_path) as f:
+        summary = json.load(f)
+    w3 = Web3(Web3.HTTPProvider(config.EVM_NETWORK_URL))
+    deployer_private_key = config.EVM_DEPLOYER_PRIVATE_KEY
+    if not deployer_private_key.startswith('0x'):
+        deployer_private_key = '0x' + deployer_private_key
+    owner_account = w3.eth.account.from_key(deployer_private_key)
+    distributor = w3.eth.contract(address=distributor_address, abi=load_artifact('GCBMerkleDistributor')['abi'])
+
+    amount = int(summary['distributed_amount'])
+    tx = distributor.functions.createDistribution(summary['root'], snapshot_block).build_transaction({
+        'chainId': w3.eth.chain_id,
+        'gasPrice': w3.eth.gas_price,
+        'from': owner_account.address,
+        'nonce': w3.eth.get_transaction_count(owner_account.address, 'pending'),
+        'value': amount,
+    })
+    tx_hash = w3.eth.send_raw_transaction(owner_account.sign_transaction(tx).rawTransaction)
+    receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+    print(f"Distribution of {w3.from_wei(amount, 'ether')} for root {summary['root']} "
+          f"{'created' if receipt.status == 1 else 'FAILED'}. Tx Hash: {tx_hash.hex()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build, serve and publish snapshot-based Merkle payouts.")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subcommands.add_parser("build", help="Build a payout tree and proof file from a snapshot CSV")
+    build_parser.add_argument("snapshot", help="CSV with address,balance columns")
+    build_parser.add_argument("amount_wei", type=int, help="Total amount to distribute (wei)")
+    build_parser.add_argument("--output", default="payouts.bin", help="Proof file to write")
+    build_parser.add_argument("--workers", type=int, help="Hashing processes (default: CPU count)")
+
+    proof_parser = subcommands.add_parser("proof", help="Print one holder's proof")
+    proof_parser.add_argument("address")
+    proof_parser.add_argument("--proof-file", default="payouts.bin")
+
+    serve_parser = subcommands.add_parser("serve", help="Serve proofs over HTTP")
+    serve_parser.add_argument("--proof-file", default="payouts.bin")
+    serve_parser.add_argument("--port", type=int, default=config.ORACLE_PORT + 1)
+
+    publish_parser = subcommands.add_parser("publish", help="Fund a distribution on GCBMerkleDistributor")
+    publish_parser.add_argument("distributor", help="GCBMerkleDistributor contract address")
+    publish_parser.add_argument("snapshot_block", type=int)
+    publish_parser.add_argument("--proof-file", default="payouts.bin")
+
+    args = parser.parse_args()
+    if args.command == "build":
+        build_payouts(args.snapshot, args.amount_wei, args.output, args.workers)
+    elif args.command == "proof":
+        result = ProofFile(args.proof_file).proof(args.address.lower())
+        print(json.dumps(result, indent=4) if result else f"{args.address} is not in this distribution")
+    elif args.command == "serve":
+        serve(args.proof_file, args.port)
+    else:
+        publish(args.proof_file + ".json", args.distributor, args.snapshot_block)
@@ -0,0 +1,257 @@
+# scripts/mock_rippled.py
+import argparse
+import asyncio
+import bisect
+import hashlib
+import json
+import os
+import random
+import sys
+
+import websockets
+from xrpl.core.addresscodec import decode_classic_address, encode_classic_address
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import config
+from kyc_store import iter_investors_json
+
+# A minimal rippled websocket endpoint for exercising did_resolver.py and
+# ledger_kyc_sync.py offline: answers ledger_entry (did), account_objects (type
+# credential), ledger_data (paged by marker, optionally filtered by type, at any past
+# ledger index), ledger (with expanded transactions and metadata) and server_info for
+# the investors in a gcb_kyc_data.json file or a synthetic population. Every investor
+# gets a DID object; approved investors also hold an accepted credential of
+# KYC_CREDENTIAL_TYPE. --latency-ms delays each response, to stand in for a remote node,
+# and --ledger-interval closes a ledger with a new investor every few seconds.
+
+LEDGER_INDEX = 1000
+ISSUER = "rHb9CJAWyB4rj91VRWn96DkukG4bwdtyTh"  # Genesis account, used as the KYC issuer
+LSF_ACCEPTED = 0x00010000
+LEDGER_DATA_MAX_LIMIT = 256  # rippled's page size cap for JSON ledger_data
+LEDGER_ENTRY_TYPES = {"did": "DID", "credential": "Credential"}
+
+
+def _key(space, *parts):
+    # A ledger object key: SHA-512Half of the keylet space and the object's identifying fields.
+    return hashlib.sha512(space.to_bytes(2, "big") + b"".join(parts)).digest()[:32].hex().upper()
+
+
+def did_key(account):
+    return _key(ord("I"), decode_classic_address(account))
+
+
+def credential_key(subject, issuer, credential_type):
+    return _key(ord("D"), decode_classic_address(subject), decode_classic_address(issuer), bytes.fromhex(credential_type))
+
+
+def synthetic_investors(count, approved_ratio=0.6, seed=None):
+    # DID-only investor records (random classic addresses) for mock ledgers and benchmarks.
+    rng = random.Random(seed)
+    return [
+        {"xrpl_did": f"did:xrpl:{encode_classic_address(rng.randbytes(20))}", "kyc_approved": rng.random() < approved_ratio}
+        for _ in range(count)
+    ]
+
+
+class MockLedger:
+    def __init__(self, investors, credential_type=None, issuer=ISSUER):
+        self.credential_type = (credential_type or config.KYC_CREDENTIAL_TYPE).encode().hex().upper()
+        self.issuer = issuer
+        self.ledger_index = LEDGER_INDEX  # Last validated ledger
+        self.dids = {}  # account -> DID ledger object
+        self.credentials = {}  # account -> [Credential ledger objects]
+        self.objects = {}  # ledger key -> [object, ledger it was created in, ledger it was deleted in or None]
+        self.keys = []  # Sorted ledger keys, for ledger_data markers
+        self.transactions = {}  # ledger index -> [transactions with metadata]
+        for investor in investors:
+            self._create_investor(investor, LEDGER_INDEX)
+        self.keys.sort()
+        self.requests = 0
+
+    def _add_object(self, node, ledger_index, sort=False):
+        self.objects[node["index"]] = [node, ledger_index, None]
+        if sort:
+            bisect.insort(self.keys, node["index"])
+        else:
+            self.keys.append(node["index"])
+
+    def _create_investor(self, investor, ledger_index, sort=False):
+        # Returns the ledger objects created.
+        account = investor["xrpl_did"].split(":")[-1]
+        created = [{
+            "LedgerEntryType": "DID",
+            "Account": account,
+            "URI": f"https://kyc.example/{account}".encode().hex().upper(),
+            "Flags": 0,
+            "index": did_key(account),
+        }]
+        self.dids[account] = created[0]
+        if investor.get("kyc_approved"):
+            created.append({
+                "LedgerEntryType": "Credential",
+                "Subject": account,
+                "Issuer": self.issuer,
+                "CredentialType": self.credential_type,
+                "Flags": LSF_ACCEPTED,
+                "index": credential_key(account, self.issuer, self.credential_type),
+            })
+            self.credentials[account] = [created[1]]
+        for node in created:
+            self._add_object(node, ledger_index, sort)
+        return created
+
+    def _revoke_credentials(self, account, ledger_index):
+        # Returns the ledger objects deleted.
+        deleted = self.credentials.pop(account, [])
+        for node in deleted:
+            self.objects[node["index"]][2] = ledger_index
+        return deleted
+
+    def close_ledger(self, new_investors=(), revoked=()):
+        # Validates the next ledger: creates DIDs (and credentials) for `new_investors` and
+        # deletes the KYC credentials of the `revoked` accounts, one transaction each.
+        self.ledger_index += 1
+        transactions = []
+        for investor in new_investors:
+            created = self._create_investor(investor, self.ledger_index, sort=True)
+            transactions.append(self._transaction("DIDSet", created[0]["Account"],
+                                                  [{"CreatedNode": self._node(node, "NewFields")} for node in created]))
+        for account in revoked:
+            deleted = self._revoke_credentials(account, self.ledger_index)
+            transactions.append(self._transaction("CredentialDelete", self.issuer,
+                                                  [{"DeletedNode": self._node(node, "FinalFields")} for node in deleted]))
+        self.transactions[self.ledger_index] = transactions
+        return self.ledger_index
+
+    @staticmethod
+    def _node(node, fields_key):
+        return {
+            "LedgerEntryType": node["LedgerEntryType"],
+            "LedgerIndex": node["index"],
+            fields_key: {field: value for field, value in node.items() if field not in ("LedgerEntryType", "index")},
+        }
+
+    def _transaction(self, transaction_type, account, affected_nodes):
+        # API v2 shape of an expanded transaction in a `ledger` response.
+        tx_hash = hashlib.sha256(json.dumps(affected_nodes, sort_keys=True).encode() + str(self.ledger_index).encode())
+        return {
+            "hash": tx_hash.hexdigest().upper(),
+            "tx_json": {"TransactionType": transaction_type, "Account": account},
+            "meta": {"TransactionResult": "tesSUCCESS", "AffectedNodes": affected_nodes},
+        }
+
+    def _ledger_index(self, value):
+        if value in (None, "validated", "current", "closed"):
+            return self.ledger_index
+        return int(value)
+
+    def _ledger_data(self, request):
+        ledger_index = self._ledger_index(request.get("ledger_index"))
+        if ledger_index > self.ledger_index:
+            return None, "lgrNotFound"
+        entry_type = request.get("type")
+        if entry_type is not None and entry_type not in LEDGER_ENTRY_TYPES:
+            return None, "invalidParams"
+        entry_type = LEDGER_ENTRY_TYPES.get(entry_type)
+        limit = min(int(request.get("limit") or LEDGER_DATA_MAX_LIMIT), LEDGER_DATA_MAX_LIMIT)
+        marker = request.get("marker")
+        # Like rippled, the marker is an exclusive lower bound on the ledger key, so any key works.
+        position = bisect.bisect_right(self.keys, marker.upper()) if marker else 0
+        state, next_marker = [], None
+        for key in self.keys[position:]:
+            node, created_in, deleted_in = self.objects[key]
+            if created_in > ledger_index or (deleted_in is not None and deleted_in <= ledger_index):
+                continue
+            if entry_type is not None and node["LedgerEntryType"] != entry_type:
+                continue
+            if len(state) == limit:
+                next_marker = state[-1]["index"]
+                break
+            state.append(node)
+        result = {"ledger_index": ledger_index, "state": state, "validated": True}
+        if next_marker is not None:
+            result["marker"] = next_marker
+        return result, None
+
+    def _ledger(self, request):
+        ledger_index = self._ledger_index(request.get("ledger_index"))
+        if ledger_index > self.ledger_index:
+            return None, "lgrNotFound"
+        ledger = {"ledger_index": str(ledger_index), "closed": True}
+        if request.get("transactions"):
+            transactions = self.transactions.get(ledger_index, [])
+            ledger["transactions"] = transactions if request.get("expand") else [tx["hash"] for tx in transactions]
+        return {"ledger_index": ledger_index, "ledger": ledger, "validated": True}, None
+
+    def handle(self, request):
+        self.requests += 1
+        command = request.get("command")
+        if command == "ledger_entry":
+            node = self.dids.get(request.get("did"))
+            if node is None:
+                return None, "entryNotFound"
+            return {"index": node["index"], "ledger_index": self.ledger_index, "node": node, "validated": True}, None
+        if command == "account_objects":
+            account = request.get("account")
+            if account not in self.dids:
+                return None, "actNotFound"
+            objects = self.credentials.get(account, []) if request.get("type") in (None, "credential") else []
+            return {"account": account, "account_objects": objects, "ledger_index": self.ledger_index, "validated": True}, None
+        if command == "ledger_data":
+            return self._ledger_data(request)
+        if command == "ledger":
+            return self._ledger(request)
+        if command == "server_info":
+            return {"info": {"build_version": "mock", "validated_ledger": {"seq": self.ledger_index}}}, None
+        return None, "unknownCmd"
+
+
+async def serve(ledger, host, port, latency_ms=0):
+    async def respond(websocket, request):
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000.0)
+        result, error = ledger.handle(request)
+        if error:
+            response = {"id": request.get("id"), "status": "error", "type": "response", "error": error, "request": request}
+        else:
+            response = {"id": request.get("id"), "status": "success", "type": "response", "result": result}
+        await websocket.send(json.dumps(response))
+
+    async def connection(websocket):
+        # Requests on one connection are answered concurrently, like rippled does.
+        tasks = set()
+        async for message in websocket:
+            task = asyncio.create_task(respond(websocket, json.loads(message)))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+    return await websockets.serve(connection, host, port, max_size=None)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a mock rippled websocket endpoint seeded from a KYC data file.")
+    parser.add_argument("--data", default="gcb_kyc_data.json")
+    parser.add_argument("--synthetic", type=int, help="Serve this many random investors instead of --data")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6006)
+    parser.add_argument("--latency-ms", type=float, default=0, help="Delay added to every response")
+    parser.add_argument("--ledger-interval", type=float, default=0,
+                        help="Close a ledger with one new investor every this many seconds (0: never)")
+    args = parser.parse_args()
+
+    ledger = MockLedger(synthetic_investors(args.synthetic) if args.synthetic else iter_investors_json(args.data))
+
+    async def main():
+        await serve(ledger, args.host, args.port, args.latency_ms)
+        print(f"Mock rippled serving {len(ledger.dids)} DID(s) on ws://{args.host}:{args.port}")
+        while True:
+            if not args.ledger_interval:
+                await asyncio.Future()
+            await asyncio.sleep(args.ledger_interval)
+            ledger.close_ledger(synthetic_investors(1))
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
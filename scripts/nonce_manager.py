@@ -0,0 +1,504 @@
+# scripts/nonce_manager.py
+import asyncio
+import heapq
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from oracle_metrics import NONCE_GAPS_FILLED, SEND_RETRIES, TRANSACTIONS, log_event, record_stage, span
+from receipt_tracker import AsyncReceiptTracker, ReceiptTracker
+
+# Error fragments returned by geth-style nodes when the nonce we used is taken by
+# another transaction.
+NONCE_TAKEN_MARKERS = (
+    'nonce too low',
+    'replacement transaction underpriced',
+    'oldnonce',
+)
+# ... and when this exact signed transaction is already in the node's mempool.
+ALREADY_KNOWN_MARKERS = (
+    'already known',
+    'known transaction',
+)
+NONCE_ERROR_MARKERS = NONCE_TAKEN_MARKERS + ALREADY_KNOWN_MARKERS
+
+
+def _error_matches(error, markers):
+    message = str(error).lower()
+    return any(marker in message for marker in markers)
+
+
+def is_nonce_error(error):
+    return _error_matches(error, NONCE_ERROR_MARKERS)
+
+
+def is_nonce_taken(error):
+    return _error_matches(error, NONCE_TAKEN_MARKERS)
+
+
+def is_already_known(error):
+    return _error_matches(error, ALREADY_KNOWN_MARKERS)
+
+
+class NonceManager:
+    """
+    Hands out nonces for one signing account locally so transactions can be sent
+    back to back, and confirms them through a ReceiptTracker (its own, or `tracker`
+    when several managers share one connection).
+
+    Every submission gets a record (keyed by `record_id`) that moves from
+    'pending' to 'confirmed', 'reverted' or 'error'. With a `journal`
+    (attestation_journal.py), each signed transaction is made durable before it is
+    broadcast and its receipt is appended when it settles. Failed sends are not
+    journaled as final: the node may have accepted the transaction anyway, so the next
+    startup reconciles them.
+    """
+
+    tracker_class = ReceiptTracker
+
+    def __init__(self, w3, account, private_key, gas_price_ttl=15, poll_interval=1.0,
+                 gap_fill_after=30, max_send_attempts=3, max_records=10000, journal=None, tracker=None,
+                 confirmations=0):
+        self.w3 = w3
+        self.account = account
+        self.private_key = private_key
+        self.gas_price_ttl = gas_price_ttl
+        self.poll_interval = poll_interval
+        self.gap_fill_after = gap_fill_after
+        self.max_send_attempts = max_send_attempts
+        self.max_records = max_records
+        self.journal = journal
+        self._owns_tracker = tracker is None
+        self.tracker = tracker or self.tracker_class(w3, confirmations=confirmations, poll_interval=poll_interval)
+
+        self.chain_id = None  # Loaded by the first sync()
+        self._lock = threading.Lock()
+        self._next_nonce = None
+        self._released = []  # min-heap of nonces that were handed out but never broadcast
+        self._released_at = {}
+        self._gas_price = None
+        self._gas_price_at = 0
+
+        self.records = OrderedDict()
+        self._pending = {}  # tx hash -> record id
+        self._stop = threading.Event()
+        self._gap_filler = None
+
+    # --- Nonces ---
+
+    def sync(self):
+        # (Re)load the next nonce from the node, discarding any local state.
+        if self.chain_id is None:
+            self.chain_id = self.w3.eth.chain_id
+        return self._reset_nonce(self.w3.eth.get_transaction_count(self.account.address, 'pending'))
+
+    def _reset_nonce(self, chain_nonce):
+        with self._lock:
+            self._next_nonce = chain_nonce
+            self._released = []
+            self._released_at = {}
+        return chain_nonce
+
+    def next_nonce(self):
+        # The nonce the next submission will use (None until the first sync).
+        with self._lock:
+            return self._released[0] if self._released else self._next_nonce
+
+    def _allocate(self):
+        # Callers sync() (or start()) first: sync is a coroutine on AsyncNonceManager, so
+        # it cannot be called from here.
+        if self._next_nonce is None:
+            raise RuntimeError("NonceManager has not synced its nonce yet")
+        with self._lock:
+            if self._released:
+                nonce = heapq.heappop(self._released)
+                self._released_at.pop(nonce, None)
+                return nonce
+            nonce = self._next_nonce
+            self._next_nonce += 1
+            return nonce
+
+    def _release(self, nonce):
+        # A nonce that never reached the node must be reused, otherwise every later
+        # transaction is stuck behind the gap.
+        with self._lock:
+            if nonce == self._next_nonce - 1:
+                self._next_nonce -= 1
+                while self._next_nonce - 1 in self._released_at:
+                    self._next_nonce -= 1
+                    self._released.remove(self._next_nonce)
+                    self._released_at.pop(self._next_nonce)
+                heapq.heapify(self._released)
+            else:
+                heapq.heappush(self._released, nonce)
+                self._released_at[nonce] = time.time()
+
+    def _skip_used_nonces(self):
+        # Someone else (another process, a manual tx) consumed our nonces: move past them.
+        self._advance_past(self.w3.eth.get_transaction_count(self.account.address, 'pending'))
+
+    def _advance_past(self, chain_nonce):
+        with self._lock:
+            self._released = [n for n in self._released if n >= chain_nonce]
+            heapq.heapify(self._released)
+            self._released_at = {n: t for n, t in self._released_at.items() if n >= chain_nonce}
+            self._next_nonce = max(self._next_nonce or 0, chain_nonce)
+
+    def gas_price(self):
+        if self._gas_price_expired():
+            self._set_gas_price(self.w3.eth.gas_price)
+        return self._gas_price
+
+    def _gas_price_expired(self):
+        return self._gas_price is None or time.time() - self._gas_price_at > self.gas_price_ttl
+
+    def _set_gas_price(self, gas_price):
+        self._gas_price = gas_price
+        self._gas_price_at = time.time()
+
+    # --- Submission ---
+
+    def submit(self, contract_function, record_id=None, gas=None, value=None, meta=None, intent=None):
+        # `intent` (e.g. the addresses and statuses of a KYC batch) is journaled with the transaction.
+        record = self._new_record(record_id, meta)
+        if self._next_nonce is None:
+            self.sync()
+
+        last_error = None
+        for _ in range(self.max_send_attempts):
+            nonce = self._allocate()
+            tx_params = self._tx_params(nonce, self.gas_price(), gas, value)
+            signed_txn = None
+            try:
+                with span('build_transaction'):
+                    transaction = contract_function.build_transaction(tx_params)
+                signed_txn = self._sign(transaction)
+                if self.journal is not None:
+                    with span('journal_commit'):
+                        self.journal.commit(self._signed_entry(record, signed_txn, nonce, intent))
+                with span('send_raw_transaction'):
+                    tx_hash = self.w3.eth.send_raw_transaction(signed_txn.rawTransaction)
+            except Exception as e:
+                if signed_txn is not None and is_already_known(e):
+                    # The node already has this very transaction (e.g. a retried send):
+                    # it is in flight, and signing it again would submit it twice.
+                    return self._sent(record, nonce, signed_txn.hash)
+                if not self._retry_after(record, nonce, e):
+                    raise
+                last_error = e
+                self._skip_used_nonces()
+                continue
+            return self._sent(record, nonce, tx_hash)
+
+        self._give_up(record, last_error)
+
+    # Shared by NonceManager and AsyncNonceManager: everything in a submission but the RPC calls.
+
+    def _new_record(self, record_id, meta):
+        record = {
+            'id': record_id or uuid.uuid4().hex,
+            'status': 'sending',
+            'tx_hash': None,
+            'nonce': None,
+            'block_number': None,
+            'gas_used': None,
+            'error': None,
+            'submitted_at': time.time(),
+            'meta': meta or {},
+        }
+        self._remember(record)
+        return record
+
+    def _tx_params(self, nonce, gas_price, gas=None, value=None):
+        tx_params = {
+            'chainId': self.chain_id,
+            'gasPrice': gas_price,
+            'from': self.account.address,
+            'nonce': nonce,
+        }
+        if gas is not None:
+            tx_params['gas'] = gas
+        if value:
+            tx_params['value'] = value
+        return tx_params
+
+    def _sign(self, transaction):
+        with span('sign'):
+            return self.w3.eth.account.sign_transaction(transaction, private_key=self.private_key)
+
+    def _signed_entry(self, record, signed_txn, nonce, intent):
+        return self.journal.signed_entry(record, signed_txn, self.account.address, nonce, self.chain_id, intent)
+
+    def _retry_after(self, record, nonce, error):
+        # Whether a failed send should be retried with a fresh nonce: only when its nonce
+        # was taken. Otherwise the nonce is released and the record fails.
+        if is_nonce_taken(error):
+            SEND_RETRIES.inc()
+            return True
+        self._release(nonce)
+        record.update(status='error', error=str(error))
+        TRANSACTIONS.inc(status='error')
+        return False
+
+    def _sent(self, record, nonce, tx_hash):
+        tx_hash_hex = tx_hash.hex()
+        with self._lock:
+            record.update(status='pending', tx_hash=tx_hash_hex, nonce=nonce)
+            self._pending[tx_hash_hex] = record['id']
+        self._track(record)
+        return record
+
+    def _give_up(self, record, last_error):
+        record.update(status='error', error=str(last_error))
+        TRANSACTIONS.inc(status='error')
+        raise last_error
+
+    def _remember(self, record):
+        with self._lock:
+            self.records[record['id']] = record
+            while len(self.records) > self.max_records:
+                oldest_id, oldest = next(iter(self.records.items()))
+                if oldest['status'] in ('pending', 'sending'):
+                    break
+                self.records.pop(oldest_id)
+
+    def restore(self, entry):
+        # Recreates the record of a transaction sent before a restart (a reconciled journal
+        # entry); one that is still in flight is confirmed in the background again.
+        record = {
+            'id': entry['record_id'],
+            'status': entry['status'],
+            'tx_hash': entry['tx_hash'],
+            'nonce': entry['nonce'],
+            'block_number': entry.get('block_number'),
+            'gas_used': entry.get('gas_used'),
+            'error': 'dropped before confirmation' if entry['status'] == 'dropped' else None,
+            'submitted_at': time.time(),
+            'meta': {'restored': True, 'signer': entry.get('from')},
+        }
+        if record['status'] == 'dropped':
+            record['status'] = 'error'
+        self._remember(record)
+        if record['status'] == 'pending':
+            with self._lock:
+                self._pending[record['tx_hash']] = record['id']
+            self._track(record)
+        return record
+
+    def _journal_settled(self, record, status):
+        if self.journal is not None:
+            self.journal.append(self.journal.settled_entry(record, status))
+
+    def status(self, record_id):
+        record = self.records.get(record_id)
+        return dict(record) if record else None
+
+    def pending_count(self):
+        return len(self._pending)
+
+    def oldest_pending_age(self):
+        # Seconds the oldest unconfirmed transaction has been waiting (None if there is none).
+        with self._lock:
+            submitted = [self.records[record_id]['submitted_at'] for record_id in self._pending.values()
+                         if record_id in self.records]
+        return time.time() - min(submitted) if submitted else None
+
+    def _observe_receipt(self, record, journal_status=None):
+        self._journal_settled(record, journal_status or record['status'])
+        receipt_wait = time.time() - record['submitted_at']
+        record_stage('receipt_wait', receipt_wait)
+        TRANSACTIONS.inc(status=record['status'])
+        log_event('transaction', tx_hash=record['tx_hash'], nonce=record['nonce'], status=record['status'],
+                  gas_used=record['gas_used'], receipt_wait_ms=round(receipt_wait * 1000, 3), **record['meta'])
+
+    # --- Confirmation ---
+
+    def _track(self, record):
+        self.tracker.track(record['tx_hash'], sender=self.account.address, nonce=record['nonce'],
+                           callback=lambda future: self._settle(record['tx_hash'], record['id'], future))
+
+    def _settle(self, tx_hash, record_id, future):
+        # Called by the tracker with the transaction's receipt, or TransactionDropped.
+        error = future.exception()
+        record = self.records.get(record_id)
+        with self._lock:
+            self._pending.pop(tx_hash, None)
+            if record is not None:
+                if error is None:
+                    receipt = future.result()
+                    record.update(
+                        status='confirmed' if receipt.status == 1 else 'reverted',
+                        block_number=receipt.blockNumber,
+                        gas_used=receipt.gasUsed,
+                    )
+                else:
+                    record.update(status='error', error=str(error))
+        if record is not None:
+            self._observe_receipt(record, 'dropped' if error is not None else None)
+
+    def start(self):
+        if self._gap_filler is None:
+            if self._next_nonce is None:
+                self.sync()
+            if self._owns_tracker:
+                self.tracker.start()
+            self._gap_filler = threading.Thread(target=self._gap_loop, name='nonce-manager-gaps', daemon=True)
+            self._gap_filler.start()
+
+    def stop(self, drain_timeout=0):
+        deadline = time.time() + drain_timeout
+        while self._pending and time.time() < deadline:
+            time.sleep(self.poll_interval)
+        self._stop.set()
+        if self._gap_filler is not None:
+            self._gap_filler.join(timeout=self.poll_interval * 2)
+            self._gap_filler = None
+        if self._owns_tracker:
+            self.tracker.stop()
+
+    def _gap_loop(self):
+        while not self._stop.is_set():
+            try:
+                self._fill_gaps()
+            except Exception as e:
+                print(f"  [nonce-manager] Error while filling nonce gaps: {e}")
+            self._stop.wait(self.poll_interval)
+
+    def _fill_gaps(self):
+        # Released nonces below an in-flight transaction block it forever if no new
+        # submission comes along to reuse them, so plug them with a no-op transfer.
+        for nonce in self._take_stale_gaps():
+            try:
+                signed_txn = self._sign(self._gap_transaction(nonce, self.gas_price()))
+                tx_hash = self.w3.eth.send_raw_transaction(signed_txn.rawTransaction)
+            except Exception as e:
+                self._gap_fill_failed(nonce, e)
+                continue
+            self._gap_filled(nonce, tx_hash)
+
+    def _take_stale_gaps(self):
+        # Removes and returns the released nonces older than gap_fill_after, lowest first.
+        now = time.time()
+        with self._lock:
+            stale = sorted(n for n, released_at in self._released_at.items() if now - released_at > self.gap_fill_after)
+            for nonce in stale:
+                self._released.remove(nonce)
+                self._released_at.pop(nonce)
+            heapq.heapify(self._released)
+        return stale
+
+    def _gap_transaction(self, nonce, gas_price):
+        return dict(self._tx_params(nonce, gas_price, gas=21000), to=self.account.address, value=0)
+
+    @staticmethod
+    def _gap_filled(nonce, tx_hash):
+        NONCE_GAPS_FILLED.inc()
+        print(f"  [nonce-manager] Filled nonce gap {nonce} with no-op tx {tx_hash.hex()}")
+
+    def _gap_fill_failed(self, nonce, error):
+        if is_nonce_error(error):
+            return  # The gap was already filled by someone else.
+        print(f"  [nonce-manager] Could not fill nonce gap {nonce}: {error}")
+        self._release(nonce)
+
+
+class AsyncNonceManager(NonceManager):
+    """
+    NonceManager for an AsyncWeb3 connection: the same nonce bookkeeping, with the
+    RPC calls awaited and receipts followed by an AsyncReceiptTracker.
+    """
+
+    tracker_class = AsyncReceiptTracker
+
+    def __init__(self, w3, account, private_key, **kwargs):
+        super().__init__(w3, account, private_key, **kwargs)
+        self._gap_task = None
+
+    async def sync(self):
+        if self.chain_id is None:
+            self.chain_id = await self.w3.eth.chain_id
+        return self._reset_nonce(await self.w3.eth.get_transaction_count(self.account.address, 'pending'))
+
+    async def _skip_used_nonces(self):
+        self._advance_past(await self.w3.eth.get_transaction_count(self.account.address, 'pending'))
+
+    async def gas_price(self):
+        if self._gas_price_expired():
+            self._set_gas_price(await self.w3.eth.gas_price)
+        return self._gas_price
+
+    async def submit(self, contract_function, record_id=None, gas=None, value=None, meta=None, intent=None):
+        record = self._new_record(record_id, meta)
+        if self._next_nonce is None:
+            await self.sync()
+
+        last_error = None
+        for _ in range(self.max_send_attempts):
+            nonce = self._allocate()
+            tx_params = self._tx_params(nonce, await self.gas_price(), gas, value)
+            signed_txn = None
+            try:
+                with span('build_transaction'):
+                    transaction = await contract_function.build_transaction(tx_params)
+                signed_txn = self._sign(transaction)
+                if self.journal is not None:
+                    with span('journal_commit'):
+                        await self.journal.commit_async(self._signed_entry(record, signed_txn, nonce, intent))
+                with span('send_raw_transaction'):
+                    tx_hash = await self.w3.eth.send_raw_transaction(signed_txn.rawTransaction)
+            except Exception as e:
+                if signed_txn is not None and is_already_known(e):
+                    # The node already has this very transaction (e.g. a retried send):
+                    # it is in flight, and signing it again would submit it twice.
+                    return self._sent(record, nonce, signed_txn.hash)
+                if not self._retry_after(record, nonce, e):
+                    raise
+                last_error = e
+                await self._skip_used_nonces()
+                continue
+            return self._sent(record, nonce, tx_hash)
+
+        self._give_up(record, last_error)
+
+    async def start(self):
+        if self._gap_task is None:
+            await self.sync()
+            if self._owns_tracker:
+                await self.tracker.start()
+            self._gap_task = asyncio.get_running_loop().create_task(self._gap_loop())
+
+    async def stop(self, drain_timeout=0):
+        deadline = time.time() + drain_timeout
+        while self._pending and time.time() < deadline:
+            await asyncio.sleep(self.poll_interval)
+        self._stop.set()
+        if self._gap_task is not None:
+            self._gap_task.cancel()
+            try:
+                await self._gap_task
+            except asyncio.CancelledError:
+                pass
+            self._gap_task = None
+        if self._owns_tracker:
+            await self.tracker.stop()
+
+    async def _gap_loop(self):
+        while not self._stop.is_set():
+            try:
+                await self._fill_gaps()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"  [nonce-manager] Error while filling nonce gaps: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def _fill_gaps(self):
+        for nonce in self._take_stale_gaps():
+            try:
+                signed_txn = self._sign(self._gap_transaction(nonce, await self.gas_price()))
+                tx_hash = await self.w3.eth.send_raw_transaction(signed_txn.rawTransaction)
+            except Exception as e:
+                self._gap_fill_failed(nonce, e)
+                continue
+            self._gap_filled(nonce, tx_hash)
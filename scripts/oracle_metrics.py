@@ -0,0 +1,284 @@
+# scripts/oracle_metrics.py
+import bisect
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import config
+
+# Low-overhead instrumentation for the oracle's hot path: counters, gauges and latency
+# histograms rendered in the Prometheus text format for /metrics, plus per-request
+# traces (stage timings and RPC calls) that can be written as one JSON log line each.
+# Recording a span costs a perf_counter() pair and one short lock, so it stays on under
+# load; JSON logs are off unless ORACLE_JSON_LOGS is set.
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_registry = []
+
+
+def _format_labels(labelnames, values):
+    if not labelnames:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(labelnames, values)) + "}"
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def render(self):
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [f"{self.name}{_format_labels(self.labelnames, key)} {value}" for key, value in items]
+
+
+class Gauge(_Metric):
+    # Either set explicitly or read from a callback at scrape time (e.g. a queue depth).
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+        self._functions = {}
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def set_function(self, function, **labels):
+        with self._lock:
+            self._functions[self._key(labels)] = function
+
+    def render(self):
+        with self._lock:
+            items = list(self._values.items())
+            functions = list(self._functions.items())
+        for key, function in functions:
+            try:
+                items.append((key, function()))
+            except Exception:
+                continue
+        return self.header() + [f"{self.name}{_format_labels(self.labelnames, key)} {value}" for key, value in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        self._values = {}  # label values -> [per-bucket counts (+Inf last), sum, count]
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def render(self):
+        with self._lock:
+            items = [(key, (list(counts), total, count)) for key, (counts, total, count) in self._values.items()]
+        lines = self.header()
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames + ('le',), key + (le,))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+def render():
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# --- Oracle metrics ---
+
+ATTESTATIONS = Counter("oracle_attestations_total", "KYC attestations handled, by outcome", ["outcome"])
+STAGE_SECONDS = Histogram("oracle_stage_seconds", "Time spent per attestation/transaction stage", ["stage"])
+REQUEST_SECONDS = Histogram("oracle_request_seconds", "End-to-end HTTP request latency", ["endpoint"])
+RPC_CALLS = Counter("oracle_rpc_calls_total", "JSON-RPC calls made to the EVM node, by method", ["method"])
+RPC_ERRORS = Counter("oracle_rpc_errors_total", "JSON-RPC calls that raised, by method", ["method"])
+TRANSACTIONS = Counter("oracle_transactions_total", "Oracle transactions by final status", ["status"])
+SEND_RETRIES = Counter("oracle_send_retries_total", "Transaction sends retried after a nonce error")
+NONCE_GAPS_FILLED = Counter("oracle_nonce_gaps_filled_total", "Released nonces plugged with a no-op transaction")
+BATCH_SIZE = Histogram("oracle_kyc_batch_size", "KYC updates per batchUpdateKYCStatus transaction",
+                       buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500))
+QUEUE_DEPTH = Gauge("oracle_kyc_queue_depth", "KYC updates waiting for the next batch")
+PENDING_TRANSACTIONS = Gauge("oracle_pending_transactions", "Sent oracle transactions without a receipt yet")
+IN_FLIGHT = Gauge("oracle_in_flight_attestations", "Attestations currently being handled")
+DID_LOOKUPS = Counter("oracle_did_lookups_total", "DID resolutions by result (hit, negative_hit, miss, coalesced, error)", ["result"])
+DID_RESOLVE_SECONDS = Histogram("oracle_did_resolve_seconds", "Time to resolve a DID on the ledger (cache misses only)")
+DID_CACHE_ENTRIES = Gauge("oracle_did_cache_entries", "DID resolutions currently cached")
+CREDENTIAL_CHECKS = Counter("oracle_credential_checks_total", "KYC credential checks by result (cache_hits, verified, rejected)", ["result"])
+JOURNAL_COMMIT_SECONDS = Histogram("oracle_journal_commit_seconds", "Time to write and fsync one group of journal entries")
+JOURNAL_GROUP_SIZE = Histogram("oracle_journal_group_size", "Journal entries made durable per fsync",
+                               buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500))
+SIGNER_BALANCE = Gauge("oracle_signer_balance_ether", "Native balance of each oracle signer account", ["signer"])
+SIGNER_PENDING = Gauge("oracle_signer_pending_transactions", "Unconfirmed transactions per signer lane", ["signer"])
+SIGNER_ISOLATED = Gauge("oracle_signer_isolated", "1 while a signer lane gets no new transactions (stalled or low balance)", ["signer"])
+BLOCKS_SCANNED = Counter("oracle_blocks_scanned_total", "Blocks fetched by the receipt tracker to match pending transactions")
+CHAIN_REORGS = Counter("oracle_chain_reorgs_total", "Reorgs detected by the receipt tracker")
+
+
+# --- Traces and spans ---
+
+class Trace:
+    __slots__ = ("event", "fields", "stages", "rpc_calls", "started")
+
+    def __init__(self, event, fields):
+        self.event = event
+        self.fields = fields
+        self.stages = {}
+        self.rpc_calls = 0
+        self.started = time.perf_counter()
+
+
+_current_trace = contextvars.ContextVar("oracle_trace", default=None)
+_log_lock = threading.Lock()
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+def record_stage(stage, seconds):
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    active = _current_trace.get()
+    if active is not None:
+        active.stages[stage] = active.stages.get(stage, 0.0) + seconds
+
+
+class span:
+    # `with span('sign'): ...` times one stage (a class rather than a generator keeps it cheap).
+    __slots__ = ("stage", "started")
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        record_stage(self.stage, time.perf_counter() - self.started)
+        return False
+
+
+def start_trace(event, **fields):
+    active = Trace(event, fields)
+    return active, _current_trace.set(active)
+
+
+def finish_trace(active, token):
+    _current_trace.reset(token)
+    elapsed = time.perf_counter() - active.started
+    if config.ORACLE_JSON_LOGS:
+        log_event(active.event, duration_ms=round(elapsed * 1000, 3),
+                  stages_ms={stage: round(seconds * 1000, 3) for stage, seconds in active.stages.items()},
+                  rpc_calls=active.rpc_calls, **active.fields)
+    return elapsed
+
+
+@contextmanager
+def trace(event, **fields):
+    # Collects the spans and RPC calls made in this thread/task; with JSON logs enabled the
+    # finished trace is written as one line.
+    active, token = start_trace(event, **fields)
+    try:
+        yield active
+    finally:
+        finish_trace(active, token)
+
+
+def annotate(**fields):
+    # Adds fields (outcome, tx hash, ...) to the open trace's log line.
+    active = _current_trace.get()
+    if active is not None:
+        active.fields.update(fields)
+
+
+def log_event(event, **fields):
+    if not config.ORACLE_JSON_LOGS:
+        return
+    line = json.dumps({"ts": time.time(), "event": event, **fields}, default=str)
+    with _log_lock:
+        sys.stderr.write(line + "\n")
+
+
+def _count_rpc(method):
+    RPC_CALLS.inc(method=method)
+    active = _current_trace.get()
+    if active is not None:
+        active.rpc_calls += 1
+
+
+def rpc_metrics_middleware(make_request, w3):
+    # web3 middleware: counts every JSON-RPC call (globally and on the open trace).
+    def middleware(method, params):
+        _count_rpc(method)
+        try:
+            return make_request(method, params)
+        except Exception:
+            RPC_ERRORS.inc(method=method)
+            raise
+    return middleware
+
+
+async def async_rpc_metrics_middleware(make_request, w3):
+    # The same for AsyncWeb3.
+    async def middleware(method, params):
+        _count_rpc(method)
+        try:
+            return await make_request(method, params)
+        except Exception:
+            RPC_ERRORS.inc(method=method)
+            raise
+    return middleware
@@ -0,0 +1,356 @@
+# scripts/receipt_tracker.py
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from web3.exceptions import TransactionNotFound
+
+from oracle_metrics import BLOCKS_SCANNED, CHAIN_REORGS
+
+# Confirms transactions by following the chain head instead of polling every hash.
+#
+# Each poll asks for the block number once, fetches every new block (transaction hashes
+# only) and matches its transactions against the tracked hashes; a receipt is fetched
+# once, for matched transactions only. Senders with unmatched transactions get one
+# nonce check per new head, which catches transactions that were replaced (dropped) and
+# ones mined before they were tracked. RPC load therefore grows with the number of
+# blocks and senders, not with the number of transactions in flight.
+#
+# A tracked transaction resolves its future with the receipt once `confirmations`
+# blocks are built on top of the block that included it (0: as soon as it is included),
+# or with TransactionDropped. Blocks whose parent hash does not match the block
+# remembered at that height are treated as a reorg: the orphaned blocks are forgotten,
+# their transactions go back to waiting and the new branch is scanned.
+
+
+class TransactionDropped(Exception):
+    # Another transaction from the same sender was mined with this one's nonce.
+    def __init__(self, tx_hash, nonce):
+        super().__init__(f"transaction {tx_hash} was dropped: nonce {nonce} was used by another transaction")
+        self.tx_hash = tx_hash
+        self.nonce = nonce
+
+
+def _hex(value):
+    if isinstance(value, str):
+        return value.lower() if value.startswith('0x') else '0x' + value.lower()
+    return '0x' + bytes(value).hex()
+
+
+class _Tracked:
+    __slots__ = ('future', 'sender', 'nonce', 'checked_at', 'receipt')
+
+    def __init__(self, future, sender, nonce):
+        self.future = future
+        self.sender = sender
+        self.nonce = nonce
+        self.checked_at = time.time()
+        self.receipt = None  # Set once a block includes the transaction
+
+
+class ReceiptTracker:
+    """
+    Shared receipt tracker for one web3 connection. `track()` returns a Future for the
+    receipt (`callback`, if given, is called with that future when it resolves) and
+    `wait()` blocks on it. `poll()` does one round of head following; `start()` runs it
+    every `poll_interval` seconds on a background thread.
+
+    Transactions tracked without a sender and nonce cannot be checked for replacement,
+    so they get a receipt lookup every `recheck_after` seconds instead in case they were
+    mined before being tracked. The last `history` blocks are remembered to detect reorgs
+    and to match hashes that are tracked shortly after being mined.
+    """
+
+    def __init__(self, w3, confirmations=0, poll_interval=1.0, history=64, recheck_after=30):
+        self.w3 = w3
+        self.confirmations = confirmations
+        self.poll_interval = poll_interval
+        self.history = max(history, confirmations + 1)
+        self.recheck_after = recheck_after
+        self._lock = threading.Lock()
+        self._tracked = {}  # tx hash -> _Tracked
+        self._blocks = OrderedDict()  # block number -> (block hash, [tx hashes]), most recent `history`
+        self._seen = {}  # tx hash -> block number, for the remembered blocks
+        self.head = None  # Last block scanned
+        self.stats = {'blocks': 0, 'receipts': 0, 'nonce_checks': 0, 'rechecks': 0, 'reorgs': 0, 'dropped': 0}
+        self._stop = threading.Event()
+        self._poller = None
+
+    # --- Tracking ---
+
+    def _new_future(self):
+        return Future()
+
+    def track(self, tx_hash, sender=None, nonce=None, callback=None):
+        tx_hash = _hex(tx_hash)
+        with self._lock:
+            tracked = self._tracked.get(tx_hash)
+            if tracked is None:
+                tracked = self._tracked[tx_hash] = _Tracked(self._new_future(), sender, nonce)
+                if self.head is None or tx_hash in self._seen:
+                    # Before the first poll it may be in any block, and a remembered block may
+                    # already hold it: look it up on the next poll.
+                    tracked.checked_at = 0
+        if callback is not None:
+            tracked.future.add_done_callback(callback)
+        return tracked.future
+
+    def forget(self, tx_hash):
+        with self._lock:
+            self._tracked.pop(_hex(tx_hash), None)
+
+    def tracked_count(self):
+        return len(self._tracked)
+
+    def wait(self, tx_hash, timeout=120, sender=None, nonce=None):
+        # Like w3.eth.wait_for_transaction_receipt, but answered by the shared head poll.
+        try:
+            return self.wait_for([self.track(tx_hash, sender=sender, nonce=nonce)], timeout)[0]
+        except TimeoutError:
+            self.forget(tx_hash)
+            raise
+
+    def wait_for(self, futures, timeout=120):
+        # The receipts of tracked futures, in order (TransactionDropped is raised). Without
+        # a poller thread the head is polled here until they resolve.
+        deadline = time.time() + timeout
+        while self._poller is None and not all(future.done() for future in futures):
+            if time.time() >= deadline:
+                waiting = sum(1 for future in futures if not future.done())
+                raise TimeoutError(f"{waiting} transaction(s) not confirmed within {timeout}s")
+            self.poll()
+            if not all(future.done() for future in futures):
+                time.sleep(self.poll_interval)
+        return [future.result(timeout=max(0, deadline - time.time())) for future in futures]
+
+    # --- Bookkeeping shared by the sync and async pollers (no RPC calls) ---
+
+    def _is_fork(self, block):
+        parent = self._blocks.get(block.number - 1)
+        return parent is not None and parent[0] != _hex(block.parentHash)
+
+    def _orphan(self, number):
+        # Forget a block that left the canonical chain; its transactions wait again.
+        with self._lock:
+            _, tx_hashes = self._blocks.pop(number)
+            for tx_hash in tx_hashes:
+                self._seen.pop(tx_hash, None)
+                tracked = self._tracked.get(tx_hash)
+                if tracked is not None:
+                    tracked.receipt = None
+
+    def _add_block(self, block):
+        # Remember a canonical block; returns the tracked hashes it includes.
+        tx_hashes = [_hex(tx_hash) for tx_hash in block.transactions]
+        self.stats['blocks'] += 1
+        BLOCKS_SCANNED.inc()
+        with self._lock:
+            self._blocks[block.number] = (_hex(block.hash), tx_hashes)
+            for tx_hash in tx_hashes:
+                self._seen[tx_hash] = block.number
+            while len(self._blocks) > self.history:
+                _, (_, old_hashes) = self._blocks.popitem(last=False)
+                for tx_hash in old_hashes:
+                    self._seen.pop(tx_hash, None)
+            return [tx_hash for tx_hash in tx_hashes if tx_hash in self._tracked]
+
+    def _include(self, tx_hash, receipt):
+        self.stats['receipts'] += 1
+        with self._lock:
+            tracked = self._tracked.get(tx_hash)
+            if tracked is not None:
+                tracked.receipt = receipt
+
+    def _unmatched(self, now):
+        # (senders to nonce-check: {sender: [(tx hash, nonce)]}, hashes due for a receipt lookup)
+        by_sender, rechecks = {}, []
+        with self._lock:
+            for tx_hash, tracked in self._tracked.items():
+                if tracked.receipt is not None:
+                    continue
+                if tracked.sender is not None and tracked.nonce is not None:
+                    by_sender.setdefault(tracked.sender, []).append((tx_hash, tracked.nonce))
+                elif now - tracked.checked_at >= self.recheck_after:
+                    tracked.checked_at = now
+                    rechecks.append(tx_hash)
+        return by_sender, rechecks
+
+    def _drop(self, tx_hash):
+        with self._lock:
+            tracked = self._tracked.pop(tx_hash, None)
+        if tracked is not None and not tracked.future.done():
+            self.stats['dropped'] += 1
+            tracked.future.set_exception(TransactionDropped(tx_hash, tracked.nonce))
+
+    def _resolve_confirmed(self):
+        with self._lock:
+            ready = [
+                (tx_hash, tracked) for tx_hash, tracked in self._tracked.items()
+                if tracked.receipt is not None and self.head >= tracked.receipt.blockNumber + self.confirmations
+            ]
+            for tx_hash, _ in ready:
+                self._tracked.pop(tx_hash)
+        for _, tracked in ready:
+            if not tracked.future.done():
+                tracked.future.set_result(tracked.receipt)
+
+    # --- Polling ---
+
+    def poll(self):
+        head = self.w3.eth.block_number
+        number = head if self.head is None else self.head + 1
+        while number <= head:
+            block = self.w3.eth.get_block(number)
+            if self._is_fork(block):
+                number = self._rewind(number)
+                continue
+            for tx_hash in self._add_block(block):
+                self._include(tx_hash, self.w3.eth.get_transaction_receipt(tx_hash))
+            self.head = number
+            number += 1
+        by_sender, rechecks = self._unmatched(time.time())
+        for sender, transactions in by_sender.items():
+            self.stats['nonce_checks'] += 1
+            mined_nonce = self.w3.eth.get_transaction_count(sender, self.head)
+            for tx_hash, nonce in transactions:
+                if nonce < mined_nonce:
+                    self._settle_unmatched(tx_hash, drop=True)
+        for tx_hash in rechecks:
+            self.stats['rechecks'] += 1
+            self._settle_unmatched(tx_hash, drop=False)
+        self._resolve_confirmed()
+
+    def _settle_unmatched(self, tx_hash, drop):
+        # Its nonce is used (drop=True) or it is due a recheck, yet no scanned block had it.
+        try:
+            self._include(tx_hash, self.w3.eth.get_transaction_receipt(tx_hash))
+        except TransactionNotFound:
+            if drop:
+                self._drop(tx_hash)
+
+    def _rewind(self, number):
+        # Walks back from a block whose parent we do not know to the common ancestor.
+        self.stats['reorgs'] += 1
+        CHAIN_REORGS.inc()
+        ancestor = number - 1
+        while ancestor in self._blocks and self._blocks[ancestor][0] != _hex(self.w3.eth.get_block(ancestor).hash):
+            self._orphan(ancestor)
+            ancestor -= 1
+        return ancestor + 1
+
+    def _poll_loop(self):
+        while not self._stop.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"  [receipt-tracker] Error while following blocks: {e}")
+            self._stop.wait(self.poll_interval)
+
+    def start(self):
+        if self._poller is None:
+            self._stop.clear()
+            self.poll()
+            self._poller = threading.Thread(target=self._poll_loop, name='receipt-tracker', daemon=True)
+            self._poller.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._poller is not None:
+            self._poller.join(timeout=self.poll_interval * 2)
+            self._poller = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+class AsyncReceiptTracker(ReceiptTracker):
+    """
+    ReceiptTracker for an AsyncWeb3 connection: futures are asyncio futures and the
+    head is followed by a task on the running event loop.
+    """
+
+    def __init__(self, w3, **kwargs):
+        super().__init__(w3, **kwargs)
+        self._poll_task = None
+
+    def _new_future(self):
+        return asyncio.get_running_loop().create_future()
+
+    async def wait(self, tx_hash, timeout=120, sender=None, nonce=None):
+        future = self.track(tx_hash, sender=sender, nonce=nonce)
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            self.forget(tx_hash)
+            raise
+
+    async def poll(self):
+        head = await self.w3.eth.block_number
+        number = head if self.head is None else self.head + 1
+        while number <= head:
+            block = await self.w3.eth.get_block(number)
+            if self._is_fork(block):
+                number = await self._rewind(number)
+                continue
+            matched = self._add_block(block)
+            receipts = await asyncio.gather(*(self.w3.eth.get_transaction_receipt(tx_hash) for tx_hash in matched))
+            for tx_hash, receipt in zip(matched, receipts):
+                self._include(tx_hash, receipt)
+            self.head = number
+            number += 1
+        by_sender, rechecks = self._unmatched(time.time())
+        senders = list(by_sender)
+        self.stats['nonce_checks'] += len(senders)
+        mined_nonces = await asyncio.gather(*(self.w3.eth.get_transaction_count(sender, self.head) for sender in senders))
+        unmatched = [(tx_hash, True) for sender, mined_nonce in zip(senders, mined_nonces)
+                     for tx_hash, nonce in by_sender[sender] if nonce < mined_nonce]
+        self.stats['rechecks'] += len(rechecks)
+        unmatched += [(tx_hash, False) for tx_hash in rechecks]
+        await asyncio.gather(*(self._settle_unmatched(tx_hash, drop) for tx_hash, drop in unmatched))
+        self._resolve_confirmed()
+
+    async def _settle_unmatched(self, tx_hash, drop):
+        try:
+            self._include(tx_hash, await self.w3.eth.get_transaction_receipt(tx_hash))
+        except TransactionNotFound:
+            if drop:
+                self._drop(tx_hash)
+
+    async def _rewind(self, number):
+        self.stats['reorgs'] += 1
+        CHAIN_REORGS.inc()
+        ancestor = number - 1
+        while ancestor in self._blocks and self._blocks[ancestor][0] != _hex((await self.w3.eth.get_block(ancestor)).hash):
+            self._orphan(ancestor)
+            ancestor -= 1
+        return ancestor + 1
+
+    async def _poll_loop(self):
+        while True:
+            try:
+                await self.poll()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"  [receipt-tracker] Error while following blocks: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def start(self):
+        if self._poll_task is None:
+            await self.poll()
+            self._poll_task = asyncio.get_running_loop().create_task(self._poll_loop())
+
+    async def stop(self):
+        if self._poll_task is not None:
+            self._poll_task.cancel()
+            try:
+                await self._poll_task
+            except asyncio.CancelledError:
+                pass
+            self._poll_task = None
@@ -0,0 +1,272 @@
+# scripts/signer_pool.py
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+
+from web3 import Web3
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import config
+from nonce_manager import AsyncNonceManager, NonceManager
+from oracle_metrics import SIGNER_BALANCE, SIGNER_ISOLATED, SIGNER_PENDING
+from receipt_tracker import AsyncReceiptTracker, ReceiptTracker
+
+# Several oracle signer accounts, each with its own nonce lane (a NonceManager). One
+# stuck transaction then only holds up its own lane, and whitelist updates are no longer
+# serialized behind a single account's nonces. GCBToken accepts KYC updates from every
+# account in its oracle signer set (setOracleSigners); `python scripts/signer_pool.py
+# authorize` adds the configured signers and `fund` tops up their balances.
+
+
+def _key(private_key):
+    return private_key if private_key.startswith('0x') else '0x' + private_key
+
+
+class SignerPool:
+    """
+    Spreads transactions over one lane per signer key: each submission goes to the
+    healthy lane with the fewest unconfirmed transactions. A lane is isolated (gets no
+    new work) while its oldest pending transaction has waited more than `stall_after`
+    seconds or its balance is below `min_balance_wei`; if every lane is isolated the
+    least loaded one is used anyway. All lanes share one ReceiptTracker. The pool offers
+    the NonceManager interface the oracle uses (submit, status, restore, pending_count,
+    start, stop).
+    """
+
+    lane_class = NonceManager
+    tracker_class = ReceiptTracker
+
+    def __init__(self, w3, private_keys, journal=None, stall_after=120, min_balance_wei=0, balance_interval=30,
+                 confirmations=0, **lane_kwargs):
+        self.w3 = w3
+        self.journal = journal
+        self.stall_after = stall_after
+        self.min_balance_wei = min_balance_wei
+        self.balance_interval = balance_interval
+        self.tracker = self.tracker_class(w3, confirmations=confirmations, poll_interval=lane_kwargs.get('poll_interval', 1.0))
+        self.lanes = []
+        for private_key in private_keys:
+            private_key = _key(private_key)
+            account = w3.eth.account.from_key(private_key)
+            self.lanes.append(self.lane_class(w3, account, private_key, journal=journal, tracker=self.tracker, **lane_kwargs))
+        self._by_address = {lane.account.address: lane for lane in self.lanes}
+        self.balances = {}  # signer address -> wei, from the last balance check
+        self._isolated = set()
+        self._stop = threading.Event()
+        self._monitor = None
+        for lane in self.lanes:
+            SIGNER_PENDING.set_function(lane.pending_count, signer=lane.account.address)
+
+    @property
+    def addresses(self):
+        return list(self._by_address)
+
+    # --- Lane selection ---
+
+    def _isolation_reason(self, lane):
+        balance = self.balances.get(lane.account.address)
+        if balance is not None and balance < self.min_balance_wei:
+            return 'low balance'
+        age = lane.oldest_pending_age()
+        if age is not None and age > self.stall_after:
+            return f'oldest transaction pending for {age:.0f}s'
+        return None
+
+    def _set_isolated(self, lane, reason):
+        address = lane.account.address
+        if reason is not None and address not in self._isolated:
+            self._isolated.add(address)
+            SIGNER_ISOLATED.set(1, signer=address)
+            print(f"  [signer-pool] Isolating signer {address}: {reason}")
+        elif reason is None and address in self._isolated:
+            self._isolated.discard(address)
+            SIGNER_ISOLATED.set(0, signer=address)
+            print(f"  [signer-pool] Signer {address} is healthy again")
+
+    def choose_lane(self):
+        healthy = []
+        for lane in self.lanes:
+            reason = self._isolation_reason(lane)
+            self._set_isolated(lane, reason)
+            if reason is None:
+                healthy.append(lane)
+        return min(healthy or self.lanes, key=lambda lane: lane.pending_count())
+
+    # --- NonceManager interface ---
+
+    def submit(self, contract_function, meta=None, **kwargs):
+        lane = self.choose_lane()
+        return lane.submit(contract_function, meta=dict(meta or {}, signer=lane.account.address), **kwargs)
+
+    def status(self, record_id):
+        for lane in self.lanes:
+            record = lane.status(record_id)
+            if record is not None:
+                return record
+        return None
+
+    @property
+    def records(self):
+        records = {}
+        for lane in self.lanes:
+            records.update(lane.records)
+        return records
+
+    def restore(self, entry):
+        # Journal entries go back to the lane of the account that signed them.
+        lane = self._by_address.get(entry.get('from'), self.lanes[0])
+        return lane.restore(entry)
+
+    def pending_count(self):
+        return sum(lane.pending_count() for lane in self.lanes)
+
+    # --- Balances ---
+
+    def _record_balance(self, address, balance):
+        self.balances[address] = balance
+        SIGNER_BALANCE.set(float(Web3.from_wei(balance, 'ether')), signer=address)
+        if balance < self.min_balance_wei:
+            print(f"  [signer-pool] WARNING: signer {address} balance is {Web3.from_wei(balance, 'ether')} "
+                  f"(minimum {Web3.from_wei(self.min_balance_wei, 'ether')}); fund it with signer_pool.py fund")
+
+    def check_balances(self):
+        for address in self._by_address:
+            self._record_balance(address, self.w3.eth.get_balance(address))
+
+    def _monitor_balances(self):
+        while not self._stop.wait(self.balance_interval):
+            try:
+                self.check_balances()
+            except Exception as e:
+                print(f"  [signer-pool] Error while checking signer balances: {e}")
+
+    def start(self):
+        for lane in self.lanes:
+            lane.start()
+        self.tracker.start()
+        self.check_balances()
+        if self._monitor is None:
+            self._monitor = threading.Thread(target=self._monitor_balances, name='signer-pool-balances', daemon=True)
+            self._monitor.start()
+
+    def stop(self, drain_timeout=0):
+        deadline = time.time() + drain_timeout
+        self._stop.set()
+        for lane in self.lanes:
+            lane.stop(drain_timeout=max(0, deadline - time.time()))
+        self.tracker.stop()
+        if self._monitor is not None:
+            self._monitor.join()
+            self._monitor = None
+
+
+class AsyncSignerPool(SignerPool):
+    # The same over AsyncWeb3: lanes are AsyncNonceManagers and balances are checked by a task.
+
+    lane_class = AsyncNonceManager
+    tracker_class = AsyncReceiptTracker
+
+    async def submit(self, contract_function, meta=None, **kwargs):
+        lane = self.choose_lane()
+        return await lane.submit(contract_function, meta=dict(meta or {}, signer=lane.account.address), **kwargs)
+
+    async def check_balances(self):
+        balances = await asyncio.gather(*(self.w3.eth.get_balance(address) for address in self._by_address))
+        for address, balance in zip(self._by_address, balances):
+            self._record_balance(address, balance)
+
+    async def _monitor_balances(self):
+        while True:
+            await asyncio.sleep(self.balance_interval)
+            try:
+                await self.check_balances()
+            except Exception as e:
+                print(f"  [signer-pool] Error while checking signer balances: {e}")
+
+    async def start(self):
+        await asyncio.gather(*(lane.start() for lane in self.lanes))
+        await self.tracker.start()
+        await self.check_balances()
+        if self._monitor is None:
+            self._monitor = asyncio.get_running_loop().create_task(self._monitor_balances())
+
+    async def stop(self, drain_timeout=0):
+        await asyncio.gather(*(lane.stop(drain_timeout=drain_timeout) for lane in self.lanes))
+        await self.tracker.stop()
+        if self._monitor is not None:
+            self._monitor.cancel()
+            self._monitor = None
+
+
+def create_signer_pool(w3, journal=None, private_keys=None, pool_class=SignerPool):
+    # A pool over ORACLE_SIGNER_KEYS (or `private_keys`) with the oracle's settings.
+    return pool_class(
+        w3, private_keys or config.ORACLE_SIGNER_KEYS,
+        journal=journal,
+        stall_after=config.ORACLE_LANE_STALL_SECONDS,
+        min_balance_wei=Web3.to_wei(config.ORACLE_SIGNER_MIN_BALANCE, 'ether'),
+        balance_interval=config.ORACLE_BALANCE_CHECK_INTERVAL,
+        confirmations=config.ORACLE_CONFIRMATIONS,
+        gas_price_ttl=config.ORACLE_GAS_PRICE_TTL,
+        poll_interval=config.ORACLE_RECEIPT_POLL_INTERVAL,
+    )
+
+
+if __name__ == "__main__":
+    from contract_artifacts import load_artifact
+    from local_evm import send_transaction
+
+    parser = argparse.ArgumentParser(description="Manage the oracle's signer accounts (ORACLE_SIGNER_KEYS).")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    subcommands.add_parser("status", help="Show each signer's balance and whether GCBToken accepts it")
+    subcommands.add_parser("authorize", help="Add every configured signer to GCBToken's oracle signer set (owner only)")
+    fund_parser = subcommands.add_parser("fund", help="Top up signers below the given balance from the owner account")
+    fund_parser.add_argument("--to", type=float, default=1.0, help="Target balance per signer, in ether")
+    args = parser.parse_args()
+
+    w3 = Web3(Web3.HTTPProvider(config.EVM_NETWORK_URL))
+    if not w3.is_connected():
+        print(f"Error: Could not connect to EVM network at {config.EVM_NETWORK_URL}")
+        sys.exit(1)
+    if not config.ACCESS_CONTROL_CONTRACT_ADDRESS:
+        print("ERROR: ACCESS_CONTROL_CONTRACT_ADDRESS (GCBToken address) not set in .env. Please run deploy_gcb_token.py first.")
+        sys.exit(1)
+    gcb_token_contract = w3.eth.contract(address=config.ACCESS_CONTROL_CONTRACT_ADDRESS, abi=load_artifact('GCBToken')['abi'])
+    owner_account = w3.eth.account.from_key(_key(config.EVM_DEPLOYER_PRIVATE_KEY))
+    signers = [w3.eth.account.from_key(_key(key)).address for key in config.ORACLE_SIGNER_KEYS]
+
+    if args.command == "status":
+        for signer in signers:
+            authorized = gcb_token_contract.functions.isOracleSigner(signer).call()
+            print(f"  {signer}: {w3.from_wei(w3.eth.get_balance(signer), 'ether')} "
+                  f"({'authorized' if authorized else 'NOT AUTHORIZED'})")
+    elif args.command == "authorize":
+        missing = [signer for signer in signers if not gcb_token_contract.functions.isOracleSigner(signer).call()]
+        if missing:
+            receipt = send_transaction(w3, owner_account, gcb_token_contract.functions.setOracleSigners(missing, True))
+            print(f"Authorized {len(missing)} signer(s) in tx {receipt.transactionHash.hex()}")
+        else:
+            print("All configured signers are already authorized.")
+    else:
+        target = w3.to_wei(args.to, 'ether')
+        nonce = w3.eth.get_transaction_count(owner_account.address, 'pending')
+        tx_hashes = []
+        for signer in signers:
+            shortfall = target - w3.eth.get_balance(signer)
+            if shortfall <= 0 or signer == owner_account.address:
+                continue
+            signed = owner_account.sign_transaction({
+                'chainId': w3.eth.chain_id, 'gasPrice': w3.eth.gas_price, 'nonce': nonce,
+                'to': signer, 'value': shortfall, 'gas': 21000,
+            })
+            tx_hashes.append(w3.eth.send_raw_transaction(signed.rawTransaction))
+            print(f"  Funding {signer} with {w3.from_wei(shortfall, 'ether')}")
+            nonce += 1
+        with ReceiptTracker(w3) as tracker:
+            for tx_hash in tx_hashes:
+                tracker.wait(tx_hash)
+        print(f"Funded {len(tx_hashes)} signer(s).")
@@ -0,0 +1,204 @@
+# scripts/simulate_tokenization.py
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from web3.exceptions import ContractLogicError
+from xrpl.wallet import Wallet
+
+from allocate_tokens import allocate
+from batch_reads import BatchReader
+from bench_oracle_load import RPCCounter, git_revision
+from contract_artifacts import load_artifacts
+from income_distribution import claim_income_many, fund_distribution, withdrawable_income_many
+from kyc_credentials import CredentialVerifier, issue_credential
+from kyc_store import MemoryKYCStore
+from local_evm import connect, deploy_gcb_token, funded_account, send_transaction
+from receipt_tracker import ReceiptTracker
+
+# The test_rwa_tokenization.py scenario (deploy, KYC attestation through the oracle,
+# allocation, whitelisted and blocked transfers, income distribution and a claim) run
+# entirely in-process: eth-tester mines every transaction as it is sent, the oracle is
+# driven through Flask's test client, and every wait is a receipt lookup instead of a
+# sleep. Independent scenarios (investor count x KYC approval ratio) run in parallel,
+# one process each, and report their wall time per phase.
+
+ALLOCATION_TOKENS = 1000
+TRANSFER_TOKENS = 100
+DISTRIBUTION_ETHER = 5
+
+
+def synthetic_investors(w3, count, approved_ratio, issuer):
+    # Like bench_oracle_load.synthetic_investors, but with keys: investors sign transfers and claims.
+    investors = []
+    approved = round(count * approved_ratio)
+    for i in range(count):
+        account = w3.eth.account.create()
+        xrpl_did = f"did:xrpl:sim{i + 1:08d}"
+        kyc_approved = i < approved
+        investors.append({
+            "investor_id": f"SimInvestor{i + 1}",
+            "xrpl_did": xrpl_did,
+            "kyc_approved": kyc_approved,
+            "kyc_credential": issue_credential(issuer, xrpl_did, kyc_approved),
+            "account": account,
+        })
+    return investors
+
+
+def run_scenario(scenario, verbose=False):
+    # Runs one scenario on its own in-process chain and returns its timings and checks.
+    # Call it in a fresh process: the threaded oracle keeps its state in module globals.
+    import gcb_kyc_oracle
+
+    started = time.perf_counter()
+    phases = {}
+    checks = {}
+
+    def phase(name, phase_started):
+        phases[name] = time.perf_counter() - phase_started
+        return time.perf_counter()
+
+    output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    workdir = tempfile.TemporaryDirectory()
+    with output:
+        mark = time.perf_counter()
+        w3 = connect("tester")
+        w3.middleware_onion.add(RPCCounter(serialize=True), name="rpc_counter")  # The oracle's threads share eth-tester
+        tracker = ReceiptTracker(w3)  # No poller: each wait polls the (already mined) head once
+        owner = funded_account(w3, amount_ether=1000)
+        gcb_token_contract, _ = deploy_gcb_token(w3, owner, initial_supply_tokens=scenario["investors"] * ALLOCATION_TOKENS,
+                                                 kyc_oracle_address=owner.address)
+        issuer = Wallet.create()
+        investors = synthetic_investors(w3, scenario["investors"], scenario["approved_ratio"], issuer)
+        store = MemoryKYCStore()
+        store.upsert_many([{k: v for k, v in investor.items() if k != "account"} for investor in investors])
+        mark = phase("deploy", mark)
+
+        # --- KYC attestation through the oracle ---
+        gcb_kyc_oracle.init_oracle(
+            evm_w3=w3,
+            private_key=owner.key.hex(),
+            contract_address=gcb_token_contract.address,
+            store=store,
+            verifier=CredentialVerifier(trusted={f"did:xrpl:{issuer.address}"}, workers=0),
+            journal_path='',
+            registry_path=os.path.join(workdir.name, "tokens.json"),
+        )
+        try:
+            client = gcb_kyc_oracle.app.test_client()
+            response = client.post('/attest-kyc/batch', json={"attestations": [
+                {"xrplDID": investor["xrpl_did"], "investorEVMAddress": investor["account"].address}
+                for investor in investors
+            ]})
+            body = response.get_json()
+            tracker.wait_for([tracker.track(tx_hash) for tx_hash in body["transactions"]])
+            checks["attestation_requests_ok"] = response.status_code == 200 and body["success"]
+            checks["oracle_transactions"] = len(body["transactions"])
+        finally:
+            gcb_kyc_oracle.shutdown_oracle()
+        addresses = [investor["account"].address for investor in investors]
+        approved = [investor for investor in investors if investor["kyc_approved"]]
+        blocked = [investor for investor in investors if not investor["kyc_approved"]]
+        reader = BatchReader(w3, gcb_token_contract)
+        whitelisted = reader.is_whitelisted_many(addresses)
+        checks["whitelist_matches_kyc"] = all(whitelisted[investor["account"].address] == investor["kyc_approved"]
+                                              for investor in investors)
+        mark = phase("attest", mark)
+
+        # --- Allocation to whitelisted investors ---
+        allocation = w3.to_wei(ALLOCATION_TOKENS, 'ether')
+        rows = [(row, investor["account"].address, allocation) for row, investor in enumerate(investors, start=1)]
+        summary = allocate(w3, gcb_token_contract, owner, owner.key.hex(), rows, tracker=tracker)
+        balances = reader.balance_of_many(addresses)
+        checks["allocation_batches"] = summary["batches"]
+        checks["allocated_to_whitelisted_only"] = all(
+            balances[investor["account"].address] == (allocation if investor["kyc_approved"] else 0) for investor in investors
+        )
+        mark = phase("allocate", mark)
+
+        # --- Transfers: whitelisted -> whitelisted succeeds, whitelisted -> not whitelisted reverts ---
+        if len(approved) >= 2:
+            sender = approved[0]["account"]
+            funded_account(w3, amount_ether=1, private_key=sender.key)
+            receipt = send_transaction(w3, sender, gcb_token_contract.functions.transfer(
+                approved[1]["account"].address, w3.to_wei(TRANSFER_TOKENS, 'ether')))
+            checks["whitelisted_transfer_succeeds"] = receipt.status == 1
+            if blocked:
+                try:
+                    receipt = send_transaction(w3, sender, gcb_token_contract.functions.transfer(
+                        blocked[0]["account"].address, w3.to_wei(TRANSFER_TOKENS, 'ether')))
+                    checks["blocked_transfer_reverts"] = receipt.status == 0
+                except ContractLogicError:
+                    checks["blocked_transfer_reverts"] = True
+        mark = phase("transfer", mark)
+
+        # --- Income distribution and a claim ---
+        receipt = fund_distribution(w3, gcb_token_contract, owner, w3.to_wei(DISTRIBUTION_ETHER, 'ether'), tracker=tracker)
+        checks["distribution_succeeds"] = receipt.status == 1
+        if approved:
+            claimer = approved[-1]["account"]
+            funded_account(w3, amount_ether=1, private_key=claimer.key)
+            withdrawable = withdrawable_income_many(gcb_token_contract, [claimer.address])[claimer.address]
+            receipts = claim_income_many(w3, gcb_token_contract, [claimer], tracker=tracker)
+            checks["claim_succeeds"] = withdrawable > 0 and receipts[claimer.address].status == 1
+        phase("distribute", mark)
+    workdir.cleanup()
+
+    return dict(
+        scenario,
+        seconds=time.perf_counter() - started,
+        phases=phases,
+        checks=checks,
+        passed=all(value for value in checks.values() if isinstance(value, bool)),
+        blocks=w3.eth.block_number,
+    )
+
+
+def scenarios_from_args(investor_counts, approved_ratios):
+    return [
+        {"name": f"{count}-investors-{round(ratio * 100)}pct-kyc", "investors": count, "approved_ratio": ratio}
+        for count, ratio in itertools.product(investor_counts, approved_ratios)
+    ]
+
+
+def run_all(scenarios, workers=None, verbose=False):
+    # One fresh process per scenario (max_tasks_per_child=1), so oracle globals never leak between them.
+    load_artifacts()  # Compile once here rather than in every worker
+    with ProcessPoolExecutor(max_workers=workers, max_tasks_per_child=1) as pool:
+        return list(pool.map(run_scenario, scenarios, itertools.repeat(verbose)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the tokenization scenario in-process against eth-tester.")
+    parser.add_argument("--investors", type=int, nargs="+", default=[10, 50, 200], help="Investor counts to simulate")
+    parser.add_argument("--approved-ratio", type=float, nargs="+", default=[0.6],
+                        help="Shares of investors with approved KYC to simulate")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Scenarios run in parallel")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--verbose", action="store_true", help="Show the scenario's own logging")
+    args = parser.parse_args()
+
+    scenarios = scenarios_from_args(args.investors, args.approved_ratio)
+    started = time.perf_counter()
+    results = run_all(scenarios, workers=args.workers, verbose=args.verbose)
+    elapsed = time.perf_counter() - started
+
+    for result in results:
+        phases = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in result["phases"].items())
+        failed = [name for name, value in result["checks"].items() if value is False]
+        print(f"{result['name']}: {'PASS' if result['passed'] else 'FAIL'} in {result['seconds']:.2f}s ({phases})"
+              + (f" -- failed: {', '.join(failed)}" if failed else ""))
+    serial = sum(result["seconds"] for result in results)
+    print(f"{len(results)} scenario(s) in {elapsed:.2f}s wall time ({serial:.2f}s of scenario time, {args.workers} worker(s))")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"git_revision": git_revision(), "seconds": elapsed, "scenarios": results}, f, indent=4)
+        print(f"Results saved to {args.output}")
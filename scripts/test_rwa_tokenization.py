@@ -4,11 +4,16 @@ import time
 import sys
 import requests
 from web3 import Web3
-from web3.exceptions import ContractLogicError, TransactionNotFound
+from web3.exceptions import ContractLogicError
 
 # Add the project root to the Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 import config
+from contract_artifacts import load_artifact
+from allocate_tokens import allocate
+from batch_reads import BatchReader
+from income_distribution import claim_income_many, fund_distribution, withdrawable_income_many
+from receipt_tracker import ReceiptTracker
 
 # Global variables to store XRPL DID and Wallet (loaded from gcb_kyc_data.json)
 INVESTOR_DATA = {} # Will store mapping of investor_id to their data
@@ -27,17 +32,7 @@ def load_investor_data():
 
 def load_contract_abi():
     try:
-        from solcx import compile_standard
-        CONTRACT_PATH = os.path.join(os.path.dirname(__file__), '..', 'contracts', 'GCBToken.sol')
-        with open(CONTRACT_PATH, 'r') as f:
-            contract_content = f.read()
-        compiled_sol = compile_standard(
-            {"language": "Solidity", "sources": {CONTRACT_PATH: {"content": contract_content}},
-             "settings": {"outputSelection": {"*": {"*": ["abi"]}}}},
-            solc_version="0.8.20",
-            allow_paths=[os.path.dirname(CONTRACT_PATH), os.path.join(os.path.dirname(__file__), '..', 'node_modules', '@openzeppelin')]
-        )
-        return compiled_sol['contracts'][CONTRACT_PATH]['GCBToken']['abi']
+        return load_artifact('GCBToken')['abi']
     except Exception as e:
         print(f"Could not compile or load ABI for GCBToken: {e}. Please ensure contracts/GCBToken.sol is correct.")
         sys.exit(1)
@@ -53,6 +48,9 @@ def test_rwa_tokenization():
         print(f"Error: Could not connect to EVM network at {config.EVM_NETWORK_URL}")
         sys.exit(1)
     print(f"Connected to EVM network (chain ID: {w3.eth.chain_id}).")
+    # One head poll confirms every transaction below, instead of a receipt poll per transaction.
+    tracker = ReceiptTracker(w3)
+    tracker.start()
 
     deployer_private_key = config.EVM_DEPLOYER_PRIVATE_KEY
     if not deployer_private_key.startswith('0x'):
@@ -82,6 +80,7 @@ def test_rwa_tokenization():
     # We'll generate fresh EVM addresses for investors to represent distinct entities.
     print("\n--- Simulating Investor EVM Address Linking & KYC Attestation ---")
     investor_evm_wallets = {}
+    oracle_transactions = {}  # investor id -> receipt future of the oracle's transaction
     for inv_id, inv_data in INVESTOR_DATA.items():
         # Generate a new EVM wallet for each investor for demo purposes
         # In real-world, investors use their own wallets
@@ -107,15 +106,10 @@ def test_rwa_tokenization():
 
             if oracle_response.json().get('success'):
                 print(f"  Oracle successfully processed KYC attestation for Investor {inv_id}.")
-                # Wait for the EVM transaction from the oracle to be mined
-                # We need to explicitly check for the transaction from the oracle
+                # Track the EVM transaction from the oracle; all of them are awaited below
                 tx_hash = oracle_response.json().get('tx_hash')
                 if tx_hash:
-                    try:
-                        w3.eth.wait_for_transaction_receipt(Web3.to_bytes(hexstr=tx_hash))
-                        print(f"  Oracle's EVM transaction confirmed for Investor {inv_id}.")
-                    except TransactionNotFound:
-                        print(f"  Warning: Oracle's transaction {tx_hash} not found or timed out. May need more time.")
+                    oracle_transactions[inv_id] = tracker.track(tx_hash)
                 else:
                     print(f"  No transaction hash received from Oracle for Investor {inv_id}.")
 
@@ -129,9 +123,19 @@ def test_rwa_tokenization():
             print(f"  Error communicating with oracle for Investor {inv_id}: {e}")
         time.sleep(1) # Small delay between requests
 
+    for inv_id, future in oracle_transactions.items():
+        try:
+            tracker.wait_for([future], timeout=120)
+            print(f"  Oracle's EVM transaction confirmed for Investor {inv_id}.")
+        except Exception as e:
+            print(f"  Warning: Oracle's transaction for Investor {inv_id} was not confirmed: {e}")
+
     print("\n--- Verifying KYC Status on GCBToken Contract ---")
+    # One batched read for all investors instead of an eth_call per investor
+    batch_reader = BatchReader(w3, gcb_token_contract)
+    whitelist_statuses = batch_reader.is_whitelisted_many([inv_data['evm_address_linked'] for inv_data in INVESTOR_DATA.values()])
     for inv_id, inv_data in INVESTOR_DATA.items():
-        is_whitelisted = gcb_token_contract.functions.isWhitelisted(inv_data['evm_address_linked']).call()
+        is_whitelisted = whitelist_statuses[inv_data['evm_address_linked']]
         print(f"  Investor {inv_id} (EVM: {inv_data['evm_address_linked']}) whitelisted status: {is_whitelisted} (Expected: {inv_data['kyc_approved']})")
 
 
@@ -140,32 +144,26 @@ def test_rwa_tokenization():
     owner_balance = gcb_token_contract.functions.balanceOf(deployer_account.address).call()
     print(f"GCB Owner's initial token balance: {w3.from_wei(owner_balance, 'ether')} GCBS")
 
-    # Allocate 1000 tokens to each whitelisted investor
+    # Allocate 1000 tokens to each whitelisted investor, in as few batchTransfer transactions as fit the gas budget
     tokens_to_allocate_per_investor = w3.to_wei(1000, 'ether')
-    
-    for inv_id, inv_data in INVESTOR_DATA.items():
+    allocations = []
+    for row_number, (inv_id, inv_data) in enumerate(INVESTOR_DATA.items(), start=1):
         if inv_data['kyc_approved']:
             print(f"  Allocating {w3.from_wei(tokens_to_allocate_per_investor, 'ether')} GCBS to Investor {inv_id} ({inv_data['evm_address_linked']})...")
-            try:
-                nonce = w3.eth.get_transaction_count(deployer_account.address)
-                tx_hash = gcb_token_contract.functions.transfer(
-                    inv_data['evm_address_linked'],
-                    tokens_to_allocate_per_investor
-                ).transact({'from': deployer_account.address, 'nonce': nonce})
-                receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
-                if receipt.status == 1:
-                    print(f"    Allocation successful. Tx Hash: {tx_hash.hex()}")
-                else:
-                    print(f"    Allocation FAILED. Tx Hash: {tx_hash.hex()}")
-            except Exception as e:
-                print(f"    Error allocating tokens to Investor {inv_id}: {e}")
+            allocations.append((row_number, Web3.to_checksum_address(inv_data['evm_address_linked']), tokens_to_allocate_per_investor))
         else:
             print(f"  Skipping allocation to Investor {inv_id} (not KYC approved).")
-        time.sleep(1) # Small delay
+    try:
+        summary = allocate(w3, gcb_token_contract, deployer_account, deployer_private_key, allocations)
+        print(f"    Allocation finished: {summary['confirmed']} batch(es) confirmed, {summary['failed']} failed, "
+              f"{summary['skipped']} recipient(s) skipped (gas used: {summary['gas_used']}).")
+    except Exception as e:
+        print(f"    Error allocating tokens: {e}")
 
     print("\n--- Verifying Investor Balances After Allocation ---")
+    balances = batch_reader.balance_of_many([inv_data['evm_address_linked'] for inv_data in INVESTOR_DATA.values()])
     for inv_id, inv_data in INVESTOR_DATA.items():
-        balance = gcb_token_contract.functions.balanceOf(inv_data['evm_address_linked']).call()
+        balance = balances[inv_data['evm_address_linked']]
         print(f"  Investor {inv_id} ({inv_data['evm_address_linked']}) balance: {w3.from_wei(balance, 'ether')} GCBS")
 
 
@@ -196,7 +194,7 @@ def test_rwa_tokenization():
                 })
                 signed_tx = sender_wallet.sign_transaction(tx)
                 tx_hash = w3.eth.send_raw_transaction(signed_tx.rawTransaction)
-                receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+                receipt = tracker.wait(tx_hash, sender=sender_wallet.address, nonce=nonce)
                 if receipt.status == 1:
                     print(f"  SUCCESS: Whitelisted investor transfer successful. Tx Hash: {tx_hash.hex()}")
                 else:
@@ -226,7 +224,7 @@ def test_rwa_tokenization():
             # It should revert, so waiting for receipt might take long or fail.
             # A more robust way to test reverts is to use a local ganache or hardhat network.
             # For testnet, we send and check status.
-            receipt = w3.eth.wait_for_transaction_receipt(tx_hash, timeout=60)
+            receipt = tracker.wait(tx_hash, timeout=60, sender=sender_wallet.address, nonce=nonce)
             if receipt.status == 0:
                 print(f"  SUCCESS (expected): Transfer to non-whitelisted failed as expected. Tx Hash: {tx_hash.hex()}")
             else:
@@ -237,25 +235,34 @@ def test_rwa_tokenization():
             print(f"  ERROR: Transfer to non-whitelisted investor failed: {e}")
 
 
-    # --- STEP 4: Simulate Income Distribution ---
-    print("\n--- Simulating GCB Income Distribution ---")
+    # --- STEP 4: Income Distribution ---
+    print("\n--- GCB Income Distribution ---")
     income_amount_wei = w3.to_wei(5, 'ether') # 5 ETH worth of income
-    print(f"Distributing simulated income of {w3.from_wei(income_amount_wei, 'ether')} ETH...")
+    print(f"Distributing income of {w3.from_wei(income_amount_wei, 'ether')} ETH to all token holders...")
     try:
-        nonce = w3.eth.get_transaction_count(deployer_account.address)
-        tx_hash = gcb_token_contract.functions.distributeIncome(income_amount_wei).transact({
-            'from': deployer_account.address,
-            'nonce': nonce
-        })
-        receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+        receipt = fund_distribution(w3, gcb_token_contract, deployer_account, income_amount_wei, tracker=tracker)
         if receipt.status == 1:
-            print(f"Income distribution initiated successfully. Tx Hash: {tx_hash.hex()}")
-            # The event log will show the distribution.
-            # Off-chain systems would read this event to perform actual payouts.
+            print(f"Income distribution successful. Tx Hash: {receipt.transactionHash.hex()} (gas used: {receipt.gasUsed})")
         else:
-            print(f"Income distribution failed. Tx Hash: {tx_hash.hex()}")
+            print(f"Income distribution failed. Tx Hash: {receipt.transactionHash.hex()}")
     except Exception as e:
         print(f"Error during income distribution: {e}")
 
+    print("\n--- Withdrawable Income per Investor ---")
+    investor_addresses = [inv_data['evm_address_linked'] for inv_data in INVESTOR_DATA.values()]
+    for address, amount in withdrawable_income_many(gcb_token_contract, investor_addresses).items():
+        print(f"  {address}: {w3.from_wei(amount, 'ether')} ETH withdrawable")
+
+    if whitelisted_investor:
+        print(f"\nInvestor {whitelisted_investor['investor_id']} claiming income...")
+        claimer = investor_evm_wallets[whitelisted_investor['investor_id']]
+        for address, receipt in claim_income_many(w3, gcb_token_contract, [claimer], tracker=tracker).items():
+            if receipt.status == 1:
+                print(f"  SUCCESS: Income claimed by {address}. Tx Hash: {receipt.transactionHash.hex()}")
+            else:
+                print(f"  FAILURE: Income claim by {address} failed. Tx Hash: {receipt.transactionHash.hex()}")
+
+    tracker.stop()
+
 if __name__ == "__main__":
     test_rwa_tokenization()
@@ -0,0 +1,131 @@
+# scripts/token_registry.py
+import json
+import os
+import sys
+import threading
+
+from eth_utils import keccak, to_checksum_address
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import config
+
+# Deployed GCB property tokens, per chain, in one JSON file (TOKEN_REGISTRY_PATH):
+#
+#   {"<chain id>": {"implementation": "0x..", "factory": "0x..",
+#                   "tokens": {"<property id>": {"address", "name", "symbol", "owner",
+#                                                "initial_supply", "deploy_block", "tx_hash"}}}}
+#
+# deploy_property_tokens.py writes it as clones are confirmed; the oracle reads it to
+# know which tokens it attests for. Unlike ACCESS_CONTROL_CONTRACT_ADDRESS in .env it
+# holds any number of tokens.
+
+
+def property_key(property_id):
+    # The bytes32 property id GCBTokenFactory salts clones with.
+    return keccak(text=property_id)
+
+
+class TokenRegistry:
+    def __init__(self, path=None, chain_id=None):
+        self.path = path or config.TOKEN_REGISTRY_PATH
+        self.chain_id = str(chain_id) if chain_id is not None else None
+        self._lock = threading.Lock()
+        self._data = {}
+        self._stamp = None  # (mtime, size) of the file as last read
+        self.reload()
+
+    def _file_stamp(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def reload(self):
+        with self._lock:
+            self._stamp = self._file_stamp()
+            if self._stamp is not None:
+                with open(self.path) as f:
+                    self._data = json.load(f)
+            else:
+                self._data = {}
+
+    def reload_if_changed(self):
+        # Re-reads the file only if it changed since the last read; returns whether it did.
+        if self._file_stamp() == self._stamp:
+            return False
+        self.reload()
+        return True
+
+    def save(self):
+        # Written to a temporary file and renamed, so a reader never sees half a registry.
+        with self._lock:
+            temporary = self.path + '.tmp'
+            with open(temporary, 'w') as f:
+                json.dump(self._data, f, indent=4)
+            os.replace(temporary, self.path)
+            self._stamp = self._file_stamp()
+
+    def _chain(self):
+        if self.chain_id is None:
+            raise ValueError("TokenRegistry needs a chain_id to read or record deployments")
+        return self._data.setdefault(self.chain_id, {"implementation": None, "factory": None, "tokens": {}})
+
+    # --- Contracts ---
+
+    @property
+    def implementation(self):
+        with self._lock:
+            return self._chain()["implementation"]
+
+    @property
+    def factory(self):
+        with self._lock:
+            return self._chain()["factory"]
+
+    def set_contracts(self, implementation, factory):
+        with self._lock:
+            self._chain().update(implementation=implementation, factory=factory)
+
+    # --- Tokens ---
+
+    def add(self, property_id, address, **details):
+        with self._lock:
+            self._chain()["tokens"][property_id] = dict(details, address=to_checksum_address(address))
+
+    def get(self, property_id):
+        with self._lock:
+            entry = self._chain()["tokens"].get(property_id)
+            return dict(entry, property_id=property_id) if entry else None
+
+    def find(self, address):
+        # The registry entry of a token address (None if it is not registered).
+        address = to_checksum_address(address)
+        with self._lock:
+            for property_id, entry in self._chain()["tokens"].items():
+                if entry["address"] == address:
+                    return dict(entry, property_id=property_id)
+        return None
+
+    def tokens(self):
+        with self._lock:
+            return [dict(entry, property_id=property_id) for property_id, entry in self._chain()["tokens"].items()]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._chain()["tokens"])
+
+
+if __name__ == "__main__":
+    # `python scripts/token_registry.py` lists the registered tokens of the configured chain.
+    from web3 import Web3
+
+    w3 = Web3(Web3.HTTPProvider(config.EVM_NETWORK_URL))
+    if not w3.is_connected():
+        print(f"Error: Could not connect to EVM network at {config.EVM_NETWORK_URL}")
+        sys.exit(1)
+    registry = TokenRegistry(chain_id=w3.eth.chain_id)
+    print(f"Chain {registry.chain_id}: implementation {registry.implementation}, factory {registry.factory}")
+    for token in registry.tokens():
+        print(f"  {token['property_id']}: {token['address']} ({token.get('name')}, {token.get('symbol')}, block {token.get('deploy_block')})")
@@ -0,0 +1,190 @@
+# scripts/whitelist_cache.py
+import threading
+
+from web3 import Web3
+
+from gcb_event_indexer import KYC_STATUS_UPDATED_TOPIC, decode_logs
+
+# The oracle's view of GCBToken.isWhitelisted. Statuses are read from the contract the
+# first time an address is seen (in one batched read for bulk requests) and then kept
+# current from KYCStatusUpdated events, so an attestation that would not change the
+# on-chain status can be answered without sending a transaction. Updates the oracle has
+# sent but not yet seen confirmed are tracked too: a repeat of the same update joins the
+# transaction already in flight instead of sending another one. A WhitelistFollower
+# keeps the caches of every token the oracle serves current with one eth_getLogs per poll.
+
+
+class WhitelistCache:
+    def __init__(self, contract_address, from_block=0):
+        self.contract_address = Web3.to_checksum_address(contract_address)
+        self.from_block = from_block  # First block whose KYCStatusUpdated events are not applied yet
+        self._confirmed = {}  # address -> on-chain status
+        self._expected = {}  # address -> (status, tx record) for sent, unconfirmed updates
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    # --- State ---
+
+    def missing(self, addresses):
+        with self._lock:
+            return [address for address in addresses if address not in self._confirmed]
+
+    def set_confirmed(self, statuses):
+        # statuses: {address: status} read from the contract.
+        with self._lock:
+            for address, status in statuses.items():
+                if status is not None:
+                    self._confirmed.setdefault(address, status)
+
+    def expected(self, address):
+        # The in-flight update for this address, unless its transaction has failed.
+        with self._lock:
+            entry = self._expected.get(address)
+            if entry is None:
+                return None
+            if entry[1]['status'] in ('reverted', 'error'):
+                self._expected.pop(address)
+                return None
+            if entry[1]['status'] == 'confirmed':
+                # batchUpdateKYCStatus leaves every address at the requested status.
+                self._confirmed[address] = entry[0]
+                self._expected.pop(address)
+                return None
+            return entry
+
+    def current(self, address):
+        # The status the address will have once in-flight updates land (None if unknown).
+        entry = self.expected(address)
+        if entry is not None:
+            return entry[0]
+        with self._lock:
+            return self._confirmed.get(address)
+
+    def mark_sent(self, addresses, statuses, record):
+        with self._lock:
+            for address, status in zip(addresses, statuses):
+                self._expected[address] = (status, record)
+
+    def apply_updates(self, whitelist_updates):
+        # whitelist_updates: [(block, address, status)] in chain order.
+        with self._lock:
+            for _, address, status in whitelist_updates:
+                self._confirmed[address] = status
+                entry = self._expected.get(address)
+                if entry and entry[0] == status:
+                    self._expected.pop(address)
+
+    def record_lookup(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    # --- Chain access (synchronous web3) ---
+
+    def load(self, reader, addresses):
+        # Reads the statuses of addresses not cached yet through a BatchReader.
+        missing = self.missing(addresses)
+        if missing:
+            self.set_confirmed(reader.is_whitelisted_many(missing))
+
+    def refresh(self, w3):
+        # Applies KYCStatusUpdated events emitted since the last refresh.
+        return WhitelistFollower([self]).refresh(w3)
+
+    # --- Chain access (AsyncWeb3) ---
+
+    async def load_async(self, contract, addresses):
+        import asyncio
+
+        missing = self.missing(addresses)
+        if missing:
+            statuses = await asyncio.gather(*(contract.functions.isWhitelisted(address).call() for address in missing))
+            self.set_confirmed(dict(zip(missing, statuses)))
+
+    async def refresh_async(self, w3):
+        return await WhitelistFollower([self]).refresh_async(w3)
+
+
+class WhitelistFollower:
+    """
+    Applies KYCStatusUpdated events to several WhitelistCaches (one per token) from a
+    single eth_getLogs call per refresh over all their contract addresses, so following
+    more tokens costs no more RPC calls. Logs are split by emitting contract; each cache
+    only takes the blocks it has not applied yet.
+    """
+
+    def __init__(self, caches=()):
+        self.caches = {}  # contract address -> WhitelistCache
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._poller = None
+        for cache in caches:
+            self.add(cache)
+
+    def add(self, cache):
+        with self._lock:
+            self.caches[cache.contract_address] = cache
+
+    def _log_filter(self, to_block):
+        # (filter, caches) for the caches that are behind to_block; filter is None when none are.
+        with self._lock:
+            caches = [cache for cache in self.caches.values() if cache.from_block <= to_block]
+        if not caches:
+            return None, caches
+        return {
+            'address': [cache.contract_address for cache in caches],
+            'topics': [KYC_STATUS_UPDATED_TOPIC],
+            'fromBlock': min(cache.from_block for cache in caches),
+            'toBlock': to_block,
+        }, caches
+
+    def _apply(self, logs, caches, to_block):
+        by_contract = {}
+        for log in logs:
+            by_contract.setdefault(Web3.to_checksum_address(log['address']), []).append(log)
+        applied = 0
+        for cache in caches:
+            _, whitelist_updates, _ = decode_logs(
+                [log for log in by_contract.get(cache.contract_address, []) if log['blockNumber'] >= cache.from_block]
+            )
+            cache.apply_updates(whitelist_updates)
+            cache.from_block = to_block + 1
+            applied += len(whitelist_updates)
+        return applied
+
+    def refresh(self, w3):
+        # Applies the KYCStatusUpdated events emitted since the last refresh; returns how many.
+        to_block = w3.eth.block_number
+        log_filter, caches = self._log_filter(to_block)
+        if log_filter is None:
+            return 0
+        return self._apply(w3.eth.get_logs(log_filter), caches, to_block)
+
+    async def refresh_async(self, w3):
+        to_block = await w3.eth.block_number
+        log_filter, caches = self._log_filter(to_block)
+        if log_filter is None:
+            return 0
+        return self._apply(await w3.eth.get_logs(log_filter), caches, to_block)
+
+    def start(self, w3, poll_interval=1.0):
+        if self._poller is None:
+            self._poller = threading.Thread(target=self._poll, args=(w3, poll_interval), name='whitelist-follower', daemon=True)
+            self._poller.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._poller is not None:
+            self._poller.join()
+            self._poller = None
+
+    def _poll(self, w3, poll_interval):
+        while not self._stop.is_set():
+            try:
+                self.refresh(w3)
+            except Exception as e:
+                print(f"  [whitelist-cache] Error while reading KYCStatusUpdated events: {e}")
+            self._stop.wait(poll_interval)
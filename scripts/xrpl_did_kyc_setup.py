@@ -1,7 +1,8 @@
+import argparse
 import asyncio
 from xrpl.asyncio.clients import AsyncWebsocketClient
-from xrpl.wallet import generate_faucet_wallet
-from xrpl.utils import drops_to_xrp
+from xrpl.asyncio.wallet import generate_faucet_wallet
+from xrpl.wallet import Wallet
 import json
 import os
 import sys
@@ -10,51 +11,168 @@ import random
 # Add the project root to the Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 import config
+from kyc_credentials import issue_credential, load_issuer
+from kyc_store import open_kyc_store
 
-async def setup_xrpl_did_kyc_layer(num_investors=3):
-    client = AsyncWebsocketClient(config.XRPL_NETWORK_URL)
-    await client.open()
+KYC_DATA_FILE = "gcb_kyc_data.json"
+INVESTOR_SINK_FILE = "gcb_kyc_investors.jsonl"
 
+
+class XRPLFaucet:
+    # Funds new wallets from the XRPL DevNet/Testnet faucet over the shared websocket client.
+    def __init__(self, client):
+        self.client = client
+
+    async def create_wallet(self):
+        return await generate_faucet_wallet(self.client, debug=False)
+
+
+class LocalFaucet:
+    # Offline stand-in for the faucet: generates unfunded wallets locally, with an
+    # optional delay to mimic faucet latency. Good enough for fixtures and dry runs.
+    def __init__(self, delay=0.0):
+        self.delay = delay
+
+    async def create_wallet(self):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return Wallet.create()
+
+
+class InvestorSink:
+    # Appends one JSON line per provisioned investor and fsyncs it, then upserts it into
+    # the oracle's KYC store. A crash loses at most the investors still in flight.
+    def __init__(self, path, kyc_store):
+        self.path = path
+        self.kyc_store = kyc_store
+        self._file = open(path, "a")
+
+    def existing_investors(self):
+        investors = {}
+        if os.path.exists(self.path):
+            with open(self.path, "r") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        investor = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # A torn last line from a crash; that investor is redone.
+                    investors[investor["investor_id"]] = investor
+        return investors
+
+    def append(self, investor_data):
+        self._file.write(json.dumps(investor_data) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.kyc_store.upsert(investor_data)
+
+    def close(self):
+        self._file.close()
+
+
+async def provision_investor(investor_id, faucet, issuer, semaphore, max_attempts=5, base_delay=1.0):
+    async with semaphore:
+        for attempt in range(1, max_attempts + 1):
+            try:
+                wallet = await faucet.create_wallet()
+                break
+            except Exception as e:
+                if attempt == max_attempts:
+                    raise
+                delay = base_delay * (2 ** (attempt - 1)) * (1 + random.random())
+                print(f"  Investor {investor_id}: wallet creation failed ({e}), retrying in {delay:.1f}s ({attempt}/{max_attempts})")
+                await asyncio.sleep(delay)
+
+    # Simulate DID (using XRPL address as DID)
+    xrpl_did = f"did:xrpl:{wallet.address}"
+
+    # Simulate KYC status: roughly 60% approved, 40% not
+    kyc_approved = random.choices([True, False], weights=[0.6, 0.4], k=1)[0]
+    print(f"  Investor {investor_id}: {xrpl_did} KYC {'APPROVED' if kyc_approved else 'NOT APPROVED'}")
+
+    return {
+        "investor_id": investor_id,
+        "xrpl_did": xrpl_did,
+        "xrpl_wallet_seed": wallet.seed, # Store for full prototype; in real app, highly sensitive
+        "kyc_approved": kyc_approved,
+        # Signed by the KYC issuer; the oracle only honours kyc_approved when this verifies
+        "kyc_credential": issue_credential(issuer, xrpl_did, kyc_approved),
+        "evm_address_linked": None # This will be filled later by test script
+    }
+
+
+async def setup_xrpl_did_kyc_layer(num_investors=3, concurrency=8, offline=False, sink_path=INVESTOR_SINK_FILE):
     print("--- Setting up XRPL Layer (DID & KYC Simulation) ---")
 
-    gcb_kyc_data = {"investors": []}
+    client = None
+    if offline:
+        faucet = LocalFaucet()
+        print("Offline mode: generating wallets locally instead of using the XRPL faucet.")
+    else:
+        client = AsyncWebsocketClient(config.XRPL_NETWORK_URL)
+        await client.open()
+        faucet = XRPLFaucet(client)
+
+    # Investors are upserted into the oracle's KYC store as soon as they are created,
+    # so a running oracle can attest them without a restart.
+    kyc_store = open_kyc_store(config.KYC_STORE_URL)
+    sink = InvestorSink(sink_path, kyc_store)
+    issuer = load_issuer()
+    print(f"KYC credentials issued by did:xrpl:{issuer.address}")
 
     try:
-        for i in range(num_investors):
-            print(f"\nGenerating XRPL Wallet for Investor {i+1} (via faucet)...")
-            wallet = await generate_faucet_wallet(client, debug=True)
-            print(f"Generated XRPL Wallet Address: {wallet.address}")
-            print(f"Wallet Seed: {wallet.seed}")
-            # print(f"Initial balance: {drops_to_xrp(await client.request(AccountInfo(account=wallet.address))['result']['account_data']['Balance'])} XRP")
-
-            # Simulate DID (using XRPL address as DID)
-            xrpl_did = f"did:xrpl:{wallet.address}"
-            print(f"Simulated XRPL DID: {xrpl_did}")
-
-            # Simulate KYC status: roughly 60% approved, 40% not
-            kyc_approved = random.choices([True, False], weights=[0.6, 0.4], k=1)[0]
-            print(f"Simulated KYC Status: {'APPROVED' if kyc_approved else 'NOT APPROVED'}")
-
-            investor_data = {
-                "investor_id": i + 1,
-                "xrpl_did": xrpl_did,
-                "xrpl_wallet_seed": wallet.seed, # Store for full prototype; in real app, highly sensitive
-                "kyc_approved": kyc_approved,
-                "evm_address_linked": None # This will be filled later by test script
-            }
-            gcb_kyc_data["investors"].append(investor_data)
+        # Re-runs pick up where the last run stopped: investors already in the sink are kept.
+        investors = sink.existing_investors()
+        # Investors provisioned before credentials were issued get one now.
+        for investor in investors.values():
+            if "kyc_credential" not in investor:
+                investor["kyc_credential"] = issue_credential(issuer, investor["xrpl_did"], investor["kyc_approved"])
+                sink.append(investor)
+        missing = [i for i in range(1, num_investors + 1) if i not in investors]
+        print(f"{len(investors)} investor(s) already provisioned, creating {len(missing)} more "
+              f"(concurrency: {concurrency}).")
+
+        semaphore = asyncio.Semaphore(concurrency)
+        tasks = [asyncio.create_task(provision_investor(i, faucet, issuer, semaphore)) for i in missing]
+        failures = 0
+        for task in asyncio.as_completed(tasks):
+            try:
+                investor_data = await task
+            except Exception as e:
+                failures += 1
+                print(f"  Error provisioning investor: {e}")
+                continue
+            sink.append(investor_data)
+            investors[investor_data["investor_id"]] = investor_data
+
+        if failures:
+            print(f"WARNING: {failures} investor(s) could not be provisioned. Re-run to retry them.")
 
         # Save this info for the oracle and other scripts
-        file_path = "gcb_kyc_data.json"
-        with open(file_path, "w") as f:
+        gcb_kyc_data = {"investors": [investors[i] for i in sorted(investors)]}
+        with open(KYC_DATA_FILE, "w") as f:
             json.dump(gcb_kyc_data, f, indent=4)
-        print(f"\nXRPL DID and KYC simulation data saved to {file_path}")
+        print(f"\nXRPL DID and KYC simulation data saved to {KYC_DATA_FILE} ({len(investors)} investor(s))")
 
     except Exception as e:
         print(f"Error during XRPL DID/KYC setup: {e}")
     finally:
-        await client.close()
+        sink.close()
+        kyc_store.close()
+        if client is not None:
+            await client.close()
 
-if __name__ == "__main__":
-    asyncio.run(setup_xrpl_did_kyc_layer(num_investors=4)) # Setup 4 investors for demo
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Provision XRPL investor wallets, DIDs and simulated KYC data.")
+    parser.add_argument("--investors", type=int, default=4, help="Total number of investors to provision") # Setup 4 investors for demo
+    parser.add_argument("--concurrency", type=int, default=8, help="Wallet creations in flight at once")
+    parser.add_argument("--offline", action="store_true", help="Generate wallets locally instead of using the faucet")
+    parser.add_argument("--sink", default=INVESTOR_SINK_FILE, help="JSONL file investors are appended to as they complete")
+    args = parser.parse_args(argv)
+    asyncio.run(setup_xrpl_did_kyc_layer(args.investors, args.concurrency, args.offline, args.sink))
 
+
+if __name__ == "__main__":
+    main()